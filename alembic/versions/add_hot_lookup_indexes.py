@@ -0,0 +1,38 @@
+"""add indexes for hot lookup columns
+
+Revision ID: add_hot_lookup_indexes
+Revises: add_scheduled_reminders
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_hot_lookup_indexes'
+down_revision = 'add_scheduled_reminders'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_notifications_student_read', 'notifications', ['student_id', 'is_read'], if_not_exists=True)
+    op.create_index('ix_notifications_admin_read', 'notifications', ['admin_id', 'is_read'], if_not_exists=True)
+    op.create_index('ix_push_messages_user_id', 'push_messages', ['user_id'], if_not_exists=True)
+    op.create_index('ix_student_homework_student_homework_assigned', 'student_homework', ['student_id', 'homework_id', 'assigned_at'], if_not_exists=True)
+    op.create_index('ix_scheduled_reminders_sent_time', 'scheduled_reminders', ['is_sent', 'reminder_time'], if_not_exists=True)
+    op.create_index('ix_schedule_day_active', 'schedule', ['day_of_week', 'is_active'], if_not_exists=True)
+    op.create_index('ix_students_password', 'students', ['password'], if_not_exists=True)
+    op.create_index('ix_students_exam_type', 'students', ['exam_type'], if_not_exists=True)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_students_exam_type', table_name='students', if_exists=True)
+    op.drop_index('ix_students_password', table_name='students', if_exists=True)
+    op.drop_index('ix_schedule_day_active', table_name='schedule', if_exists=True)
+    op.drop_index('ix_scheduled_reminders_sent_time', table_name='scheduled_reminders', if_exists=True)
+    op.drop_index('ix_student_homework_student_homework_assigned', table_name='student_homework', if_exists=True)
+    op.drop_index('ix_push_messages_user_id', table_name='push_messages', if_exists=True)
+    op.drop_index('ix_notifications_admin_read', table_name='notifications', if_exists=True)
+    op.drop_index('ix_notifications_student_read', table_name='notifications', if_exists=True)
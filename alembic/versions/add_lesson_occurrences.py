@@ -0,0 +1,42 @@
+"""add lesson_occurrences table
+
+Revision ID: add_lesson_occurrences
+Revises: add_task_sort_key
+Create Date: 2026-10-17 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_lesson_occurrences'
+down_revision = 'add_task_sort_key'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('lesson_occurrences',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('schedule_id', sa.Integer(), nullable=False),
+    sa.Column('student_id', sa.Integer(), nullable=False),
+    sa.Column('occurrence_date', sa.Date(), nullable=False),
+    sa.Column('start_time', sa.DateTime(), nullable=False),
+    sa.Column('duration', sa.Integer(), nullable=False),
+    sa.Column('reschedule_request_id', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['reschedule_request_id'], ['reschedule_requests.id'], ),
+    sa.ForeignKeyConstraint(['schedule_id'], ['schedule.id'], ),
+    sa.ForeignKeyConstraint(['student_id'], ['students.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('schedule_id', 'occurrence_date', name='unique_lesson_occurrence')
+    )
+    op.create_index('ix_lesson_occurrences_start_time', 'lesson_occurrences', ['start_time'])
+    op.create_index('ix_lesson_occurrences_student_start', 'lesson_occurrences', ['student_id', 'start_time'])
+    # Сами занятия разворачивает Database.refresh_lesson_occurrences при запуске бота
+
+
+def downgrade() -> None:
+    op.drop_index('ix_lesson_occurrences_student_start', table_name='lesson_occurrences')
+    op.drop_index('ix_lesson_occurrences_start_time', table_name='lesson_occurrences')
+    op.drop_table('lesson_occurrences')
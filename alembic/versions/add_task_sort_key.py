@@ -0,0 +1,45 @@
+"""add persisted task-number sort key to homework and notes
+
+Revision ID: add_task_sort_key
+Revises: add_hot_lookup_indexes
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from core.database import compute_task_sort_key
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_task_sort_key'
+down_revision = 'add_hot_lookup_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    conn = op.get_bind()
+    for table in ('homework', 'notes'):
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.add_column(sa.Column('task_major', sa.Integer(), nullable=True))
+            batch_op.add_column(sa.Column('task_minor', sa.Integer(), nullable=True))
+            batch_op.add_column(sa.Column('task_tail', sa.String(), nullable=True))
+        # Заполняем ключ сортировки для существующих записей
+        rows = conn.execute(sa.text(f"SELECT id, title FROM {table}")).fetchall()
+        for row_id, title in rows:
+            major, minor, tail = compute_task_sort_key(title)
+            conn.execute(
+                sa.text(f"UPDATE {table} SET task_major = :major, task_minor = :minor, task_tail = :tail WHERE id = :id"),
+                {'major': major, 'minor': minor, 'tail': tail, 'id': row_id}
+            )
+        op.create_index(f'ix_{table}_exam_task_order', table, ['exam_type', 'task_major', 'task_minor', 'task_tail'], if_not_exists=True)
+
+
+def downgrade() -> None:
+    for table in ('notes', 'homework'):
+        op.drop_index(f'ix_{table}_exam_task_order', table_name=table, if_exists=True)
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_column('task_tail')
+            batch_op.drop_column('task_minor')
+            batch_op.drop_column('task_major')
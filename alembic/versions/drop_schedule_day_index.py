@@ -0,0 +1,25 @@
+"""drop unused schedule (day_of_week, is_active) index
+
+Revision ID: drop_schedule_day_index
+Revises: add_lesson_occurrences
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'drop_schedule_day_index'
+down_revision = 'add_lesson_occurrences'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Занятия на день читаются из lesson_occurrences, индекс больше не используется
+    op.drop_index('ix_schedule_day_active', table_name='schedule', if_exists=True)
+
+
+def downgrade() -> None:
+    op.create_index('ix_schedule_day_active', 'schedule', ['day_of_week', 'is_active'], if_not_exists=True)
@@ -6,6 +6,9 @@ from telegram.ext import (
     ContextTypes, MessageHandler, filters, ConversationHandler, JobQueue
 )
 from core.database import Database
+from core.async_database import AsyncDatabase
+from core.request_memo import BotContext
+from core.slot_prewarm import get_slot_prewarmer
 from core.migrations import migrate_database
 from handlers.admin_handlers import (
     admin_menu, handle_admin_actions, start_add_student,
@@ -40,9 +43,9 @@ from handlers.admin_handlers import (
     SCHEDULE_EDIT_CHOOSE_PARAM, SCHEDULE_EDIT_DAY, SCHEDULE_EDIT_TIME, SCHEDULE_EDIT_DURATION,
     show_reschedule_settings, show_reschedule_hours_settings, show_reschedule_end_hours_settings,
     save_reschedule_hours, show_reschedule_days_settings, toggle_reschedule_day,
-    show_reschedule_interval_settings, save_reschedule_interval,
+    show_reschedule_interval_settings, save_reschedule_interval, approve_reschedule,
     restore_reminders_from_database, check_and_send_reminders,
-    check_pending_reminders
+    check_pending_reminders, refresh_lesson_occurrences_job, plan_reminders_job
 )
 from handlers.student_handlers import (
     student_menu, handle_student_actions, handle_password, ENTER_PASSWORD,
@@ -117,15 +120,40 @@ def main():
     migrate_database()
     
     # Создаем приложение
-    application = Application.builder().token(token).build()
+    # BotContext даёт обработчикам context.db с memo на время одного апдейта
+    application = Application.builder().token(token).context_types(ContextTypes(context=BotContext)).build()
     
     # Инициализируем базу данных
     db = Database()
     application.bot_data['db'] = db
+    # Реестр администраторов загружается один раз и обновляется в add_admin
+    db.load_admin_registry()
+    # Асинхронный слой БД для обработчиков (общие с Database кэши и диспетчер напоминаний)
+    application.bot_data['async_db'] = AsyncDatabase()
+
+    # Разворачиваем расписание в занятия на конкретные даты и сдвигаем горизонт каждую ночь
+    db.refresh_lesson_occurrences()
+    application.job_queue.run_daily(
+        refresh_lesson_occurrences_job,
+        time=time(hour=3, minute=0, tzinfo=pytz.timezone('Europe/Moscow')),
+        name='refresh_lesson_occurrences'
+    )
+
+    # Планируем напоминания для всех студентов на несколько дней вперёд: сейчас и каждую ночь после обновления занятий
+    planned = db.plan_reminders()
+    print(f'[reminder] При запуске создано {len(planned)} напоминаний')
+    application.job_queue.run_daily(
+        plan_reminders_job,
+        time=time(hour=3, minute=15, tzinfo=pytz.timezone('Europe/Moscow')),
+        name='plan_reminders'
+    )
 
     # Восстанавливаем напоминания из базы данных при запуске
     restore_reminders_from_database(application.job_queue, db)
 
+    # Прогреваем кэш слотов для переносов на весь горизонт записи и обновляем его при изменениях
+    get_slot_prewarmer().start(application.job_queue)
+
     # ГЛОБАЛЬНЫЕ обработчики для статистики (ставим до ConversationHandler-ов)
     application.add_handler(CallbackQueryHandler(handle_statistics_student_choice, pattern="^statistics_page_\\d+$"))
 
@@ -572,6 +600,7 @@ def main():
     application.add_handler(CallbackQueryHandler(handle_admin_actions, pattern="^reschedule_settings_hours$"))
     application.add_handler(CallbackQueryHandler(handle_admin_actions, pattern="^reschedule_settings_days$"))
     application.add_handler(CallbackQueryHandler(handle_admin_actions, pattern="^reschedule_settings_interval$"))
+    application.add_handler(CallbackQueryHandler(approve_reschedule, pattern="^reschedule_approve_\\d+$"))
     application.add_handler(CallbackQueryHandler(handle_admin_actions, pattern="^reschedule_day_"))
     application.add_handler(CallbackQueryHandler(handle_admin_actions, pattern="^reschedule_interval_"))
     application.add_handler(CallbackQueryHandler(handle_admin_actions, pattern="^reschedule_start_"))
@@ -0,0 +1,63 @@
+import threading
+
+class AdminRegistry:
+    """Реестр администраторов в памяти: telegram_id -> запись Admin.
+
+    Администраторов единицы и меняются они редко, поэтому реестр
+    загружается из базы один раз (при запуске или первом обращении)
+    и перезагружается после add_admin. Проверка is_admin и поиск
+    администратора по telegram_id не обращаются к базе.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._by_telegram_id = {}  # telegram_id -> Admin (в порядке id)
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def load(self, admins):
+        """Полностью заменяет реестр списком записей Admin"""
+        by_telegram_id = {admin.telegram_id: admin for admin in sorted(admins, key=lambda a: a.id)}
+        with self._lock:
+            self._by_telegram_id = by_telegram_id
+            self._loaded = True
+
+    def invalidate(self):
+        """Сбрасывает реестр; он будет загружен при следующем обращении"""
+        with self._lock:
+            self._loaded = False
+
+    def is_admin(self, telegram_id: int) -> bool:
+        return telegram_id in self._by_telegram_id
+
+    def get(self, telegram_id: int):
+        """Возвращает запись Admin по telegram_id или None"""
+        return self._by_telegram_id.get(telegram_id)
+
+    def telegram_ids(self) -> list:
+        """Возвращает telegram_id всех администраторов"""
+        return list(self._by_telegram_id)
+
+    def patch(self, admin_id: int, **values):
+        """Обновляет поля записи администратора с указанным id"""
+        with self._lock:
+            for admin in self._by_telegram_id.values():
+                if admin.id == admin_id:
+                    for name, value in values.items():
+                        setattr(admin, name, value)
+
+# Общий реестр администраторов для всего процесса
+_admin_registry = None
+_admin_registry_lock = threading.Lock()
+
+def get_admin_registry() -> AdminRegistry:
+    """Возвращает общий реестр администраторов (создается один раз)"""
+    global _admin_registry
+    if _admin_registry is None:
+        with _admin_registry_lock:
+            if _admin_registry is None:
+                _admin_registry = AdminRegistry()
+    return _admin_registry
@@ -0,0 +1,359 @@
+from sqlalchemy import select, update, delete, insert, func
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from datetime import datetime
+import threading
+import pytz
+
+from core.database import (
+    DATABASE_URL, SQLITE_POOL_SIZE, SQLITE_MAX_OVERFLOW, SQLITE_POOL_TIMEOUT,
+    configure_sqlite_engine, moscow_now, Student, Homework, StudentHomework, Notification, PushMessage,
+    Schedule, LessonOccurrence, ScheduledReminder
+)
+from core.student_cache import get_student_cache
+from core.notification_counter import get_unread_counter
+from core.reminder_dispatcher import get_reminder_dispatcher
+
+# URL для асинхронного драйвера aiosqlite (та же база, что и у синхронного Database)
+ASYNC_DATABASE_URL = DATABASE_URL.replace('sqlite://', 'sqlite+aiosqlite://', 1)
+
+DAY_NAMES = ['Понедельник', 'Вторник', 'Среда', 'Четверг', 'Пятница', 'Суббота', 'Воскресенье']
+
+# Общие для процесса асинхронный движок и фабрика сессий
+_async_engine = None
+_async_session_factory = None
+_async_engine_lock = threading.Lock()
+
+def get_async_engine():
+    """Возвращает общий асинхронный движок SQLAlchemy (создается один раз)"""
+    global _async_engine, _async_session_factory
+    if _async_engine is None:
+        with _async_engine_lock:
+            if _async_engine is None:
+                engine = create_async_engine(
+                    ASYNC_DATABASE_URL,
+                    # по умолчанию aiosqlite использует NullPool и открывает файл на каждый запрос
+                    poolclass=AsyncAdaptedQueuePool,
+                    pool_size=SQLITE_POOL_SIZE,
+                    max_overflow=SQLITE_MAX_OVERFLOW,
+                    pool_timeout=SQLITE_POOL_TIMEOUT,
+                )
+                # Тот же профиль PRAGMA, что и у синхронного движка
+                configure_sqlite_engine(engine.sync_engine)
+                _async_session_factory = async_sessionmaker(engine, expire_on_commit=False)
+                _async_engine = engine
+    return _async_engine
+
+def get_async_session_factory():
+    """Возвращает общую фабрику асинхронных сессий"""
+    get_async_engine()
+    return _async_session_factory
+
+class AsyncDatabase:
+    """Асинхронный аналог Database для горячих путей обработчиков.
+
+    Покрывает студентов, уведомления и push-сообщения, выдачу домашних заданий,
+    расписание и напоминания. Методы — корутины на AsyncSession и aiosqlite,
+    поэтому ожидание блокировки SQLite не останавливает цикл событий. Кэш
+    студентов, счётчики уведомлений и диспетчер напоминаний общие с Database,
+    так что записи через любой из слоёв видны обоим. Схему создаёт и мигрирует Database.
+    """
+
+    def __init__(self):
+        self.engine = get_async_engine()
+        self.Session = get_async_session_factory()
+
+    async def dispose(self):
+        """Закрывает соединения пула"""
+        await self.engine.dispose()
+
+    # Методы для работы со студентами
+    async def get_student_by_telegram_id(self, telegram_id: int) -> Student:
+        student = get_student_cache().get_by_telegram_id(telegram_id)
+        if student is not None:
+            return student
+        generation = get_student_cache().generation()
+        async with self.Session() as session:
+            result = await session.execute(select(Student).filter_by(telegram_id=telegram_id))
+            student = result.scalars().first()
+        get_student_cache().put(student, generation)
+        return student
+
+    async def get_student_by_id(self, student_id: int) -> Student:
+        """Получает студента по его ID"""
+        student = get_student_cache().get_by_id(student_id)
+        if student is not None:
+            return student
+        generation = get_student_cache().generation()
+        async with self.Session() as session:
+            student = await session.get(Student, student_id)
+        get_student_cache().put(student, generation)
+        return student
+
+    async def get_student_menu_message_id(self, student_id: int) -> int:
+        async with self.Session() as session:
+            result = await session.execute(select(Student.last_menu_message_id).filter_by(id=student_id))
+            return result.scalar()
+
+    async def update_student_menu_message_id(self, student_id: int, message_id: int):
+        async with self.Session() as session:
+            result = await session.execute(
+                update(Student).where(Student.id == student_id).values(last_menu_message_id=message_id)
+            )
+            await session.commit()
+        if result.rowcount:
+            get_student_cache().patch(student_id, last_menu_message_id=message_id)
+
+    # Методы для работы с уведомлениями
+    async def add_notification(self, student_id: int, notif_type: str, text: str, link: str = None):
+        async with self.Session() as session:
+            session.add(Notification(student_id=student_id, type=notif_type, text=text, link=link))
+            await session.commit()
+        get_unread_counter().increment(('student', student_id))
+
+    async def add_notifications_bulk(self, notifications: list) -> int:
+        """Добавляет пачку уведомлений студентам одной транзакцией.
+        notifications — список кортежей (student_id, notif_type, text, link)."""
+        rows = [
+            {'student_id': student_id, 'type': notif_type, 'text': text, 'link': link}
+            for student_id, notif_type, text, link in notifications
+        ]
+        if not rows:
+            return 0
+        async with self.Session() as session:
+            await session.execute(insert(Notification), rows)
+            await session.commit()
+        for row in rows:
+            get_unread_counter().increment(('student', row['student_id']))
+        return len(rows)
+
+    async def get_notifications(self, student_id: int, only_unread: bool = False) -> list:
+        async with self.Session() as session:
+            stmt = select(Notification).filter_by(student_id=student_id)
+            if only_unread:
+                stmt = stmt.filter_by(is_read=False)
+            result = await session.execute(stmt.order_by(Notification.created_at.asc()))
+            return list(result.scalars().all())
+
+    async def mark_notifications_read(self, student_id: int):
+        async with self.Session() as session:
+            await session.execute(
+                update(Notification)
+                .where(Notification.student_id == student_id, Notification.is_read == False)
+                .values(is_read=True)
+            )
+            await session.commit()
+        get_unread_counter().reset(('student', student_id))
+
+    async def count_unread_notifications(self, student_id: int) -> int:
+        """Возвращает количество непрочитанных уведомлений студента (общий с Database кэш счётчиков)"""
+        key = ('student', student_id)
+        count = get_unread_counter().get(key)
+        if count is not None:
+            return count
+        generation = get_unread_counter().generation(key)
+        async with self.Session() as session:
+            result = await session.execute(
+                select(func.count(Notification.id)).filter_by(student_id=student_id, is_read=False)
+            )
+            count = result.scalar_one()
+        get_unread_counter().set(key, count, generation)
+        return count
+
+    async def has_unread_notifications(self, student_id: int) -> bool:
+        return await self.count_unread_notifications(student_id) > 0
+
+    async def clear_notifications(self, student_id: int):
+        async with self.Session() as session:
+            await session.execute(delete(Notification).where(Notification.student_id == student_id))
+            await session.commit()
+        get_unread_counter().reset(('student', student_id))
+
+    async def add_push_message(self, user_id: int, message_id: int):
+        async with self.Session() as session:
+            session.add(PushMessage(user_id=user_id, message_id=message_id))
+            await session.commit()
+
+    async def add_push_messages_bulk(self, push_messages: list) -> int:
+        """Сохраняет пачку push-сообщений одной транзакцией.
+        push_messages — список кортежей (user_id, message_id)."""
+        rows = [{'user_id': user_id, 'message_id': message_id} for user_id, message_id in push_messages]
+        if not rows:
+            return 0
+        async with self.Session() as session:
+            await session.execute(insert(PushMessage), rows)
+            await session.commit()
+        return len(rows)
+
+    async def get_push_messages(self, user_id: int) -> list:
+        async with self.Session() as session:
+            result = await session.execute(select(PushMessage).filter_by(user_id=user_id))
+            return list(result.scalars().all())
+
+    async def clear_push_messages(self, user_id: int):
+        """Очищает push-сообщения пользователя"""
+        async with self.Session() as session:
+            await session.execute(delete(PushMessage).where(PushMessage.user_id == user_id))
+            await session.commit()
+
+    # Методы для работы с домашними заданиями
+    async def get_homework_by_id(self, homework_id: int) -> Homework:
+        """Получает домашнее задание по ID"""
+        async with self.Session() as session:
+            return await session.get(Homework, homework_id)
+
+    async def is_homework_assigned_to_student(self, student_id: int, homework_id: int) -> bool:
+        """Проверяет, назначено ли задание студенту"""
+        async with self.Session() as session:
+            result = await session.execute(
+                select(StudentHomework.id).filter_by(student_id=student_id, homework_id=homework_id).limit(1)
+            )
+            return result.first() is not None
+
+    async def assign_homework_to_student(self, student_id: int, homework_id: int) -> bool:
+        async with self.Session() as session:
+            try:
+                result = await session.execute(
+                    select(StudentHomework).filter_by(student_id=student_id, homework_id=homework_id)
+                )
+                existing = result.scalars().first()
+                if existing:
+                    # Если задание уже назначено, обновляем дату назначения и сбрасываем статус
+                    existing.assigned_at = datetime.now()
+                    existing.status = 'assigned'
+                else:
+                    session.add(StudentHomework(student_id=student_id, homework_id=homework_id))
+                await session.commit()
+                return True
+            except Exception:
+                await session.rollback()
+                return False
+
+    async def update_homework_status(self, student_id: int, homework_id: int, status: str) -> bool:
+        """Обновляет статус домашнего задания для студента. Если записи нет — создаёт новую."""
+        async with self.Session() as session:
+            try:
+                result = await session.execute(
+                    select(StudentHomework).filter_by(student_id=student_id, homework_id=homework_id)
+                )
+                student_homework = result.scalars().first()
+                if student_homework:
+                    student_homework.status = status
+                else:
+                    session.add(StudentHomework(student_id=student_id, homework_id=homework_id, status=status))
+                await session.commit()
+                return True
+            except Exception:
+                await session.rollback()
+                return False
+
+    async def get_homeworks_for_student(self, student_id: int) -> list:
+        async with self.Session() as session:
+            result = await session.execute(select(StudentHomework).filter_by(student_id=student_id))
+            return list(result.scalars().all())
+
+    # Методы для работы с расписанием
+    async def get_student_schedule(self, student_id: int) -> list:
+        """Получает расписание студента (еженедельные правила)"""
+        async with self.Session() as session:
+            result = await session.execute(
+                select(Schedule)
+                .filter_by(student_id=student_id, is_active=True)
+                .order_by(Schedule.day_of_week, Schedule.time)
+            )
+            return list(result.scalars().all())
+
+    async def get_schedule_by_id(self, schedule_id: int) -> Schedule:
+        """Получает занятие по ID"""
+        async with self.Session() as session:
+            return await session.get(Schedule, schedule_id)
+
+    async def get_next_lesson(self, student_id: int) -> dict:
+        """Получает информацию о следующем занятии студента из lesson_occurrences (с учётом переносов)"""
+        async with self.Session() as session:
+            result = await session.execute(
+                select(LessonOccurrence, Schedule)
+                .join(Schedule, Schedule.id == LessonOccurrence.schedule_id)
+                .where(
+                    LessonOccurrence.student_id == student_id,
+                    LessonOccurrence.start_time > moscow_now(),
+                    Schedule.is_active == True
+                )
+                .order_by(LessonOccurrence.start_time)
+                .limit(1)
+            )
+            row = result.first()
+        if not row:
+            return None
+        occurrence, schedule = row
+        return {
+            'schedule': schedule,
+            'date': pytz.timezone('Europe/Moscow').localize(occurrence.start_time),
+            'day_name': DAY_NAMES[occurrence.start_time.weekday()],
+            'time': occurrence.start_time.strftime("%H:%M"),
+            'duration': occurrence.duration
+        }
+
+    # Методы для работы с напоминаниями
+    async def get_reminder_batch(self, reminder_ids: list = None, current_time: datetime = None) -> list:
+        """Неотправленные напоминания вместе со студентом и занятием одним запросом.
+
+        Берутся напоминания с указанными id, а без них — все наступившие к current_time.
+        Возвращает список (ScheduledReminder, Student или None, Schedule или None).
+        """
+        stmt = select(ScheduledReminder, Student, Schedule).outerjoin(
+            Student, Student.id == ScheduledReminder.student_id
+        ).outerjoin(
+            Schedule, Schedule.id == ScheduledReminder.schedule_id
+        ).where(ScheduledReminder.is_sent == False)
+        if reminder_ids is not None:
+            if not reminder_ids:
+                return []
+            stmt = stmt.where(ScheduledReminder.id.in_(list(reminder_ids)))
+        else:
+            moscow_tz = pytz.timezone('Europe/Moscow')
+            if current_time is None:
+                current_time = datetime.now(moscow_tz)
+            elif current_time.tzinfo is None:
+                current_time = moscow_tz.localize(current_time)
+            stmt = stmt.where(ScheduledReminder.reminder_time <= current_time)
+        async with self.Session() as session:
+            result = await session.execute(stmt.order_by(ScheduledReminder.reminder_time, ScheduledReminder.id))
+            return [tuple(row) for row in result.all()]
+
+    async def mark_reminders_sent(self, reminder_ids: list) -> int:
+        """Отмечает пачку напоминаний отправленными одним UPDATE и снимает их с диспетчера"""
+        reminder_ids = list(reminder_ids)
+        if not reminder_ids:
+            return 0
+        async with self.Session() as session:
+            try:
+                result = await session.execute(
+                    update(ScheduledReminder).where(ScheduledReminder.id.in_(reminder_ids)).values(is_sent=True)
+                )
+                await session.commit()
+            except Exception as e:
+                await session.rollback()
+                print(f'[reminder] Ошибка при отметке напоминаний как отправленных: {e}')
+                return 0
+        get_reminder_dispatcher().cancel(reminder_ids)
+        return result.rowcount
+
+    async def delete_unsent_student_reminders(self, student_id: int) -> list:
+        """Удаляет неотправленные напоминания студента, снимает их с диспетчера и возвращает их id"""
+        async with self.Session() as session:
+            try:
+                result = await session.execute(
+                    delete(ScheduledReminder).where(
+                        ScheduledReminder.student_id == student_id,
+                        ScheduledReminder.is_sent == False
+                    ).returning(ScheduledReminder.id)
+                )
+                reminder_ids = [reminder_id for reminder_id, in result.all()]
+                await session.commit()
+            except Exception as e:
+                await session.rollback()
+                print(f'[reminder] Ошибка при удалении напоминаний студента: {e}')
+                return []
+        get_reminder_dispatcher().cancel(reminder_ids)
+        return reminder_ids
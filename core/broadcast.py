@@ -0,0 +1,149 @@
+from telegram.error import RetryAfter
+import asyncio
+import os
+import threading
+import time
+
+# Лимиты Telegram: ~30 сообщений в секунду на бота и не чаще 1 сообщения в секунду в один чат
+BROADCAST_RATE = float(os.getenv("BROADCAST_RATE", "30"))
+BROADCAST_PER_CHAT_INTERVAL = float(os.getenv("BROADCAST_PER_CHAT_INTERVAL", "1"))
+BROADCAST_CONCURRENCY = int(os.getenv("BROADCAST_CONCURRENCY", "30"))
+BROADCAST_MAX_RETRIES = int(os.getenv("BROADCAST_MAX_RETRIES", "3"))
+BROADCAST_PROGRESS_INTERVAL = float(os.getenv("BROADCAST_PROGRESS_INTERVAL", "3"))
+
+def _retry_after_seconds(error: RetryAfter) -> float:
+    """Возвращает задержку из RetryAfter в секундах (int или timedelta в разных версиях PTB)"""
+    delay = error.retry_after
+    return delay.total_seconds() if hasattr(delay, 'total_seconds') else float(delay)
+
+class TokenBucket:
+    """Асинхронное ведро токенов: не больше rate операций в секунду с запасом capacity"""
+
+    def __init__(self, rate: float, capacity: float = None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = None
+
+    async def acquire(self):
+        """Ждёт и забирает один токен (ожидающие обслуживаются по очереди)"""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    def pause(self, seconds: float):
+        """Останавливает выдачу токенов (после RetryAfter от Telegram)"""
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        self._tokens = 0
+        self._updated = self._paused_until
+
+class BroadcastEngine:
+    """Параллельная рассылка с учётом лимитов Telegram.
+
+    Каждый получатель — это chat_id и список шагов (функций без аргументов,
+    возвращающих корутину, например отправка push и меню). Шаги одного чата
+    выполняются по порядку с интервалом per_chat_interval, разные чаты
+    обрабатываются параллельно, а общий поток ограничен ведром токенов.
+    При RetryAfter рассылка приостанавливается на указанное время и шаг
+    повторяется; при другой ошибке оставшиеся шаги получателя пропускаются.
+    """
+
+    def __init__(self, rate: float = BROADCAST_RATE, per_chat_interval: float = BROADCAST_PER_CHAT_INTERVAL,
+                 concurrency: int = BROADCAST_CONCURRENCY, max_retries: int = BROADCAST_MAX_RETRIES,
+                 progress_interval: float = BROADCAST_PROGRESS_INTERVAL):
+        self.per_chat_interval = per_chat_interval
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.progress_interval = progress_interval
+        self._bucket = TokenBucket(rate)
+        self._next_chat_send = {}  # chat_id -> время, раньше которого в чат писать нельзя
+
+    async def _wait_chat(self, chat_id):
+        """Резервирует ближайшее разрешённое время отправки в чат и ждёт его"""
+        now = time.monotonic()
+        send_at = max(now, self._next_chat_send.get(chat_id, 0.0))
+        self._next_chat_send[chat_id] = send_at + self.per_chat_interval
+        if send_at > now:
+            await asyncio.sleep(send_at - now)
+
+    async def _send_step(self, chat_id, step, stats: dict):
+        for attempt in range(self.max_retries + 1):
+            await self._wait_chat(chat_id)
+            await self._bucket.acquire()
+            try:
+                return await step()
+            except RetryAfter as e:
+                delay = _retry_after_seconds(e)
+                stats['retries'] += 1
+                self._bucket.pause(delay)
+                if attempt == self.max_retries:
+                    raise
+                print(f'[broadcast] RetryAfter {delay} с для чата {chat_id}, попытка {attempt + 1}')
+                await asyncio.sleep(delay)
+
+    async def _run_recipient(self, chat_id, steps, stats: dict, slots: asyncio.Semaphore):
+        async with slots:
+            try:
+                for step in steps:
+                    await self._send_step(chat_id, step, stats)
+                stats['sent'] += 1
+            except Exception as e:
+                stats['failed'] += 1
+                print(f'[broadcast] Ошибка отправки в чат {chat_id}: {e}')
+            finally:
+                stats['done'] += 1
+
+    async def run(self, recipients, on_progress=None) -> dict:
+        """Выполняет рассылку и возвращает итог: total, done, sent, failed, retries, elapsed.
+
+        recipients — итерация пар (chat_id, [шаги]); on_progress — корутина,
+        которой раз в progress_interval секунд передаётся текущий итог.
+        """
+        recipients = list(recipients)
+        stats = {'total': len(recipients), 'done': 0, 'sent': 0, 'failed': 0, 'retries': 0, 'elapsed': 0.0}
+        started = time.monotonic()
+        slots = asyncio.Semaphore(self.concurrency)
+        pending = {
+            asyncio.ensure_future(self._run_recipient(chat_id, steps, stats, slots))
+            for chat_id, steps in recipients
+        }
+        while pending:
+            _, pending = await asyncio.wait(pending, timeout=self.progress_interval)
+            stats['elapsed'] = time.monotonic() - started
+            if pending and on_progress:
+                try:
+                    await on_progress(dict(stats))
+                except Exception as e:
+                    print(f'[broadcast] Ошибка при обновлении прогресса: {e}')
+        stats['elapsed'] = time.monotonic() - started
+        # Забываем чаты, интервал для которых уже истёк
+        now = time.monotonic()
+        for chat_id in [c for c, t in self._next_chat_send.items() if t <= now]:
+            del self._next_chat_send[chat_id]
+        return stats
+
+# Общий движок рассылок: ведро токенов одно на весь процесс
+_broadcast_engine = None
+_broadcast_engine_lock = threading.Lock()
+
+def get_broadcast_engine() -> BroadcastEngine:
+    """Возвращает общий движок рассылок (создается один раз)"""
+    global _broadcast_engine
+    if _broadcast_engine is None:
+        with _broadcast_engine_lock:
+            if _broadcast_engine is None:
+                _broadcast_engine = BroadcastEngine()
+    return _broadcast_engine
@@ -1,5 +1,7 @@
-from sqlalchemy import create_engine, Column, Integer, String, DateTime, ForeignKey, func, Boolean, Enum, UniqueConstraint
+from sqlalchemy import create_engine, event, insert, Column, Integer, String, Date, DateTime, ForeignKey, func, or_, Boolean, Enum, UniqueConstraint, Index
 from sqlalchemy.orm import declarative_base, sessionmaker, relationship
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from dataclasses import dataclass
 from datetime import datetime, timedelta
 import enum
 import random
@@ -8,9 +10,105 @@ import re
 import urllib.parse
 import pytz
 import threading
+import os
+from .db_executor import get_db_executor
+from .note_index import KeywordIndex, get_note_index, extract_keywords
+from .notification_counter import get_unread_counter
+from .student_cache import get_student_cache
+from .admin_registry import get_admin_registry
+from .slot_cache import get_slot_cache
+from .slot_engine import time_to_minutes, lesson_intervals, calendar_intervals, merge_intervals, free_slots
 
 Base = declarative_base()
 
+DATABASE_URL = 'sqlite:///students.db'
+
+# Профиль производительности SQLite: PRAGMA применяются к каждому новому соединению пула.
+# Каждое значение можно переопределить переменной окружения SQLITE_<ИМЯ>.
+SQLITE_PRAGMAS = {
+    'journal_mode': os.getenv('SQLITE_JOURNAL_MODE', 'WAL'),  # читатели не блокируют писателя
+    'synchronous': os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL'),  # безопасно в режиме WAL
+    'busy_timeout': int(os.getenv('SQLITE_BUSY_TIMEOUT', '5000')),  # мс ожидания блокировки
+    'cache_size': int(os.getenv('SQLITE_CACHE_SIZE', '-20000')),  # отрицательное значение — в КБ
+    'mmap_size': int(os.getenv('SQLITE_MMAP_SIZE', '268435456')),  # 256 МБ
+    'temp_store': os.getenv('SQLITE_TEMP_STORE', 'MEMORY'),
+}
+
+# Настройки пула соединений: размер покрывает пул потоков БД и основной поток
+SQLITE_POOL_SIZE = int(os.getenv('SQLITE_POOL_SIZE', '5'))
+SQLITE_MAX_OVERFLOW = int(os.getenv('SQLITE_MAX_OVERFLOW', '10'))
+SQLITE_POOL_TIMEOUT = int(os.getenv('SQLITE_POOL_TIMEOUT', '30'))
+
+# На сколько недель вперёд занятия из расписания разворачиваются в lesson_occurrences
+LESSON_OCCURRENCE_WEEKS = int(os.getenv('LESSON_OCCURRENCE_WEEKS', '8'))
+# Сколько дней прошедшие занятия хранятся в lesson_occurrences до ночной очистки
+LESSON_OCCURRENCE_RETENTION_DAYS = int(os.getenv('LESSON_OCCURRENCE_RETENTION_DAYS', '30'))
+# На сколько дней вперёд планируются напоминания о занятиях и за сколько минут до начала
+REMINDER_PLAN_DAYS = int(os.getenv('REMINDER_PLAN_DAYS', '7'))
+REMINDER_LEAD_MINUTES = 15
+
+def apply_sqlite_pragmas(dbapi_connection, connection_record=None):
+    """Применяет SQLITE_PRAGMAS к новому DBAPI-соединению"""
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in SQLITE_PRAGMAS.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+    finally:
+        cursor.close()
+
+def _py_strip(value):
+    return value.strip() if isinstance(value, str) else value
+
+def _py_strip_lower(value):
+    return value.strip().lower() if isinstance(value, str) else value
+
+# Функции Python для SQL: trim()/lower() в SQLite обрезают только пробелы и приводят
+# к нижнему регистру только ASCII, а фильтры должны совпадать с str.strip()/str.lower()
+SQLITE_FUNCTIONS = {
+    'py_strip': _py_strip,
+    'py_strip_lower': _py_strip_lower,
+}
+
+def register_sqlite_functions(dbapi_connection, connection_record=None):
+    """Регистрирует SQLITE_FUNCTIONS в новом DBAPI-соединении"""
+    for name, function in SQLITE_FUNCTIONS.items():
+        dbapi_connection.create_function(name, 1, function, deterministic=True)
+
+def configure_sqlite_engine(engine):
+    """Подключает применение PRAGMA и функций SQLITE_FUNCTIONS к каждому новому соединению движка"""
+    event.listen(engine, 'connect', apply_sqlite_pragmas)
+    event.listen(engine, 'connect', register_sqlite_functions)
+    return engine
+
+# Общие для всего процесса движок и фабрика сессий.
+# Создаются один раз при первом обращении и переиспользуются всеми экземплярами Database.
+_engine = None
+_session_factory = None
+_engine_lock = threading.Lock()
+
+def get_engine():
+    """Возвращает общий движок SQLAlchemy, создавая его и схему при первом вызове"""
+    global _engine, _session_factory
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                engine = configure_sqlite_engine(create_engine(
+                    DATABASE_URL,
+                    connect_args={'check_same_thread': False},
+                    pool_size=SQLITE_POOL_SIZE,
+                    max_overflow=SQLITE_MAX_OVERFLOW,
+                    pool_timeout=SQLITE_POOL_TIMEOUT,
+                ))
+                Base.metadata.create_all(engine)
+                _session_factory = sessionmaker(bind=engine)
+                _engine = engine
+    return _engine
+
+def get_session_factory():
+    """Возвращает общую фабрику сессий, привязанную к движку get_engine()"""
+    get_engine()
+    return _session_factory
+
 def to_moscow_time(dt: datetime) -> datetime:
     """Конвертирует время в московское время (UTC+3)"""
     if dt is None:
@@ -27,6 +125,10 @@ def to_moscow_time(dt: datetime) -> datetime:
     utc_dt = utc_tz.localize(dt)
     return utc_dt.astimezone(moscow_tz)
 
+def moscow_now() -> datetime:
+    """Текущее московское время без tzinfo (в нём хранятся даты занятий)"""
+    return datetime.now(pytz.timezone('Europe/Moscow')).replace(tzinfo=None)
+
 def format_moscow_time(dt: datetime, format_str: str = '%d.%m.%Y в %H:%M') -> str:
     """Форматирует время в московском времени"""
     if dt is None:
@@ -68,6 +170,45 @@ def is_valid_url(url: str) -> bool:
     except Exception:
         return False
 
+def parse_task_number(title: str):
+    """Извлекает номер задания из заголовка: '19-21', число или текст"""
+    # Ищем диапазон (например, '19-21')
+    range_match = re.search(r'(\d+-\d+)', title)
+    if range_match:
+        return range_match.group(1)
+    # Ищем отдельное число
+    number_match = re.search(r'\d+', title)
+    if number_match:
+        return int(number_match.group(0))
+    # Если нет чисел, возвращаем последнее слово или всё после 'Задание'
+    text = title.strip()
+    if 'Задание' in text:
+        after = text.split('Задание', 1)[1].strip()
+        if after:
+            return after
+    # Если нет слова 'Задание', возвращаем последнее слово
+    return text.split()[-1] if text else text
+
+def compute_task_sort_key(title: str) -> tuple:
+    """Вычисляет ключ сортировки (major, minor, tail) по заголовку.
+    '19-21' -> (19, 21, ''), 'Задание 7' -> (7, 0, ''), без чисел -> (None, None, текст)"""
+    task_number = parse_task_number(title or '')
+    if isinstance(task_number, int):
+        return task_number, 0, ''
+    if task_number and re.fullmatch(r'\d+-\d+', task_number):
+        major, minor = task_number.split('-')
+        return int(major), int(minor), ''
+    return None, None, task_number.lower()
+
+def task_order_key(major, minor, tail) -> tuple:
+    """Ключ для сортировки в Python в том же порядке, что и ORDER BY task_major, task_minor, task_tail
+    (в SQLite NULL идёт первым, поэтому текстовые номера стоят перед числовыми)"""
+    return (major is not None, major or 0, minor or 0, tail or '')
+
+def task_order(model) -> tuple:
+    """Выражения ORDER BY по сохранённому ключу сортировки для Homework или Note"""
+    return model.task_major, model.task_minor, model.task_tail, model.id
+
 class ExamType(enum.Enum):
     OGE = "ОГЭ"
     EGE = "ЕГЭ"
@@ -97,6 +238,12 @@ class Student(Base):
     avatar_emoji = Column(String, nullable=True)  # Эмодзи-аватарка
     theme = Column(String, nullable=True)  # Тема оформления
 
+    # Индексы для входа по паролю и выборок по типу экзамена
+    __table_args__ = (
+        Index('ix_students_password', 'password'),
+        Index('ix_students_exam_type', 'exam_type'),
+    )
+
 class Homework(Base):
     __tablename__ = 'homework'
     
@@ -106,30 +253,25 @@ class Homework(Base):
     exam_type = Column(Enum(ExamType), nullable=False)
     created_at = Column(DateTime, default=func.now())
     file_path = Column(String, nullable=True)  # Путь к файлу домашнего задания
+    # Нормализованный ключ сортировки по номеру задания, заполняется при записи
+    task_major = Column(Integer, nullable=True)  # Первое число ('19' в '19-21'), NULL если чисел нет
+    task_minor = Column(Integer, nullable=True)  # Конец диапазона ('21' в '19-21') или 0
+    task_tail = Column(String, nullable=True)  # Текстовый номер для заголовков без чисел
     
     # Создаем уникальный индекс для комбинации title и exam_type
     __table_args__ = (
         UniqueConstraint('title', 'exam_type', name='unique_title_exam_type'),
+        Index('ix_homework_exam_task_order', 'exam_type', 'task_major', 'task_minor', 'task_tail'),
     )
 
     def get_task_number(self):
         """Извлекает номер задания из заголовка"""
-        # Ищем диапазон (например, '19-21')
-        range_match = re.search(r'(\d+-\d+)', self.title)
-        if range_match:
-            return range_match.group(1)
-        # Ищем отдельное число
-        number_match = re.search(r'\d+', self.title)
-        if number_match:
-            return int(number_match.group(0))
-        # Если нет чисел, возвращаем последнее слово или всё после 'Задание'
-        text = self.title.strip()
-        if 'Задание' in text:
-            after = text.split('Задание', 1)[1].strip()
-            if after:
-                return after
-        # Если нет слова 'Задание', возвращаем последнее слово
-        return text.split()[-1] if text else text
+        return parse_task_number(self.title)
+
+    @property
+    def sort_key(self) -> tuple:
+        """Сохранённый ключ сортировки по номеру задания (тот же порядок, что и ORDER BY в SQL)"""
+        return task_order_key(self.task_major, self.task_minor, self.task_tail)
 
 class Note(Base):
     __tablename__ = 'notes'
@@ -140,30 +282,33 @@ class Note(Base):
     exam_type = Column(Enum(ExamType), nullable=False)
     created_at = Column(DateTime, default=func.now())
     file_path = Column(String, nullable=True)  # Путь к файлу конспекта
+    # Нормализованный ключ сортировки по номеру задания, заполняется при записи
+    task_major = Column(Integer, nullable=True)  # Первое число ('19' в '19-21'), NULL если чисел нет
+    task_minor = Column(Integer, nullable=True)  # Конец диапазона ('21' в '19-21') или 0
+    task_tail = Column(String, nullable=True)  # Текстовый номер для заголовков без чисел
     
     # Создаем уникальный индекс для комбинации title и exam_type
     __table_args__ = (
         UniqueConstraint('title', 'exam_type', name='unique_note_title_exam_type'),
+        Index('ix_notes_exam_task_order', 'exam_type', 'task_major', 'task_minor', 'task_tail'),
     )
 
     def get_task_number(self):
         """Извлекает номер задания из заголовка"""
-        # Ищем диапазон (например, '19-21')
-        range_match = re.search(r'(\d+-\d+)', self.title)
-        if range_match:
-            return range_match.group(1)
-        # Ищем отдельное число
-        number_match = re.search(r'\d+', self.title)
-        if number_match:
-            return int(number_match.group(0))
-        # Если нет чисел, возвращаем последнее слово или всё после 'Задание'
-        text = self.title.strip()
-        if 'Задание' in text:
-            after = text.split('Задание', 1)[1].strip()
-            if after:
-                return after
-        # Если нет слова 'Задание', возвращаем последнее слово
-        return text.split()[-1] if text else text
+        return parse_task_number(self.title)
+
+    @property
+    def sort_key(self) -> tuple:
+        """Сохранённый ключ сортировки по номеру задания (тот же порядок, что и ORDER BY в SQL)"""
+        return task_order_key(self.task_major, self.task_minor, self.task_tail)
+
+@event.listens_for(Homework, 'before_insert')
+@event.listens_for(Homework, 'before_update')
+@event.listens_for(Note, 'before_insert')
+@event.listens_for(Note, 'before_update')
+def _fill_task_sort_key(mapper, connection, target):
+    """Пересчитывает ключ сортировки при каждой записи задания или конспекта"""
+    target.task_major, target.task_minor, target.task_tail = compute_task_sort_key(target.title)
 
 class StudentHomework(Base):
     __tablename__ = 'student_homework'
@@ -173,6 +318,11 @@ class StudentHomework(Base):
     assigned_at = Column(DateTime, default=func.now())
     status = Column(String, default='assigned')
 
+    # Индекс для выборок назначений студента и поиска последнего назначения
+    __table_args__ = (
+        Index('ix_student_homework_student_homework_assigned', 'student_id', 'homework_id', 'assigned_at'),
+    )
+
 class Variant(Base):
     __tablename__ = 'variants'
     id = Column(Integer, primary_key=True)
@@ -191,6 +341,12 @@ class Notification(Base):
     created_at = Column(DateTime, default=func.now())
     is_read = Column(Boolean, default=False)
 
+    # Индексы для подсчёта и выборки непрочитанных уведомлений
+    __table_args__ = (
+        Index('ix_notifications_student_read', 'student_id', 'is_read'),
+        Index('ix_notifications_admin_read', 'admin_id', 'is_read'),
+    )
+
 class PushMessage(Base):
     __tablename__ = 'push_messages'
     id = Column(Integer, primary_key=True)
@@ -198,6 +354,10 @@ class PushMessage(Base):
     message_id = Column(Integer, nullable=False)
     created_at = Column(DateTime, default=func.now())
 
+    __table_args__ = (
+        Index('ix_push_messages_user_id', 'user_id'),
+    )
+
 class AdminPushMessage(Base):
     __tablename__ = 'admin_push_messages'
     id = Column(Integer, primary_key=True)
@@ -253,9 +413,31 @@ class RescheduleRequest(Base):
     original_time = Column(String, nullable=False)    # Текущее время занятия
     requested_date = Column(DateTime, nullable=False) # Желаемая дата
     requested_time = Column(String, nullable=False)   # Желаемое время
-    status = Column(String, default='pending')        # pending, processed
+    status = Column(String, default='pending')        # pending, processed, approved
     created_at = Column(DateTime, default=func.now())
 
+class LessonOccurrence(Base):
+    """Конкретное занятие на дату, развёрнутое из еженедельного правила Schedule"""
+    __tablename__ = 'lesson_occurrences'
+    id = Column(Integer, primary_key=True)
+    schedule_id = Column(Integer, ForeignKey('schedule.id'), nullable=False)
+    student_id = Column(Integer, ForeignKey('students.id'), nullable=False)
+    occurrence_date = Column(Date, nullable=False)  # Дата занятия по правилу расписания
+    start_time = Column(DateTime, nullable=False)   # Фактическое начало (московское время)
+    duration = Column(Integer, nullable=False)
+    reschedule_request_id = Column(Integer, ForeignKey('reschedule_requests.id'), nullable=True)  # Одобренный перенос
+
+    __table_args__ = (
+        UniqueConstraint('schedule_id', 'occurrence_date', name='unique_lesson_occurrence'),
+        Index('ix_lesson_occurrences_start_time', 'start_time'),
+        Index('ix_lesson_occurrences_student_start', 'student_id', 'start_time'),
+    )
+
+def weekly_occurrence_dates(day_of_week: int, start, end) -> list:
+    """Даты дня недели day_of_week в полуинтервале [start, end)"""
+    first = start + timedelta(days=(day_of_week - start.weekday()) % 7)
+    return [first + timedelta(weeks=week) for week in range(max(0, (end - first).days + 6) // 7)]
+
 class RescheduleSettings(Base):
     __tablename__ = 'reschedule_settings'
     id = Column(Integer, primary_key=True)
@@ -265,6 +447,42 @@ class RescheduleSettings(Base):
     max_weeks_ahead = Column(Integer, default=2)
     slot_interval = Column(Integer, default=15)  # интервал слотов в минутах
 
+@dataclass(frozen=True)
+class RescheduleSettingsSnapshot:
+    """Неизменяемая разобранная копия RescheduleSettings.
+
+    Сохраняет поля строки (для экранов настроек) и добавляет разобранные
+    значения: days — frozenset дней недели, start_minutes / end_minutes —
+    рабочие часы в минутах от полуночи. version растёт при каждом изменении
+    настроек и входит в ключи кэшей слотов.
+    """
+    id: int
+    work_start_time: str
+    work_end_time: str
+    available_days: str
+    max_weeks_ahead: int
+    slot_interval: int
+    days: frozenset
+    start_minutes: int
+    end_minutes: int
+    version: int = 0
+
+    @classmethod
+    def from_row(cls, row: RescheduleSettings, version: int = 0) -> 'RescheduleSettingsSnapshot':
+        available_days = row.available_days or ''
+        return cls(
+            id=row.id,
+            work_start_time=row.work_start_time,
+            work_end_time=row.work_end_time,
+            available_days=available_days,
+            max_weeks_ahead=row.max_weeks_ahead,
+            slot_interval=row.slot_interval,
+            days=frozenset(int(d) for d in available_days.split(',') if d.strip()),
+            start_minutes=time_to_minutes(row.work_start_time),
+            end_minutes=time_to_minutes(row.work_end_time),
+            version=version,
+        )
+
 class ScheduledReminder(Base):
     __tablename__ = 'scheduled_reminders'
     id = Column(Integer, primary_key=True)
@@ -278,17 +496,31 @@ class ScheduledReminder(Base):
     # Создаем уникальный индекс для предотвращения дублирования
     __table_args__ = (
         UniqueConstraint('student_id', 'schedule_id', 'reminder_time', name='unique_reminder'),
+        Index('ix_scheduled_reminders_sent_time', 'is_sent', 'reminder_time'),
     )
 
 class Database:
-    _slots_cache = {}
-    _slots_cache_lock = threading.Lock()
-    _slots_cache_ttl = 600  # 10 минут в секундах
+    # Общие для процесса кэши (слоты, конспекты, счётчики уведомлений, студенты,
+    # администраторы) берутся через get_*() своих модулей, как движок и пул потоков.
+    # Разобранные настройки переносов; заменяются целиком в update_reschedule_settings
+    _reschedule_settings = None
+    _reschedule_settings_lock = threading.Lock()
 
     def __init__(self):
-        self.engine = create_engine('sqlite:///students.db')
-        Base.metadata.create_all(self.engine)
-        self.Session = sessionmaker(bind=self.engine)
+        # Движок и фабрика сессий общие для процесса, поэтому создание Database дешёвое
+        self.engine = get_engine()
+        self.Session = get_session_factory()
+
+    async def run(self, func, *args, **kwargs):
+        """Выполняет синхронный метод Database в общем пуле потоков, не блокируя цикл событий.
+
+        Пример: student = await db.run(db.get_student_by_telegram_id, user_id)
+        """
+        return await get_db_executor().run(func, *args, **kwargs)
+
+    def get_executor_stats(self) -> dict:
+        """Возвращает метрики пула потоков для вызовов Database"""
+        return get_db_executor().get_stats()
 
     def _generate_password(self, length=8):
         """Генерирует случайный пароль"""
@@ -320,14 +552,22 @@ class Database:
         finally:
             session.close()
 
-    def is_admin(self, telegram_id: int) -> bool:
+    def load_admin_registry(self):
+        """Загружает реестр администраторов из базы (при запуске и после изменений)"""
         session = self.Session()
         try:
-            admin = session.query(Admin).filter_by(telegram_id=telegram_id).first()
-            return admin is not None
+            get_admin_registry().load(session.query(Admin).all())
         finally:
             session.close()
 
+    def _ensure_admin_registry(self):
+        if not get_admin_registry().loaded:
+            self.load_admin_registry()
+        return get_admin_registry()
+
+    def is_admin(self, telegram_id: int) -> bool:
+        return self._ensure_admin_registry().is_admin(telegram_id)
+
     def add_admin(self, telegram_id: int, username: str = None):
         session = self.Session()
         try:
@@ -338,13 +578,20 @@ class Database:
                 session.commit()
         finally:
             session.close()
+        self.load_admin_registry()
 
     def get_student_by_telegram_id(self, telegram_id: int) -> Student:
+        student = get_student_cache().get_by_telegram_id(telegram_id)
+        if student is not None:
+            return student
+        generation = get_student_cache().generation()
         session = self.Session()
         try:
-            return session.query(Student).filter_by(telegram_id=telegram_id).first()
+            student = session.query(Student).filter_by(telegram_id=telegram_id).first()
         finally:
             session.close()
+        get_student_cache().put(student, generation)
+        return student
 
     def get_student_by_password(self, password: str) -> Student:
         session = self.Session()
@@ -355,11 +602,21 @@ class Database:
 
     def get_student_by_id(self, student_id: int) -> Student:
         """Получает студента по его ID"""
+        student = get_student_cache().get_by_id(student_id)
+        if student is not None:
+            return student
+        generation = get_student_cache().generation()
         session = self.Session()
         try:
-            return session.query(Student).filter_by(id=student_id).first()
+            student = session.query(Student).filter_by(id=student_id).first()
         finally:
             session.close()
+        get_student_cache().put(student, generation)
+        return student
+
+    def get_student_cache_stats(self) -> dict:
+        """Возвращает метрики кэша студентов"""
+        return get_student_cache().get_stats()
 
     def update_student_telegram_id(self, student_id: int, telegram_id: int):
         session = self.Session()
@@ -368,6 +625,7 @@ class Database:
             if student:
                 student.telegram_id = telegram_id
                 session.commit()
+                get_student_cache().invalidate(student_id, telegram_id)
         finally:
             session.close()
 
@@ -395,11 +653,16 @@ class Database:
             session.query(PushMessage).filter_by(user_id=student_id).delete()
             # Удаляем связанные назначения домашних заданий
             session.query(StudentHomework).filter_by(student_id=student_id).delete()
+            # Удаляем развёрнутые занятия
+            session.query(LessonOccurrence).filter_by(student_id=student_id).delete()
             # Удаляем самого студента
             student = session.query(Student).filter_by(id=student_id).first()
             if student:
                 session.delete(student)
                 session.commit()
+                get_student_cache().invalidate(student_id)
+                get_unread_counter().invalidate(('student', student_id))
+                get_slot_cache().bump_schedule_version()
         finally:
             session.close()
 
@@ -411,6 +674,7 @@ class Database:
             if student:
                 student.name = new_name
                 session.commit()
+                get_student_cache().invalidate(student_id)
         finally:
             session.close()
 
@@ -448,6 +712,8 @@ class Database:
                     session.query(PushMessage).filter_by(user_id=student_id).delete()
                 
                 session.commit()
+                get_student_cache().invalidate(student_id)
+                get_unread_counter().invalidate(('student', student_id))
         finally:
             session.close()
 
@@ -459,6 +725,7 @@ class Database:
             if student:
                 student.lesson_link = new_link
                 session.commit()
+                get_student_cache().invalidate(student_id)
         finally:
             session.close()
 
@@ -473,6 +740,7 @@ class Database:
                 else:
                     student.notes = note
                 session.commit()
+                get_student_cache().invalidate(student_id)
         finally:
             session.close()
 
@@ -484,6 +752,7 @@ class Database:
             if student:
                 student.notes = None
                 session.commit()
+                get_student_cache().invalidate(student_id)
                 return True
             return False
         finally:
@@ -500,6 +769,7 @@ class Database:
                 if show_old_homework is not None:
                     student.show_old_homework = show_old_homework
                 session.commit()
+                get_student_cache().invalidate(student_id)
         finally:
             session.close()
 
@@ -514,6 +784,7 @@ class Database:
                 student.avatar_emoji = None
                 student.theme = None
                 session.commit()
+                get_student_cache().invalidate(student_id)
         finally:
             session.close()
 
@@ -525,6 +796,7 @@ class Database:
             if student:
                 student.show_old_homework = show_old
                 session.commit()
+                get_student_cache().invalidate(student_id)
         finally:
             session.close()
 
@@ -534,33 +806,45 @@ class Database:
         session = self.Session()
         try:
             not_passed_statuses = {'not_passed', 'not completed', 'notcompleted', 'Не пройдено', 'not passed'}
-            # Получаем все назначения для студента
-            assigned = session.query(StudentHomework).filter_by(student_id=student_id).all()
-            if not assigned:
+            # Статус сравнивается после strip().lower() (py_strip_lower), как и раньше в Python
+            not_passed_values = {s.strip().lower() for s in not_passed_statuses}
+            # Последнее назначение (по assigned_at) для каждого задания студента
+            latest = session.query(
+                StudentHomework.homework_id,
+                StudentHomework.assigned_at,
+                StudentHomework.status,
+                func.row_number().over(
+                    partition_by=StudentHomework.homework_id,
+                    order_by=(StudentHomework.assigned_at.desc(), StudentHomework.id)
+                ).label('rn')
+            ).filter(StudentHomework.student_id == student_id).subquery()
+            # Одним запросом: последнее назначение + задание + настройка студента, фильтры в SQL
+            rows = session.query(Homework, latest.c.assigned_at, Student.show_old_homework).join(
+                latest, latest.c.homework_id == Homework.id
+            ).outerjoin(
+                Student, Student.id == student_id
+            ).filter(
+                latest.c.rn == 1,
+                # Отбрасываем "виртуальные" задания: нет ссылки и нет файла
+                or_(
+                    func.py_strip(func.coalesce(Homework.link, '')) != '',
+                    func.py_strip(func.coalesce(Homework.file_path, '')) != ''
+                ),
+                # Отбрасываем задания со статусом "не пройдено" (по последнему назначению)
+                or_(
+                    latest.c.status.is_(None),
+                    func.py_strip_lower(latest.c.status).notin_(not_passed_values)
+                )
+            ).order_by(
+                # Сортируем по номеру в названии (1, 2, 3, 11, 23...) по сохранённому ключу
+                *task_order(Homework)
+            ).all()
+            if not rows:
                 return []
             # Если show_old не указан, берем из настроек студента
             if show_old is None:
-                student = session.query(Student).filter_by(id=student_id).first()
-                show_old = student.show_old_homework if student else False
-            # Для каждого homework_id берём только последнюю запись (по assigned_at)
-            last_assignments = {}
-            for sh in assigned:
-                if sh.homework_id not in last_assignments or sh.assigned_at > last_assignments[sh.homework_id].assigned_at:
-                    last_assignments[sh.homework_id] = sh
-            # Получаем информацию о заданиях
-            homeworks = []
-            for sh in last_assignments.values():
-                homework = session.query(Homework).filter_by(id=sh.homework_id).first()
-                if homework:
-                    # Фильтруем "виртуальные" задания: нет ссылки и нет файла
-                    if (not homework.link or homework.link.strip() == "") and (not homework.file_path or homework.file_path.strip() == ""):
-                        continue
-                    # Фильтруем задания со статусом "не пройдено" (по последнему назначению)
-                    if sh.status and sh.status.strip().lower() in {s.lower() for s in not_passed_statuses}:
-                        continue
-                    homeworks.append((homework, sh.assigned_at))
-            # Сортируем по номеру в названии (1, 2, 3, 11, 23...)
-            homeworks.sort(key=lambda x: x[0].get_task_number())
+                show_old = bool(rows[0][2])
+            homeworks = [(homework, assigned_at) for homework, assigned_at, _ in rows]
             # Если не показывать старые, возвращаем только самое новое (последнее по номеру)
             if not show_old and homeworks:
                 return [homeworks[-1]]
@@ -600,9 +884,8 @@ class Database:
         """Получает отсортированный список домашних заданий по типу экзамена"""
         session = self.Session()
         try:
-            homeworks = session.query(Homework).filter_by(exam_type=exam_type).all()
-            # Сортируем задания по номеру
-            return sorted(homeworks, key=lambda hw: hw.get_task_number())
+            # Сортируем задания по номеру (по сохранённому ключу, в SQL)
+            return session.query(Homework).filter_by(exam_type=exam_type).order_by(*task_order(Homework)).all()
         finally:
             session.close()
 
@@ -686,6 +969,7 @@ class Database:
             )
             session.add(note)
             session.commit()
+            get_note_index().add(note.id, note.exam_type, note.title, note.get_task_number())
             return True
         except:
             session.rollback()
@@ -697,9 +981,8 @@ class Database:
         """Получает отсортированный список конспектов по типу экзамена"""
         session = self.Session()
         try:
-            notes = session.query(Note).filter_by(exam_type=exam_type).all()
-            # Сортируем конспекты по номеру
-            return sorted(notes, key=lambda note: note.get_task_number())
+            # Сортируем конспекты по номеру (по сохранённому ключу, в SQL)
+            return session.query(Note).filter_by(exam_type=exam_type).order_by(*task_order(Note)).all()
         finally:
             session.close()
 
@@ -739,6 +1022,7 @@ class Database:
                 note.file_path = file_path
 
             session.commit()
+            get_note_index().add(note.id, note.exam_type, note.title, note.get_task_number())
             return True
         except:
             session.rollback()
@@ -754,6 +1038,7 @@ class Database:
             if note:
                 session.delete(note)
                 session.commit()
+                get_note_index().remove(note_id)
                 return True
             return False
         except:
@@ -825,19 +1110,21 @@ class Database:
         """Получает статусы заданий ученика по номеру задания"""
         session = self.Session()
         try:
-            # Получаем все назначенные задания ученика данного типа экзамена
-            student_homeworks = session.query(StudentHomework).join(Homework).filter(
+            # Получаем все назначенные задания ученика данного типа экзамена вместе с заданиями одним запросом
+            # id назначения в выборке не даёт Query схлопнуть одинаковые пары (статус, задание)
+            rows = session.query(StudentHomework.id, StudentHomework.status, Homework).select_from(StudentHomework).join(
+                Homework, StudentHomework.homework_id == Homework.id
+            ).filter(
                 StudentHomework.student_id == student_id,
                 Homework.exam_type == exam_type
-            ).all()
+            ).order_by(StudentHomework.assigned_at, StudentHomework.id).all()
             
+            # При нескольких назначениях одного номера побеждает последнее по assigned_at
             statuses = {}
-            for sh in student_homeworks:
-                homework = session.query(Homework).filter_by(id=sh.homework_id).first()
-                if homework:
-                    task_number = homework.get_task_number()
-                    if task_number != float('inf'):  # Исключаем задания без номера
-                        statuses[task_number] = sh.status
+            for _, status, homework in rows:
+                task_number = homework.get_task_number()
+                if task_number != float('inf'):  # Исключаем задания без номера
+                    statuses[task_number] = status
             
             return statuses
         finally:
@@ -876,6 +1163,27 @@ class Database:
             notif = Notification(student_id=student_id, type=notif_type, text=text, link=link)
             session.add(notif)
             session.commit()
+            get_unread_counter().increment(('student', student_id))
+        finally:
+            session.close()
+
+    def add_notifications_bulk(self, notifications: list) -> int:
+        """Добавляет пачку уведомлений студентам одной транзакцией.
+        notifications — список кортежей (student_id, notif_type, text, link)."""
+        rows = [
+            {'student_id': student_id, 'type': notif_type, 'text': text, 'link': link}
+            for student_id, notif_type, text, link in notifications
+        ]
+        if not rows:
+            return 0
+        session = self.Session()
+        try:
+            # Один INSERT на всю рассылку (executemany)
+            session.execute(insert(Notification), rows)
+            session.commit()
+            for row in rows:
+                get_unread_counter().increment(('student', row['student_id']))
+            return len(rows)
         finally:
             session.close()
 
@@ -885,6 +1193,7 @@ class Database:
             notif = Notification(admin_id=admin_id, type=notif_type, text=text, link=link)
             session.add(notif)
             session.commit()
+            get_unread_counter().increment(('admin', admin_id))
         finally:
             session.close()
 
@@ -913,6 +1222,7 @@ class Database:
         try:
             session.query(Notification).filter_by(student_id=student_id, is_read=False).update({Notification.is_read: True})
             session.commit()
+            get_unread_counter().reset(('student', student_id))
         finally:
             session.close()
 
@@ -921,28 +1231,49 @@ class Database:
         try:
             session.query(Notification).filter_by(admin_id=admin_id, is_read=False).update({Notification.is_read: True})
             session.commit()
+            get_unread_counter().reset(('admin', admin_id))
         finally:
             session.close()
 
-    def has_unread_notifications(self, student_id: int) -> bool:
+    def count_unread_notifications(self, student_id: int) -> int:
+        """Возвращает количество непрочитанных уведомлений студента (из кэша счётчиков)"""
+        return self._count_unread(('student', student_id), Notification.student_id == student_id)
+
+    def count_unread_admin_notifications(self, admin_id: int) -> int:
+        """Возвращает количество непрочитанных уведомлений админа (из кэша счётчиков)"""
+        return self._count_unread(('admin', admin_id), Notification.admin_id == admin_id)
+
+    def _count_unread(self, key, recipient_filter) -> int:
+        count = get_unread_counter().get(key)
+        if count is not None:
+            return count
+        generation = get_unread_counter().generation(key)
         session = self.Session()
         try:
-            return session.query(Notification).filter_by(student_id=student_id, is_read=False).count() > 0
+            count = session.query(func.count(Notification.id)).filter(
+                recipient_filter, Notification.is_read == False
+            ).scalar()
         finally:
             session.close()
+        get_unread_counter().set(key, count, generation)
+        return count
+
+    def has_unread_notifications(self, student_id: int) -> bool:
+        return self.count_unread_notifications(student_id) > 0
 
     def has_unread_admin_notifications(self, admin_id: int) -> bool:
-        session = self.Session()
-        try:
-            return session.query(Notification).filter_by(admin_id=admin_id, is_read=False).count() > 0
-        finally:
-            session.close()
+        return self.count_unread_admin_notifications(admin_id) > 0
+
+    def get_notification_counter_stats(self) -> dict:
+        """Возвращает метрики кэша счётчиков непрочитанных уведомлений"""
+        return get_unread_counter().get_stats()
 
     def clear_notifications(self, student_id: int):
         session = self.Session()
         try:
             session.query(Notification).filter_by(student_id=student_id).delete()
             session.commit()
+            get_unread_counter().reset(('student', student_id))
         finally:
             session.close()
 
@@ -951,6 +1282,7 @@ class Database:
         try:
             session.query(Notification).filter_by(admin_id=admin_id).delete()
             session.commit()
+            get_unread_counter().reset(('admin', admin_id))
         finally:
             session.close()
 
@@ -961,6 +1293,7 @@ class Database:
             if student:
                 student.last_menu_message_id = message_id
                 session.commit()
+                get_student_cache().patch(student_id, last_menu_message_id=message_id)
         finally:
             session.close()
 
@@ -983,6 +1316,20 @@ class Database:
         finally:
             session.close()
 
+    def add_push_messages_bulk(self, push_messages: list) -> int:
+        """Сохраняет пачку push-сообщений одной транзакцией.
+        push_messages — список кортежей (user_id, message_id)."""
+        rows = [{'user_id': user_id, 'message_id': message_id} for user_id, message_id in push_messages]
+        if not rows:
+            return 0
+        session = self.Session()
+        try:
+            session.execute(insert(PushMessage), rows)
+            session.commit()
+            return len(rows)
+        finally:
+            session.close()
+
     def get_push_messages(self, user_id: int):
         session = self.Session()
         try:
@@ -1074,14 +1421,10 @@ class Database:
         """Получает список конспектов, назначенных ученику"""
         session = self.Session()
         try:
-            student_notes = session.query(StudentNote).filter_by(student_id=student_id).all()
-            notes = []
-            for sn in student_notes:
-                note = session.query(Note).filter_by(id=sn.note_id).first()
-                if note:
-                    notes.append(note)
-            # Сортируем конспекты по номеру
-            return sorted(notes, key=lambda note: note.get_task_number())
+            # Конспекты ученика одним запросом через таблицу назначений, отсортированные по номеру
+            return session.query(Note).join(
+                StudentNote, StudentNote.note_id == Note.id
+            ).filter(StudentNote.student_id == student_id).order_by(*task_order(Note)).all()
         finally:
             session.close()
 
@@ -1089,80 +1432,129 @@ class Database:
         """Получает список учеников с домашними заданиями, подходящими к конспекту"""
         session = self.Session()
         try:
-            # Получаем всех учеников того же типа экзамена
-            students = session.query(Student).filter_by(exam_type=note.exam_type).all()
+            # Ученики того же типа экзамена вместе с их заданиями — одним запросом
+            rows = session.query(Student, Homework).join(
+                StudentHomework, StudentHomework.student_id == Student.id
+            ).join(
+                Homework, Homework.id == StudentHomework.homework_id
+            ).filter(Student.exam_type == note.exam_type).order_by(Student.id).all()
+            homeworks = {homework.id: homework for _, homework in rows}
+            matching_homework_ids = self._find_matching_homework_ids(
+                note, self._build_homework_index(note.exam_type, homeworks.values())
+            )
             matching_students = []
-            
-            for student in students:
-                # Получаем домашние задания ученика
-                student_homeworks = session.query(StudentHomework).filter_by(student_id=student.id).all()
-                
-                for sh in student_homeworks:
-                    homework = session.query(Homework).filter_by(id=sh.homework_id).first()
-                    if homework and self._is_homework_note_match(homework, note):
-                        matching_students.append(student)
-                        break  # Если нашли подходящее задание, переходим к следующему ученику
-            
+            seen = set()
+            for student, homework in rows:
+                if homework.id in matching_homework_ids and student.id not in seen:
+                    seen.add(student.id)
+                    matching_students.append(student)
             return matching_students
         finally:
             session.close()
 
+    def get_unassigned_students_for_note(self, note: Note) -> list:
+        """Получает учеников с подходящими заданиями, которым конспект еще не выдан"""
+        session = self.Session()
+        try:
+            assigned_ids = {
+                student_id for (student_id,) in
+                session.query(StudentNote.student_id).filter_by(note_id=note.id).all()
+            }
+        finally:
+            session.close()
+        return [s for s in self.get_students_with_matching_homework(note) if s.id not in assigned_ids]
+
     def get_unassigned_notes_for_students(self) -> list:
-        """Получает список конспектов, которые можно выдать ученикам"""
+        """Получает список конспектов, которые можно выдать ученикам.
+        Все данные загружаются пакетно, сопоставление конспектов с учениками выполняется в памяти."""
         session = self.Session()
         try:
-            unassigned = []
             all_notes = session.query(Note).all()
-            
-            for note in all_notes:
-                # Ищем учеников с соответствующими заданиями
-                matching_students = self.get_students_with_matching_homework(note)
-                
-                # Фильтруем тех, кому конспект еще не выдан
-                unassigned_students = []
-                for student in matching_students:
-                    if not self.is_note_assigned_to_student(student.id, note.id):
-                        unassigned_students.append(student)
-                
-                if unassigned_students:
-                    unassigned.append((note, len(unassigned_students)))
-            
-            return unassigned
+            if not all_notes:
+                return []
+            student_exams = dict(session.query(Student.id, Student.exam_type).all())
+            homeworks = {hw.id: hw for hw in session.query(Homework).all()}
+            assignments = session.query(StudentHomework.student_id, StudentHomework.homework_id).distinct().all()
+            assigned_notes = set(session.query(StudentNote.student_id, StudentNote.note_id).all())
+        finally:
+            session.close()
+
+        # Для каждого типа экзамена: задание -> ученики этого экзамена, которым оно выдано
+        students_by_exam_homework = {}
+        for student_id, homework_id in assignments:
+            exam_type = student_exams.get(student_id)
+            if exam_type is None or homework_id not in homeworks:
+                continue
+            students_by_exam_homework.setdefault(exam_type, {}).setdefault(homework_id, set()).add(student_id)
+
+        # Индекс заданий строим один раз на тип экзамена
+        indexes = {
+            exam_type: self._build_homework_index(exam_type, (homeworks[hw_id] for hw_id in by_homework))
+            for exam_type, by_homework in students_by_exam_homework.items()
+        }
+
+        unassigned = []
+        for note in all_notes:
+            by_homework = students_by_exam_homework.get(note.exam_type)
+            if not by_homework:
+                continue
+            # Ищем учеников с соответствующими заданиями
+            matching_students = set()
+            for homework_id in self._find_matching_homework_ids(note, indexes[note.exam_type]):
+                matching_students |= by_homework[homework_id]
+            # Фильтруем тех, кому конспект еще не выдан
+            unassigned_count = sum(1 for student_id in matching_students if (student_id, note.id) not in assigned_notes)
+            if unassigned_count:
+                unassigned.append((note, unassigned_count))
+        return unassigned
+
+    def _build_homework_index(self, exam_type, homeworks) -> KeywordIndex:
+        """Строит индекс заданий ученикам экзамена exam_type — той же структуры, что и индекс конспектов"""
+        index = KeywordIndex()
+        index.load((homework.id, exam_type, homework.title, homework.get_task_number()) for homework in homeworks)
+        return index
+
+    def _find_matching_homework_ids(self, note: Note, index: KeywordIndex) -> set:
+        """Возвращает id заданий из индекса, подходящих к конспекту.
+        Задание подходит, если у него тот же номер задания, что и у конспекта (задания без номера
+        так не сопоставляются), или если схожесть ключевых слов названий больше 0.7."""
+        exact_ids, similar_ids = index.find_matches(note.exam_type, note.get_task_number(), extract_keywords(note.title))
+        return exact_ids | similar_ids
+
+    def _ensure_note_index(self):
+        """Загружает индекс конспектов из базы при первом обращении"""
+        if get_note_index().loaded:
+            return
+        session = self.Session()
+        try:
+            notes = session.query(Note).all()
+            get_note_index().load(
+                (note.id, note.exam_type, note.title, note.get_task_number()) for note in notes
+            )
         finally:
             session.close()
 
-    def _is_homework_note_match(self, homework: Homework, note: Note) -> bool:
-        """Проверяет, подходит ли конспект к домашнему заданию"""
-        # Извлекаем номера из названий
-        hw_number = homework.get_task_number()
-        note_number = note.get_task_number()
-        
-        # Если номера совпадают, это точное совпадение
-        if hw_number == note_number and hw_number != float('inf'):
-            return True
-        
-        # Если номера не совпадают, проверяем по ключевым словам
-        hw_keywords = self._extract_keywords(homework.title)
-        note_keywords = self._extract_keywords(note.title)
-        
-        similarity = self._calculate_similarity(hw_keywords, note_keywords)
-        return similarity > 0.7  # Порог схожести 70%
-
-    def _extract_keywords(self, title: str) -> list:
-        """Извлекает ключевые слова из названия"""
-        # Убираем стоп-слова и приводим к нижнему регистру
-        stop_words = {'задача', 'задание', 'конспект', 'по', 'в', 'на', 'для', 'и', 'или', 'с', 'от', 'до'}
-        words = title.lower().split()
-        return [w for w in words if w not in stop_words and len(w) > 2]
-
-    def _calculate_similarity(self, keywords1: list, keywords2: list) -> float:
-        """Вычисляет схожесть по ключевым словам"""
-        if not keywords1 or not keywords2:
-            return 0.0
-        
-        common = set(keywords1) & set(keywords2)
-        total = set(keywords1) | set(keywords2)
-        return len(common) / len(total) if total else 0.0 
+    def find_notes_for_homework(self, homework: Homework, student_id: int = None) -> tuple:
+        """Подбирает конспекты к заданию через индекс ключевых слов.
+        Возвращает (совпадения по номеру задания, похожие по ключевым словам), исключая уже выданные ученику."""
+        self._ensure_note_index()
+        exact_ids, similar_ids = get_note_index().find_matches(
+            homework.exam_type, homework.get_task_number(), extract_keywords(homework.title)
+        )
+        if not exact_ids and not similar_ids:
+            return [], []
+        session = self.Session()
+        try:
+            query = session.query(Note).filter(Note.id.in_(exact_ids | similar_ids))
+            if student_id is not None:
+                assigned = session.query(StudentNote.note_id).filter(StudentNote.student_id == student_id)
+                query = query.filter(Note.id.notin_(assigned))
+            notes = query.order_by(*task_order(Note)).all()
+        finally:
+            session.close()
+        exact_matches = [note for note in notes if note.id in exact_ids]
+        keyword_matches = [note for note in notes if note.id in similar_ids]
+        return exact_matches, keyword_matches
 
     def add_pending_note_assignment_with_process(self, process_id: str, user_id: int, student_id: int = None, note_id: int = None, step: str = None, origin: str = None):
         session = self.Session()
@@ -1211,6 +1603,7 @@ class Database:
     # Методы для работы с расписанием
     def add_schedule(self, student_id: int, day_of_week: int, time: str, duration: int = 60) -> bool:
         """Добавляет занятие в расписание студента"""
+        weeks = self._lesson_occurrence_weeks()
         session = self.Session()
         try:
             # Проверяем, нет ли уже занятия в это время в этот день
@@ -1227,10 +1620,14 @@ class Database:
                 student_id=student_id,
                 day_of_week=day_of_week,
                 time=time,
-                duration=duration
+                duration=duration,
+                is_active=True
             )
             session.add(schedule)
+            session.flush()
+            self._sync_schedule_occurrences(session, schedule, weeks)
             session.commit()
+            get_slot_cache().bump_schedule_version()
             return True
         except:
             session.rollback()
@@ -1251,6 +1648,7 @@ class Database:
 
     def update_schedule(self, schedule_id: int, day_of_week: int = None, time: str = None, duration: int = None, is_active: bool = None) -> bool:
         """Обновляет занятие в расписании"""
+        weeks = self._lesson_occurrence_weeks()
         session = self.Session()
         try:
             schedule = session.query(Schedule).filter_by(id=schedule_id).first()
@@ -1282,7 +1680,9 @@ class Database:
                 schedule.is_active = is_active
             
             schedule.updated_at = datetime.now()
+            self._sync_schedule_occurrences(session, schedule, weeks)
             session.commit()
+            get_slot_cache().bump_schedule_version()
             return True
         except:
             session.rollback()
@@ -1296,8 +1696,10 @@ class Database:
         try:
             schedule = session.query(Schedule).filter_by(id=schedule_id).first()
             if schedule:
+                session.query(LessonOccurrence).filter_by(schedule_id=schedule_id).delete()
                 session.delete(schedule)
                 session.commit()
+                get_slot_cache().bump_schedule_version()
                 return True
             return False
         except:
@@ -1310,53 +1712,165 @@ class Database:
         """Получает информацию о следующем занятии студента"""
         session = self.Session()
         try:
-            now = datetime.now()
-            current_day = now.weekday()  # 0=Понедельник, 6=Воскресенье
-            current_time = now.strftime("%H:%M")
-            
-            # Получаем все активные занятия студента
-            schedules = session.query(Schedule).filter_by(
-                student_id=student_id,
-                is_active=True
-            ).order_by(Schedule.day_of_week, Schedule.time).all()
-            
-            if not schedules:
+            # Ближайшее занятие — диапазонный запрос по индексу (student_id, start_time)
+            row = session.query(LessonOccurrence, Schedule).join(
+                Schedule, Schedule.id == LessonOccurrence.schedule_id
+            ).filter(
+                LessonOccurrence.student_id == student_id,
+                LessonOccurrence.start_time > moscow_now(),
+                Schedule.is_active == True
+            ).order_by(LessonOccurrence.start_time).first()
+            if not row:
                 return None
-            
-            # Ищем следующее занятие
-            for schedule in schedules:
-                if schedule.day_of_week > current_day or (schedule.day_of_week == current_day and schedule.time > current_time):
-                    # Вычисляем дату следующего занятия
-                    days_ahead = schedule.day_of_week - current_day
-                    if days_ahead < 0:
-                        days_ahead += 7
-                    next_lesson_date = now + timedelta(days=days_ahead)
-                    
-                    return {
-                        'schedule': schedule,
-                        'date': next_lesson_date,
-                        'day_name': self._get_day_name(schedule.day_of_week),
-                        'time': schedule.time,
-                        'duration': schedule.duration
-                    }
-            
-            # Если не нашли в этой неделе, берем первое занятие следующей недели
-            first_schedule = schedules[0]
-            days_ahead = (7 - current_day + first_schedule.day_of_week) % 7
-            if days_ahead == 0:
-                days_ahead = 7
-            next_lesson_date = now + timedelta(days=days_ahead)
-            
+            occurrence, schedule = row
             return {
-                'schedule': first_schedule,
-                'date': next_lesson_date,
-                'day_name': self._get_day_name(first_schedule.day_of_week),
-                'time': first_schedule.time,
-                'duration': first_schedule.duration
+                'schedule': schedule,
+                'date': pytz.timezone('Europe/Moscow').localize(occurrence.start_time),
+                'day_name': self._get_day_name(occurrence.start_time.weekday()),
+                'time': occurrence.start_time.strftime("%H:%M"),
+                'duration': occurrence.duration
             }
         finally:
             session.close()
 
+    # Методы для работы с развёрнутыми занятиями
+    def _lesson_occurrence_weeks(self) -> int:
+        """Горизонт lesson_occurrences в неделях (не меньше горизонта записи на перенос)"""
+        return max(LESSON_OCCURRENCE_WEEKS, self.get_reschedule_settings().max_weeks_ahead + 1)
+
+    def _lesson_occurrence_start(self):
+        """Первая разворачиваемая дата: вчера по Москве — «сегодня» сервера может отставать"""
+        return moscow_now().date() - timedelta(days=1)
+
+    def _sync_schedule_occurrences(self, session, schedule: Schedule, weeks: int, since=None) -> int:
+        """Приводит будущие занятия одного правила расписания на weeks недель в соответствие с ним.
+
+        Изменяются только отличающиеся строки; одобренные переносы сохраняются
+        как исключения, пока правило активно. Возвращает число изменённых строк.
+        weeks вычисляется вызывающим до начала записи: чтение настроек может
+        само создать строку настроек в отдельной сессии.
+        """
+        since = since or self._lesson_occurrence_start()
+        existing = {
+            occurrence.occurrence_date: occurrence
+            for occurrence in session.query(LessonOccurrence).filter(
+                LessonOccurrence.schedule_id == schedule.id,
+                LessonOccurrence.occurrence_date >= since
+            )
+        }
+        expected = {}
+        if schedule.is_active:
+            lesson_time = datetime.strptime(schedule.time, "%H:%M").time()
+            until = since + timedelta(weeks=weeks)
+            for day in weekly_occurrence_dates(schedule.day_of_week, since, until):
+                expected[day] = datetime.combine(day, lesson_time)
+
+        changes = 0
+        for day, occurrence in existing.items():
+            if occurrence.reschedule_request_id is not None and schedule.is_active:
+                # Перенесённое занятие: время задано переносом, длительность — правилом
+                if occurrence.duration != schedule.duration:
+                    occurrence.duration = schedule.duration
+                    changes += 1
+                continue
+            if day not in expected:
+                session.delete(occurrence)
+                changes += 1
+            elif (occurrence.start_time, occurrence.duration, occurrence.student_id) != (expected[day], schedule.duration, schedule.student_id):
+                occurrence.start_time = expected[day]
+                occurrence.duration = schedule.duration
+                occurrence.student_id = schedule.student_id
+                changes += 1
+        for day, start_time in expected.items():
+            if day not in existing:
+                session.add(LessonOccurrence(
+                    schedule_id=schedule.id,
+                    student_id=schedule.student_id,
+                    occurrence_date=day,
+                    start_time=start_time,
+                    duration=schedule.duration
+                ))
+                changes += 1
+        return changes
+
+    def refresh_lesson_occurrences(self) -> int:
+        """Разворачивает всё расписание на горизонт LESSON_OCCURRENCE_WEEKS вперёд.
+
+        Вызывается при запуске и раз в сутки, чтобы горизонт сдвигался. Занятия,
+        прошедшие больше LESSON_OCCURRENCE_RETENTION_DAYS дней назад, удаляются.
+        Возвращает число изменённых строк.
+        """
+        weeks = self._lesson_occurrence_weeks()
+        session = self.Session()
+        try:
+            since = self._lesson_occurrence_start()
+            schedules = session.query(Schedule).join(Student, Student.id == Schedule.student_id).all()
+            changes = sum(self._sync_schedule_occurrences(session, schedule, weeks, since) for schedule in schedules)
+            # Занятия удалённых правил и студентов
+            changes += session.query(LessonOccurrence).filter(
+                ~LessonOccurrence.schedule_id.in_([schedule.id for schedule in schedules])
+            ).delete(synchronize_session=False)
+            # Прошедшие занятия старше срока хранения (перенесённые — по фактическому началу)
+            cutoff = since - timedelta(days=LESSON_OCCURRENCE_RETENTION_DAYS)
+            changes += session.query(LessonOccurrence).filter(
+                LessonOccurrence.occurrence_date < cutoff,
+                LessonOccurrence.start_time < datetime.combine(cutoff, datetime.min.time())
+            ).delete(synchronize_session=False)
+            session.commit()
+            if changes:
+                get_slot_cache().bump_schedule_version()
+            return changes
+        except Exception as e:
+            session.rollback()
+            print(f"Ошибка при обновлении занятий расписания: {e}")
+            return 0
+        finally:
+            session.close()
+
+    def approve_reschedule_request(self, request_id: int) -> dict:
+        """Одобряет перенос: занятие исходной даты переносится на запрошенные дату и время.
+        Возвращает словарь с полями запроса или None, если запрос не найден или уже одобрен"""
+        session = self.Session()
+        try:
+            request = session.query(RescheduleRequest).filter_by(id=request_id).first()
+            if not request or request.status == 'approved':
+                return None
+            schedule = session.query(Schedule).filter_by(id=request.schedule_id).first()
+            if not schedule:
+                return None
+            occurrence_date = request.original_date.date()
+            occurrence = session.query(LessonOccurrence).filter_by(
+                schedule_id=schedule.id,
+                occurrence_date=occurrence_date
+            ).first()
+            if occurrence is None:
+                occurrence = LessonOccurrence(
+                    schedule_id=schedule.id,
+                    student_id=schedule.student_id,
+                    occurrence_date=occurrence_date,
+                    duration=schedule.duration
+                )
+                session.add(occurrence)
+            requested_time = datetime.strptime(request.requested_time, "%H:%M").time()
+            occurrence.start_time = datetime.combine(request.requested_date.date(), requested_time)
+            occurrence.reschedule_request_id = request.id
+            request.status = 'approved'
+            session.commit()
+            get_slot_cache().bump_schedule_version()
+            return {
+                'id': request.id,
+                'student_id': request.student_id,
+                'schedule_id': request.schedule_id,
+                'requested_date': request.requested_date,
+                'requested_time': request.requested_time
+            }
+        except Exception as e:
+            session.rollback()
+            print(f"Ошибка при одобрении переноса: {e}")
+            return None
+        finally:
+            session.close()
+
     def _get_day_name(self, day_of_week: int) -> str:
         """Возвращает название дня недели"""
         days = ['Понедельник', 'Вторник', 'Среда', 'Четверг', 'Пятница', 'Суббота', 'Воскресенье']
@@ -1393,15 +1907,18 @@ class Database:
             schedule = session.query(Schedule).filter_by(id=schedule_id).first()
             if not schedule:
                 return None
-            now = datetime.now()
-            current_day = schedule.day_of_week
-            current_date = now + timedelta(days=(current_day - now.weekday()) % 7)
-            if current_date < now:
-                current_date += timedelta(days=7)
+            # Переносится ближайшее ещё не прошедшее занятие этого правила
+            occurrence = session.query(LessonOccurrence).filter(
+                LessonOccurrence.schedule_id == schedule_id,
+                LessonOccurrence.reschedule_request_id.is_(None),
+                LessonOccurrence.start_time > moscow_now()
+            ).order_by(LessonOccurrence.start_time).first()
+            if not occurrence:
+                return None
             request = RescheduleRequest(
                 student_id=student_id,
                 schedule_id=schedule_id,
-                original_date=current_date,
+                original_date=occurrence.start_time,
                 original_time=schedule.time,
                 requested_date=requested_date,
                 requested_time=requested_time,
@@ -1428,19 +1945,25 @@ class Database:
         finally:
             session.close()
 
-    def get_reschedule_settings(self) -> RescheduleSettings:
-        """Получает настройки переносов"""
-        session = self.Session()
-        try:
-            settings = session.query(RescheduleSettings).first()
-            if not settings:
-                # Создаем настройки по умолчанию
-                settings = RescheduleSettings()
-                session.add(settings)
-                session.commit()
+    def get_reschedule_settings(self) -> RescheduleSettingsSnapshot:
+        """Получает настройки переносов (из памяти, база читается только при первом обращении)"""
+        settings = Database._reschedule_settings
+        if settings is not None:
             return settings
-        finally:
-            session.close()
+        with self._reschedule_settings_lock:
+            if Database._reschedule_settings is None:
+                session = self.Session()
+                try:
+                    row = session.query(RescheduleSettings).first()
+                    if not row:
+                        # Создаем настройки по умолчанию
+                        row = RescheduleSettings()
+                        session.add(row)
+                        session.commit()
+                    Database._reschedule_settings = RescheduleSettingsSnapshot.from_row(row)
+                finally:
+                    session.close()
+            return Database._reschedule_settings
 
     def update_reschedule_settings(self, **kwargs) -> bool:
         """Обновляет настройки переносов"""
@@ -1456,6 +1979,12 @@ class Database:
                     setattr(settings, key, value)
             
             session.commit()
+            # Подменяем закэшированные настройки целиком и сбрасываем зависящие от них слоты
+            with self._reschedule_settings_lock:
+                current = Database._reschedule_settings
+                version = current.version + 1 if current else 1
+                Database._reschedule_settings = RescheduleSettingsSnapshot.from_row(settings, version)
+            self._invalidate_slots_cache()
             return True
         except:
             session.rollback()
@@ -1463,154 +1992,146 @@ class Database:
         finally:
             session.close()
 
-    def get_available_slots_for_day(self, date: datetime, lesson_duration: int) -> list:
-        """Получает доступные слоты для занятия заданной длительности на конкретную дату с кэшированием"""
+    def _invalidate_slots_cache(self):
+        """Сбрасывает кэш доступных слотов"""
+        get_slot_cache().clear()
+
+    def get_slot_cache_stats(self) -> dict:
+        """Возвращает метрики кэша доступных слотов"""
+        return get_slot_cache().get_stats()
+
+    def get_slot_sources_version(self) -> tuple:
+        """Версии настроек, расписания и календаря, от которых зависят доступные слоты"""
+        return (self.get_reschedule_settings().version, get_slot_cache().schedule_version, self._get_calendar_version())
+
+    def get_active_lesson_durations(self) -> list:
+        """Возвращает отсортированный список длительностей активных занятий"""
         session = self.Session()
         try:
-            settings = self.get_reschedule_settings()
-            day_of_week = date.weekday()
-            available_days = [int(d) for d in settings.available_days.split(',')]
-            if day_of_week not in available_days:
-                return []
-
-            # --- Кэширование ---
-            # Ключ кэша: (student_id, date, duration)
-            # Для совместимости с текущим кодом, определим student_id через расписание (если есть)
-            student_id = None
-            try:
-                # Получаем расписание для этого дня
-                schedule = session.query(Schedule).filter_by(day_of_week=day_of_week, is_active=True).first()
-                if schedule:
-                    student_id = schedule.student_id
-            except Exception:
-                pass
-            cache_key = (student_id, date.date().isoformat(), lesson_duration)
-            now_ts = datetime.now().timestamp()
-            with self._slots_cache_lock:
-                cache_entry = self._slots_cache.get(cache_key)
-                if cache_entry:
-                    slots, ts = cache_entry
-                    if now_ts - ts < self._slots_cache_ttl:
-                        return slots
-            # --- Конец блока кэширования ---
-
-            # ... существующий код получения слотов ...
-            start_time = datetime.strptime(settings.work_start_time, "%H:%M").time()
-            end_time = datetime.strptime(settings.work_end_time, "%H:%M").time()
-            now = datetime.now()
-            if date.date() == now.date():
-                current_hour = now.hour
-                current_minute = now.minute
-                adjusted_hour = current_hour + 1
-                if adjusted_hour >= 24:
-                    return []
-                start_time = max(start_time, datetime.strptime(f"{adjusted_hour:02d}:{current_minute:02d}", "%H:%M").time())
-            try:
-                from .ical_sync import ical_sync
-                slots = ical_sync.get_available_slots(
-                    date=date,
-                    start_time=start_time.strftime("%H:%M"),
-                    end_time=end_time.strftime("%H:%M"),
-                    slot_duration=lesson_duration,
-                    slot_interval=settings.slot_interval
-                )
-                filtered_slots = []
-                for slot in slots:
-                    if self.is_slot_available(date, slot['time'], lesson_duration):
-                        filtered_slots.append(slot)
-                slots = filtered_slots
-            except ImportError:
-                slots = []
-            except Exception as e:
-                slots = []
-            if not slots:
-                # Старая логика (если iCal недоступен)
-                slots = []
-                current_time = start_time
-                while current_time < end_time:
-                    slot_end = datetime.combine(date, current_time) + timedelta(minutes=lesson_duration)
-                    slot_end_time = slot_end.time()
-                    if slot_end_time <= end_time:
-                        if self.is_slot_available(date, current_time.strftime("%H:%M"), lesson_duration):
-                            slots.append({
-                                'time': current_time.strftime('%H:%M'),
-                                'end_time': slot_end_time.strftime('%H:%M'),
-                                'display': f"{current_time.strftime('%H:%M')}-{slot_end_time.strftime('%H:%M')}"
-                            })
-                    current_time = (datetime.combine(date, current_time) + timedelta(minutes=settings.slot_interval)).time()
-            # --- Сохраняем в кэш ---
-            with self._slots_cache_lock:
-                self._slots_cache[cache_key] = (slots, now_ts)
-            return slots
+            rows = session.query(Schedule.duration).filter(Schedule.is_active == True).distinct().all()
+            return sorted(duration for duration, in rows if duration)
         finally:
             session.close()
 
+    def get_available_slots_for_day(self, date: datetime, lesson_duration: int) -> list:
+        """Получает доступные слоты для занятия заданной длительности на конкретную дату с кэшированием"""
+        return self._get_slots_for_dates([date], lesson_duration)[0]
+
+    def get_available_slots_for_week(self, week_start: datetime, lesson_duration: int) -> dict:
+        """Получает доступные слоты на все 7 дней недели за один проход.
+
+        Настройки читаются один раз, занятия всех дней — одним диапазонным запросом,
+        календарь загружается не более одного раза. Возвращает {date: слоты};
+        для прошедших дней список пуст.
+        """
+        today = datetime.now().date()
+        dates = [week_start + timedelta(days=i) for i in range(7)]
+        upcoming = [date for date in dates if date.date() >= today]
+        week_slots = {date.date(): [] for date in dates}
+        week_slots.update(zip((date.date() for date in upcoming), self._get_slots_for_dates(upcoming, lesson_duration)))
+        return week_slots
+
+    def _get_slots_for_dates(self, dates: list, lesson_duration: int) -> list:
+        """Слоты для каждой даты из списка; промахи кэша считаются вместе"""
+        settings = self.get_reschedule_settings()
+        now = datetime.now()
+        result = [[] for _ in dates]
+        pending = []  # (индекс, дата, начало дня, ключ без версии календаря)
+        calendar_version = self._get_calendar_version()
+        for index, date in enumerate(dates):
+            if date.weekday() not in settings.days:
+                continue
+            start = settings.start_minutes
+            if date.date() == now.date():
+                # Сегодня — не раньше чем через час от текущего времени
+                if now.hour + 1 >= 24:
+                    continue
+                start = max(start, (now.hour + 1) * 60 + now.minute)
+
+            # Ключ кэша: дата, длительность, начало дня (для сегодня зависит от времени) и версии источников
+            day_key = (date.date().isoformat(), lesson_duration, start, settings.version, get_slot_cache().schedule_version)
+            slots = get_slot_cache().get(day_key + (calendar_version,))
+            if slots is not None:
+                result[index] = slots
+            else:
+                pending.append((index, date, start, day_key))
+        if not pending:
+            return result
+
+        # Занятия всех нужных дат — одним диапазонным запросом
+        lessons = self._get_lessons_for_dates([date for _, date, _, _ in pending])
+        for index, date, start, day_key in pending:
+            # Занятое время: занятия из расписания и события календаря, объединённые в отсортированный список
+            busy = lesson_intervals(lessons.get(date.date(), []))
+            busy.extend(calendar_intervals(self._get_calendar_busy_times(date)))
+            slots = free_slots(start, settings.end_minutes, lesson_duration, settings.slot_interval, merge_intervals(busy))
+            # Версию календаря берём после чтения: загрузка iCal могла её изменить
+            get_slot_cache().put(day_key + (self._get_calendar_version(),), slots)
+            result[index] = slots
+        return result
+
+    def _get_lessons_for_dates(self, dates) -> dict:
+        """Возвращает {дата: [(time, duration), ...]} занятий из lesson_occurrences"""
+        days = {date.date() if isinstance(date, datetime) else date for date in dates}
+        session = self.Session()
+        try:
+            rows = session.query(LessonOccurrence.start_time, LessonOccurrence.duration).filter(
+                LessonOccurrence.start_time >= datetime.combine(min(days), datetime.min.time()),
+                LessonOccurrence.start_time < datetime.combine(max(days) + timedelta(days=1), datetime.min.time())
+            ).order_by(LessonOccurrence.start_time).all()
+        finally:
+            session.close()
+        lessons = {}
+        for start_time, duration in rows:
+            if start_time.date() in days:
+                lessons.setdefault(start_time.date(), []).append((start_time.strftime("%H:%M"), duration))
+        return lessons
+
+    def _get_calendar_version(self) -> int:
+        """Версия данных iCal календаря (меняется при каждой загрузке и очистке кэша)"""
+        try:
+            from .ical_sync import ical_sync
+            return ical_sync.version
+        except Exception:
+            return 0
+
+    def _get_calendar_busy_times(self, date: datetime) -> list:
+        """Занятое время из iCal календаря (пустой список, если календарь недоступен)"""
+        try:
+            from .ical_sync import ical_sync
+            return ical_sync.get_busy_times(date)
+        except Exception:
+            return []
+
     def is_slot_available(self, date: datetime, time: str, duration: int) -> bool:
         """Проверяет, доступен ли слот для занятия заданной длительности"""
-        session = self.Session()
-        try:
-            day_of_week = date.weekday()
-            
-            # Получаем все занятия в этот день недели
-            schedules = session.query(Schedule).filter_by(
-                day_of_week=day_of_week,
-                is_active=True
-            ).all()
-            
-            # Проверяем пересечения с существующими занятиями
-            requested_start = datetime.strptime(time, "%H:%M")
-            requested_end = requested_start + timedelta(minutes=duration)
-            
-            for schedule in schedules:
-                schedule_start = datetime.strptime(schedule.time, "%H:%M")
-                schedule_end = schedule_start + timedelta(minutes=schedule.duration)
-                
-                # Проверяем пересечение
-                if (requested_start < schedule_end and requested_end > schedule_start):
-                    return False  # Есть пересечение
-            
-            # Проверяем iCal календарь (если доступен)
-            try:
-                from .ical_sync import ical_sync
-                if ical_sync.is_time_busy(date, time, duration):
-                    return False  # Время занято в календаре
-            except ImportError:
-                # Если модуль iCal недоступен, пропускаем проверку
-                pass
-            
-            return True  # Нет пересечений
-        finally:
-            session.close()
+        start = time_to_minutes(time)
+        lessons = self._get_lessons_for_dates([date])
+        busy = lesson_intervals(lessons.get(date.date(), []))
+        busy.extend(calendar_intervals(self._get_calendar_busy_times(date)))
+        # Проверяем пересечение с занятиями и событиями календаря
+        return all(not (start < busy_end and start + duration > busy_start) for busy_start, busy_end in busy)
 
     def get_available_days_for_week(self, week_start: datetime, lesson_duration: int) -> list:
         """Получает доступные дни для недели с учетом длительности занятия"""
-        settings = self.get_reschedule_settings()
-        available_days = [int(d) for d in settings.available_days.split(',')]
         now = datetime.now()
+        week_slots = self.get_available_slots_for_week(week_start, lesson_duration)
         days = []
         for i in range(7):
-            if i in available_days:
-                date = week_start + timedelta(days=i)
-                # Проверяем, что дата не в прошлом
-                if date.date() > now.date():
-                    # Будущие дни недели — всегда доступны
-                    slots = self.get_available_slots_for_day(date, lesson_duration)
-                    if slots:
-                        days.append({
-                            'date': date,
-                            'day_name': self._get_day_name(i),
-                            'slots_count': len(slots)
-                        })
-                elif date.date() == now.date():
-                    # Сегодня — только если есть хотя бы один слот с временем позже текущего
-                    slots = self.get_available_slots_for_day(date, lesson_duration)
-                    future_slots = [slot for slot in slots if datetime.strptime(slot['time'], "%H:%M").time() > now.time()]
-                    if future_slots:
-                        days.append({
-                            'date': date,
-                            'day_name': self._get_day_name(i),
-                            'slots_count': len(future_slots)
-                        })
+            date = week_start + timedelta(days=i)
+            # Прошедшие дни пропускаем
+            if date.date() < now.date():
+                continue
+            slots = week_slots[date.date()]
+            if date.date() == now.date():
+                # Сегодня — только слоты с временем позже текущего
+                slots = [slot for slot in slots if datetime.strptime(slot['time'], "%H:%M").time() > now.time()]
+            if slots:
+                days.append({
+                    'date': date,
+                    'day_name': self._get_day_name(i),
+                    'slots_count': len(slots)
+                })
         return days
 
     def get_schedule_by_id(self, schedule_id: int) -> Schedule:
@@ -1623,28 +2144,15 @@ class Database:
 
     def get_admin_telegram_id(self) -> int:
         """Получает telegram_id администратора для отправки уведомлений"""
-        session = self.Session()
-        try:
-            admin = session.query(Admin).first()
-            return admin.telegram_id if admin else None
-        finally:
-            session.close()
+        admin_ids = self._ensure_admin_registry().telegram_ids()
+        return admin_ids[0] if admin_ids else None
 
     def get_admin_ids(self) -> list:
         """Получает список всех telegram_id администраторов"""
-        session = self.Session()
-        try:
-            admins = session.query(Admin).all()
-            return [admin.telegram_id for admin in admins]
-        finally:
-            session.close()
+        return self._ensure_admin_registry().telegram_ids()
 
     def get_admin_by_telegram_id(self, telegram_id: int):
-        session = self.Session()
-        try:
-            return session.query(Admin).filter_by(telegram_id=telegram_id).first()
-        finally:
-            session.close()
+        return self._ensure_admin_registry().get(telegram_id)
 
     def get_admin_menu_message_id(self, admin_id: int):
         session = self.Session()
@@ -1661,6 +2169,7 @@ class Database:
             if admin:
                 admin.menu_message_id = message_id
                 session.commit()
+                get_admin_registry().patch(admin_id, menu_message_id=message_id)
         finally:
             session.close()
 
@@ -1672,6 +2181,7 @@ class Database:
             if student:
                 student.avatar_emoji = avatar_emoji
                 session.commit()
+                get_student_cache().invalidate(student_id)
         finally:
             session.close()
 
@@ -1683,11 +2193,12 @@ class Database:
             if student:
                 student.theme = theme
                 session.commit()
+                get_student_cache().invalidate(student_id)
         finally:
             session.close()
 
-    def add_scheduled_reminder(self, student_id: int, schedule_id: int, reminder_time: datetime, lesson_time: datetime) -> bool:
-        """Добавляет запланированное напоминание в базу данных"""
+    def add_scheduled_reminder(self, student_id: int, schedule_id: int, reminder_time: datetime, lesson_time: datetime) -> int:
+        """Добавляет запланированное напоминание в базу данных и возвращает его id (None при ошибке)"""
         session = self.Session()
         try:
             reminder = ScheduledReminder(
@@ -1699,45 +2210,140 @@ class Database:
             )
             session.add(reminder)
             session.commit()
-            return True
+            return reminder.id
         except Exception as e:
             session.rollback()
             print(f'[reminder] Ошибка при добавлении напоминания в БД: {e}')
-            return False
+            return None
         finally:
             session.close()
 
-    def get_pending_reminders(self, current_time: datetime = None) -> list:
-        from pytz import timezone
-        moscow_tz = timezone('Europe/Moscow')
-        if current_time is None:
-            current_time = datetime.now(moscow_tz)
-        elif current_time.tzinfo is None:
-            current_time = moscow_tz.localize(current_time)
+    def plan_reminders(self, days: int = None, student_id: int = None) -> list:
+        """Планирует напоминания для всех занятий ближайших days дней одной транзакцией.
+
+        Напоминания берутся из lesson_occurrences (для всех студентов или одного) и
+        вставляются через INSERT ... ON CONFLICT DO NOTHING по unique_reminder, поэтому
+        повторный запуск ничего не дублирует. Возвращает только созданные напоминания:
+        список (id, student_id, schedule_id, reminder_time).
+        """
+        days = REMINDER_PLAN_DAYS if days is None else days
+        now = moscow_now()
         session = self.Session()
         try:
-            reminders = session.query(ScheduledReminder).filter(
-                ScheduledReminder.reminder_time <= current_time,
+            query = session.query(LessonOccurrence).join(
+                Schedule, Schedule.id == LessonOccurrence.schedule_id
+            ).join(
+                Student, Student.id == LessonOccurrence.student_id
+            ).filter(
+                LessonOccurrence.start_time > now + timedelta(minutes=REMINDER_LEAD_MINUTES),
+                LessonOccurrence.start_time < now + timedelta(days=days),
+                Schedule.is_active == True
+            )
+            if student_id is not None:
+                query = query.filter(LessonOccurrence.student_id == student_id)
+            rows = [
+                {
+                    'student_id': occurrence.student_id,
+                    'schedule_id': occurrence.schedule_id,
+                    'reminder_time': occurrence.start_time - timedelta(minutes=REMINDER_LEAD_MINUTES),
+                    'lesson_time': occurrence.start_time,
+                    'is_sent': False,
+                }
+                for occurrence in query
+            ]
+            if not rows:
+                return []
+            statement = sqlite_insert(ScheduledReminder).on_conflict_do_nothing(
+                index_elements=['student_id', 'schedule_id', 'reminder_time']
+            ).returning(
+                ScheduledReminder.id, ScheduledReminder.student_id,
+                ScheduledReminder.schedule_id, ScheduledReminder.reminder_time
+            )
+            planned = [tuple(row) for row in session.execute(statement, rows)]
+            session.commit()
+            return planned
+        except Exception as e:
+            session.rollback()
+            print(f'[reminder] Ошибка при планировании напоминаний: {e}')
+            return []
+        finally:
+            session.close()
+
+    def get_unsent_reminders(self) -> list:
+        """Все неотправленные напоминания, отсортированные по времени"""
+        session = self.Session()
+        try:
+            return session.query(ScheduledReminder).filter(
                 ScheduledReminder.is_sent == False
-            ).all()
-            return reminders
+            ).order_by(ScheduledReminder.reminder_time).all()
         finally:
             session.close()
 
-    def mark_reminder_sent(self, reminder_id: int) -> bool:
-        """Отмечает напоминание как отправленное"""
+    def delete_unsent_student_reminders(self, student_id: int) -> list:
+        """Удаляет неотправленные напоминания студента и возвращает их id"""
         session = self.Session()
         try:
-            reminder = session.query(ScheduledReminder).filter_by(id=reminder_id).first()
-            if reminder:
-                reminder.is_sent = True
+            reminder_ids = [reminder_id for reminder_id, in session.query(ScheduledReminder.id).filter(
+                ScheduledReminder.student_id == student_id,
+                ScheduledReminder.is_sent == False
+            )]
+            if reminder_ids:
+                session.query(ScheduledReminder).filter(
+                    ScheduledReminder.id.in_(reminder_ids)
+                ).delete(synchronize_session=False)
                 session.commit()
-                return True
-            return False
+            return reminder_ids
         except Exception as e:
             session.rollback()
-            print(f'[reminder] Ошибка при отметке напоминания как отправленного: {e}')
-            return False
+            print(f'[reminder] Ошибка при удалении напоминаний студента: {e}')
+            return []
+        finally:
+            session.close()
+
+    def get_reminder_batch(self, reminder_ids: list = None, current_time: datetime = None) -> list:
+        """Неотправленные напоминания вместе со студентом и занятием одним запросом.
+
+        Берутся напоминания с указанными id, а без них — все наступившие к current_time.
+        Возвращает список (ScheduledReminder, Student или None, Schedule или None).
+        """
+        session = self.Session()
+        try:
+            query = session.query(ScheduledReminder, Student, Schedule).outerjoin(
+                Student, Student.id == ScheduledReminder.student_id
+            ).outerjoin(
+                Schedule, Schedule.id == ScheduledReminder.schedule_id
+            ).filter(ScheduledReminder.is_sent == False)
+            if reminder_ids is not None:
+                if not reminder_ids:
+                    return []
+                query = query.filter(ScheduledReminder.id.in_(list(reminder_ids)))
+            else:
+                moscow_tz = pytz.timezone('Europe/Moscow')
+                if current_time is None:
+                    current_time = datetime.now(moscow_tz)
+                elif current_time.tzinfo is None:
+                    current_time = moscow_tz.localize(current_time)
+                query = query.filter(ScheduledReminder.reminder_time <= current_time)
+            return query.order_by(ScheduledReminder.reminder_time, ScheduledReminder.id).all()
+        finally:
+            session.close()
+
+    def mark_reminders_sent(self, reminder_ids: list) -> int:
+        """Отмечает пачку напоминаний отправленными одним UPDATE ... WHERE id IN (...)"""
+        reminder_ids = list(reminder_ids)
+        if not reminder_ids:
+            return 0
+        session = self.Session()
+        try:
+            updated = session.query(ScheduledReminder).filter(
+                ScheduledReminder.id.in_(reminder_ids)
+            ).update({ScheduledReminder.is_sent: True}, synchronize_session=False)
+            session.commit()
+            return updated
+        except Exception as e:
+            session.rollback()
+            print(f'[reminder] Ошибка при отметке напоминаний как отправленных: {e}')
+            return 0
         finally:
             session.close()
 
@@ -0,0 +1,116 @@
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import functools
+import os
+import threading
+
+# Настройки пула потоков для синхронных вызовов Database
+DB_EXECUTOR_MAX_WORKERS = int(os.getenv("DB_EXECUTOR_MAX_WORKERS", "4"))
+DB_EXECUTOR_MAX_QUEUE = int(os.getenv("DB_EXECUTOR_MAX_QUEUE", "64"))
+DB_EXECUTOR_TIMEOUT = float(os.getenv("DB_EXECUTOR_TIMEOUT", "30"))
+
+class DatabaseExecutor:
+    """Ограниченный пул потоков для выполнения синхронных методов Database из async-обработчиков.
+
+    Каждый метод Database открывает и закрывает собственную сессию, поэтому
+    сессия всегда живёт в том потоке пула, где выполняется вызов.
+    Число одновременно ожидающих вызовов ограничено max_queue: при переполнении
+    новые вызовы ждут освобождения места, не блокируя цикл событий.
+    """
+
+    def __init__(self, max_workers: int = DB_EXECUTOR_MAX_WORKERS, max_queue: int = DB_EXECUTOR_MAX_QUEUE,
+                 timeout: float = DB_EXECUTOR_TIMEOUT):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="db")
+        self._slots = None
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._active = 0
+        self._completed = 0
+        self._failed = 0
+        self._timeouts = 0
+        self._max_queue_depth = 0
+
+    def _call(self, func, args, kwargs):
+        """Выполняет вызов в потоке пула, обновляя счётчики"""
+        with self._lock:
+            self._queued -= 1
+            self._active += 1
+        try:
+            return func(*args, **kwargs)
+        finally:
+            with self._lock:
+                self._active -= 1
+
+    async def run(self, func, *args, timeout: float = None, **kwargs):
+        """Выполняет func(*args, **kwargs) в пуле и возвращает результат.
+
+        При превышении таймаута выбрасывает asyncio.TimeoutError; сам вызов
+        при этом дорабатывает в своём потоке и до завершения занимает место в очереди.
+        """
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_queue)
+        timeout = self.timeout if timeout is None else timeout
+        loop = asyncio.get_running_loop()
+        slots = self._slots
+        await slots.acquire()
+        with self._lock:
+            self._queued += 1
+            self._max_queue_depth = max(self._max_queue_depth, self._queued)
+        try:
+            future = loop.run_in_executor(self._executor, functools.partial(self._call, func, args, kwargs))
+        except BaseException:
+            with self._lock:
+                self._queued -= 1
+            slots.release()
+            raise
+        # Место в очереди освобождается, когда вызов действительно завершится в пуле,
+        # а не когда истечёт таймаут ожидания
+        future.add_done_callback(lambda _: slots.release())
+        try:
+            # shield: по таймауту отменяем только ожидание, а не уже поставленный в пул вызов
+            result = await asyncio.wait_for(asyncio.shield(future), timeout)
+        except asyncio.TimeoutError:
+            with self._lock:
+                self._timeouts += 1
+            raise
+        except Exception:
+            with self._lock:
+                self._failed += 1
+            raise
+        with self._lock:
+            self._completed += 1
+        return result
+
+    def get_stats(self) -> dict:
+        """Возвращает метрики пула: глубину очереди, активные и завершённые вызовы"""
+        with self._lock:
+            return {
+                'max_workers': self.max_workers,
+                'max_queue': self.max_queue,
+                'queued': self._queued,
+                'active': self._active,
+                'completed': self._completed,
+                'failed': self._failed,
+                'timeouts': self._timeouts,
+                'max_queue_depth': self._max_queue_depth,
+            }
+
+    def shutdown(self, wait: bool = True):
+        """Останавливает пул потоков"""
+        self._executor.shutdown(wait=wait)
+
+# Общий пул для всего процесса
+_db_executor = None
+_db_executor_lock = threading.Lock()
+
+def get_db_executor() -> DatabaseExecutor:
+    """Возвращает общий пул потоков для вызовов Database (создается один раз)"""
+    global _db_executor
+    if _db_executor is None:
+        with _db_executor_lock:
+            if _db_executor is None:
+                _db_executor = DatabaseExecutor()
+    return _db_executor
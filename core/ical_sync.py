@@ -12,6 +12,7 @@ class ICalCalendarSync:
         self._cached_events = None
         self._cache_time = None
         self._cache_duration = timedelta(minutes=5)  # Кэшируем на 5 минут
+        self.version = 0  # Растёт при каждой загрузке календаря и очистке кэша (входит в ключи кэша слотов)
     
     def _fetch_calendar(self) -> Optional[Calendar]:
         """Загружает календарь из iCal URL"""
@@ -116,6 +117,7 @@ class ICalCalendarSync:
         # Обновляем кэш
         self._cached_events = events
         self._cache_time = now
+        self.version += 1
         
         return self._filter_events_for_date(events, date)
     
@@ -280,6 +282,7 @@ class ICalCalendarSync:
         """Очищает кэш календаря"""
         self._cached_events = None
         self._cache_time = None
+        self.version += 1
 
 # Глобальный экземпляр для использования в других модулях
 # URL вашего iCal календаря
@@ -1,6 +1,6 @@
 from sqlalchemy import create_engine, text, inspect
 from sqlalchemy.orm import declarative_base
-from core.database import Base
+from core.database import Base, compute_task_sort_key
 import sqlite3
 import os
 
@@ -299,6 +299,87 @@ def migrate_database():
     except Exception:
         pass  # Миграция уже выполнена или не нужна
 
+    # Миграция 20: индексы для горячих выборок
+    hot_indexes = [
+        "CREATE INDEX IF NOT EXISTS ix_notifications_student_read ON notifications (student_id, is_read)",
+        "CREATE INDEX IF NOT EXISTS ix_notifications_admin_read ON notifications (admin_id, is_read)",
+        "CREATE INDEX IF NOT EXISTS ix_push_messages_user_id ON push_messages (user_id)",
+        "CREATE INDEX IF NOT EXISTS ix_student_homework_student_homework_assigned ON student_homework (student_id, homework_id, assigned_at)",
+        "CREATE INDEX IF NOT EXISTS ix_scheduled_reminders_sent_time ON scheduled_reminders (is_sent, reminder_time)",
+        "CREATE INDEX IF NOT EXISTS ix_students_password ON students (password)",
+        "CREATE INDEX IF NOT EXISTS ix_students_exam_type ON students (exam_type)",
+    ]
+    for statement in hot_indexes:
+        try:
+            with engine.connect() as conn:
+                conn.execute(text(statement))
+                conn.commit()
+        except Exception:
+            pass  # Таблица ещё не создана — индекс появится вместе с ней
+
+    # Миграция 21: сохранённый ключ сортировки по номеру задания для homework и notes
+    for table in ('homework', 'notes'):
+        try:
+            with engine.connect() as conn:
+                result = conn.execute(text(f"PRAGMA table_info({table})"))
+                columns = [row[1] for row in result.fetchall()]
+                if not columns:
+                    continue  # Таблица ещё не создана — колонки появятся вместе с ней
+                for column, column_type in (('task_major', 'INTEGER'), ('task_minor', 'INTEGER'), ('task_tail', 'VARCHAR')):
+                    if column not in columns:
+                        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}"))
+                # Заполняем ключ для строк, записанных до появления колонок
+                rows = conn.execute(text(
+                    f"SELECT id, title FROM {table} WHERE task_major IS NULL AND task_tail IS NULL"
+                )).fetchall()
+                for row_id, title in rows:
+                    major, minor, tail = compute_task_sort_key(title)
+                    conn.execute(
+                        text(f"UPDATE {table} SET task_major = :major, task_minor = :minor, task_tail = :tail WHERE id = :id"),
+                        {'major': major, 'minor': minor, 'tail': tail, 'id': row_id}
+                    )
+                conn.execute(text(
+                    f"CREATE INDEX IF NOT EXISTS ix_{table}_exam_task_order ON {table} (exam_type, task_major, task_minor, task_tail)"
+                ))
+                conn.commit()
+                if rows:
+                    print(f"Заполнен ключ сортировки для {len(rows)} записей в {table}")
+        except Exception as e:
+            print(f"Ошибка при добавлении ключа сортировки в {table}: {e}")
+
+    # Миграция 22: таблица lesson_occurrences (занятия расписания на конкретные даты)
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("""
+                CREATE TABLE IF NOT EXISTS lesson_occurrences (
+                    id INTEGER PRIMARY KEY,
+                    schedule_id INTEGER NOT NULL,
+                    student_id INTEGER NOT NULL,
+                    occurrence_date DATE NOT NULL,
+                    start_time DATETIME NOT NULL,
+                    duration INTEGER NOT NULL,
+                    reschedule_request_id INTEGER,
+                    FOREIGN KEY (schedule_id) REFERENCES schedule (id),
+                    FOREIGN KEY (student_id) REFERENCES students (id),
+                    FOREIGN KEY (reschedule_request_id) REFERENCES reschedule_requests (id),
+                    CONSTRAINT unique_lesson_occurrence UNIQUE (schedule_id, occurrence_date)
+                )
+            """))
+            conn.execute(text("CREATE INDEX IF NOT EXISTS ix_lesson_occurrences_start_time ON lesson_occurrences (start_time)"))
+            conn.execute(text("CREATE INDEX IF NOT EXISTS ix_lesson_occurrences_student_start ON lesson_occurrences (student_id, start_time)"))
+            conn.commit()
+    except Exception as e:
+        print(f"Ошибка при создании таблицы lesson_occurrences: {e}")
+
+    # Миграция 23: удаление индекса schedule (day_of_week, is_active), созданного прежней
+    # миграцией 20 — занятия на день теперь читаются из lesson_occurrences по start_time
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("DROP INDEX IF EXISTS ix_schedule_day_active"))
+            conn.commit()
+    except Exception:
+        pass  # Индекса уже нет — удалять нечего
+
 def run_migrations():
     """Запускает все миграции базы данных"""
     engine = create_engine('sqlite:///students.db')
@@ -0,0 +1,127 @@
+from functools import lru_cache
+import threading
+
+# Стоп-слова, которые не участвуют в сравнении названий заданий и конспектов
+STOP_WORDS = frozenset({'задача', 'задание', 'конспект', 'по', 'в', 'на', 'для', 'и', 'или', 'с', 'от', 'до'})
+
+# Порог схожести по ключевым словам (коэффициент Жаккара)
+SIMILARITY_THRESHOLD = 0.7
+
+@lru_cache(maxsize=4096)
+def extract_keywords(title: str) -> tuple:
+    """Извлекает ключевые слова из названия (результат кэшируется по названию)"""
+    words = title.lower().split()
+    return tuple(w for w in words if w not in STOP_WORDS and len(w) > 2)
+
+def jaccard(keywords1, keywords2) -> float:
+    """Вычисляет схожесть двух наборов ключевых слов"""
+    set1 = keywords1 if isinstance(keywords1, frozenset) else frozenset(keywords1)
+    set2 = keywords2 if isinstance(keywords2, frozenset) else frozenset(keywords2)
+    if not set1 or not set2:
+        return 0.0
+    total = set1 | set2
+    return len(set1 & set2) / len(total) if total else 0.0
+
+class KeywordIndex:
+    """Инвертированный индекс названий по типу экзамена: ключевое слово -> id записей.
+
+    Для каждой записи (конспекта или задания) хранится номер задания и множество
+    ключевых слов, поэтому подбор пар «задание — конспект» сводится к поиску в индексе
+    и расчёту схожести только для кандидатов с общими словами.
+    Общий индекс конспектов загружается целиком при первом обращении и далее
+    обновляется инкрементально из add_note / update_note / delete_note; индекс
+    заданий строится на время одного сопоставления.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._items = {}  # item_id -> (exam_type, task_number, frozenset ключевых слов)
+        self._by_keyword = {}  # exam_type -> {слово: set(item_id)}
+        self._by_number = {}  # exam_type -> {номер задания: set(item_id)}
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def load(self, items):
+        """Полностью перестраивает индекс из итерации (item_id, exam_type, title, task_number)"""
+        with self._lock:
+            self._items.clear()
+            self._by_keyword.clear()
+            self._by_number.clear()
+            for item_id, exam_type, title, task_number in items:
+                self._add_locked(item_id, exam_type, title, task_number)
+            self._loaded = True
+
+    def invalidate(self):
+        """Сбрасывает индекс; он будет перестроен при следующем обращении"""
+        with self._lock:
+            self._loaded = False
+
+    def add(self, item_id: int, exam_type, title: str, task_number):
+        """Добавляет или обновляет запись в индексе"""
+        with self._lock:
+            if not self._loaded:
+                return
+            self._remove_locked(item_id)
+            self._add_locked(item_id, exam_type, title, task_number)
+
+    def remove(self, item_id: int):
+        """Удаляет запись из индекса"""
+        with self._lock:
+            if self._loaded:
+                self._remove_locked(item_id)
+
+    def find_matches(self, exam_type, task_number, keywords) -> tuple:
+        """Возвращает (id с тем же номером задания, id с похожими ключевыми словами).
+        Записи без номера задания (task_number = inf) по номеру не сопоставляются."""
+        keywords = frozenset(keywords)
+        with self._lock:
+            exact = set()
+            if task_number != float('inf'):
+                exact = set(self._by_number.get(exam_type, {}).get(task_number, ()))
+            by_keyword = self._by_keyword.get(exam_type, {})
+            candidates = set()
+            for word in keywords:
+                candidates |= by_keyword.get(word, set())
+            similar = {
+                item_id for item_id in candidates - exact
+                if jaccard(keywords, self._items[item_id][2]) > SIMILARITY_THRESHOLD
+            }
+        return exact, similar
+
+    def _add_locked(self, item_id, exam_type, title, task_number):
+        keywords = frozenset(extract_keywords(title))
+        self._items[item_id] = (exam_type, task_number, keywords)
+        self._by_number.setdefault(exam_type, {}).setdefault(task_number, set()).add(item_id)
+        exam_keywords = self._by_keyword.setdefault(exam_type, {})
+        for word in keywords:
+            exam_keywords.setdefault(word, set()).add(item_id)
+
+    def _remove_locked(self, item_id):
+        entry = self._items.pop(item_id, None)
+        if entry is None:
+            return
+        exam_type, task_number, keywords = entry
+        self._by_number.get(exam_type, {}).get(task_number, set()).discard(item_id)
+        exam_keywords = self._by_keyword.get(exam_type, {})
+        for word in keywords:
+            ids = exam_keywords.get(word)
+            if ids is not None:
+                ids.discard(item_id)
+                if not ids:
+                    del exam_keywords[word]
+
+# Общий индекс конспектов для всего процесса
+_note_index = None
+_note_index_lock = threading.Lock()
+
+def get_note_index() -> KeywordIndex:
+    """Возвращает общий индекс конспектов по ключевым словам (создается один раз)"""
+    global _note_index
+    if _note_index is None:
+        with _note_index_lock:
+            if _note_index is None:
+                _note_index = KeywordIndex()
+    return _note_index
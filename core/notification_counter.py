@@ -0,0 +1,88 @@
+import threading
+
+class UnreadNotificationCounter:
+    """Кэш счётчиков непрочитанных уведомлений по получателю.
+
+    Ключ — ('student', id) или ('admin', id). Значение загружается одним
+    COUNT(*) при первом обращении и далее поддерживается методами Database,
+    которые добавляют, читают и удаляют уведомления, поэтому отрисовка меню
+    не обращается к базе.
+
+    Каждое изменение счётчика увеличивает поколение ключа. Читатель берёт
+    generation() до COUNT(*) и передаёт его в set(): если за время запроса
+    уведомление добавили или прочитали, устаревшее значение не сохраняется.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = {}
+        self._generations = {}  # key -> номер поколения
+        self._epoch = 0  # увеличивается при полном сбросе
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, key):
+        """Возвращает закэшированное значение или None"""
+        with self._lock:
+            count = self._counts.get(key)
+            if count is None:
+                self._misses += 1
+            else:
+                self._hits += 1
+            return count
+
+    def generation(self, key):
+        """Возвращает поколение ключа; берётся до чтения значения из базы"""
+        with self._lock:
+            return self._epoch, self._generations.get(key, 0)
+
+    def set(self, key, count: int, generation):
+        """Сохраняет значение, полученное из базы, если ключ не менялся с generation"""
+        with self._lock:
+            if generation == (self._epoch, self._generations.get(key, 0)):
+                self._counts[key] = count
+
+    def increment(self, key, amount: int = 1):
+        """Увеличивает счётчик, если он уже загружен (иначе его посчитает COUNT при следующем чтении)"""
+        with self._lock:
+            self._bump_locked(key)
+            if key in self._counts:
+                self._counts[key] += amount
+
+    def reset(self, key):
+        """Обнуляет счётчик после прочтения или удаления всех уведомлений"""
+        with self._lock:
+            self._bump_locked(key)
+            self._counts[key] = 0
+
+    def invalidate(self, key=None):
+        """Сбрасывает один счётчик или весь кэш"""
+        with self._lock:
+            if key is None:
+                self._counts.clear()
+                self._generations.clear()
+                self._epoch += 1
+            else:
+                self._bump_locked(key)
+                self._counts.pop(key, None)
+
+    def get_stats(self) -> dict:
+        """Возвращает число закэшированных счётчиков, попаданий и промахов"""
+        with self._lock:
+            return {'cached': len(self._counts), 'hits': self._hits, 'misses': self._misses}
+
+    def _bump_locked(self, key):
+        self._generations[key] = self._generations.get(key, 0) + 1
+
+# Общие счётчики уведомлений для всего процесса
+_unread_counter = None
+_unread_counter_lock = threading.Lock()
+
+def get_unread_counter() -> UnreadNotificationCounter:
+    """Возвращает общий счётчик непрочитанных уведомлений (создается один раз)"""
+    global _unread_counter
+    if _unread_counter is None:
+        with _unread_counter_lock:
+            if _unread_counter is None:
+                _unread_counter = UnreadNotificationCounter()
+    return _unread_counter
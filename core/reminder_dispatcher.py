@@ -0,0 +1,223 @@
+from datetime import datetime
+from typing import NamedTuple
+import heapq
+import os
+import threading
+import pytz
+
+# Напоминания, опоздавшие при запуске больше чем на REMINDER_GRACE_SECONDS, не отправляются
+REMINDER_GRACE_SECONDS = float(os.getenv("REMINDER_GRACE_SECONDS", "900"))
+# Неотправленное напоминание повторяется через REMINDER_RETRY_SECONDS, затем вдвое реже,
+# пока не выйдет REMINDER_GRACE_SECONDS от исходного времени
+REMINDER_RETRY_SECONDS = float(os.getenv("REMINDER_RETRY_SECONDS", "30"))
+
+MOSCOW_TZ = pytz.timezone('Europe/Moscow')
+
+class QueuedReminder(NamedTuple):
+    due: float  # время отправки, unix timestamp
+    reminder_id: int
+    student_id: int
+    schedule_id: int
+
+def reminder_timestamp(value: datetime) -> float:
+    """Время напоминания -> unix timestamp (значения без tzinfo — московское время)"""
+    if value.tzinfo is None:
+        value = MOSCOW_TZ.localize(value)
+    return value.timestamp()
+
+class ReminderDispatcher:
+    """Единый диспетчер напоминаний о занятиях на основе min-кучи.
+
+    Вместо отдельной задачи JobQueue на каждое напоминание в JobQueue
+    стоит одна задача — на время ближайшего напоминания. Когда она
+    срабатывает, все наступившие напоминания передаются в on_due одним
+    списком, после чего задача переставляется на следующее. Отмена
+    ленивая: запись удаляется из словаря, а из кучи — при извлечении.
+
+    Извлечённые напоминания остаются «в отправке», пока обработчик не
+    подтвердит их через cancel (отправлено или отправлять некому).
+    Неподтверждённые после on_due возвращаются в кучу с нарастающей
+    задержкой, поэтому сбой отправки не теряет напоминание.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._heap = []
+        self._queued = {}  # reminder_id -> QueuedReminder
+        self._job_queue = None
+        self._on_due = None
+        self._job = None
+        self._armed_for = None
+        self._in_flight = {}  # reminder_id -> QueuedReminder, отправляемые сейчас
+        self._retries = {}  # reminder_id -> (исходное время, число повторов)
+        self._dispatched = 0
+        self._batches = 0
+        self._retried = 0
+
+    def start(self, job_queue, on_due):
+        """Подключает диспетчер к JobQueue; on_due(context, reminders) — корутина отправки"""
+        self._job_queue = job_queue
+        self._on_due = on_due
+        self._arm()
+
+    def load(self, reminders, now: float = None) -> int:
+        """Заполняет кучу записями ScheduledReminder (неотправленными). Возвращает число принятых"""
+        now = datetime.now().timestamp() if now is None else now
+        loaded = 0
+        with self._lock:
+            for reminder in reminders:
+                due = reminder_timestamp(reminder.reminder_time)
+                if due < now - REMINDER_GRACE_SECONDS:
+                    continue  # Занятие уже началось или прошло — напоминать поздно
+                self._push_locked(QueuedReminder(due, reminder.id, reminder.student_id, reminder.schedule_id))
+                loaded += 1
+        self._arm()
+        return loaded
+
+    def add(self, reminder_id: int, student_id: int, schedule_id: int, reminder_time: datetime):
+        """Добавляет (или заменяет) напоминание"""
+        with self._lock:
+            self._push_locked(QueuedReminder(reminder_timestamp(reminder_time), reminder_id, student_id, schedule_id))
+        self._arm()
+
+    def cancel(self, reminder_ids) -> int:
+        """Отменяет напоминания по id (и подтверждает отправляемые). Возвращает число отменённых"""
+        with self._lock:
+            cancelled = 0
+            for reminder_id in reminder_ids:
+                self._retries.pop(reminder_id, None)
+                queued = self._queued.pop(reminder_id, None)
+                in_flight = self._in_flight.pop(reminder_id, None)
+                if queued is not None or in_flight is not None:
+                    cancelled += 1
+            self._compact_locked()
+        if cancelled:
+            self._arm()
+        return cancelled
+
+    def cancel_student(self, student_id: int) -> int:
+        """Отменяет все напоминания студента"""
+        with self._lock:
+            reminder_ids = [
+                rid for entries in (self._queued, self._in_flight)
+                for rid, entry in entries.items() if entry.student_id == student_id
+            ]
+        return self.cancel(reminder_ids)
+
+    def pop_due(self, now: float = None) -> list:
+        """Извлекает все наступившие напоминания в порядке времени"""
+        now = datetime.now().timestamp() if now is None else now
+        due = []
+        with self._lock:
+            while self._heap and self._heap[0].due <= now:
+                entry = heapq.heappop(self._heap)
+                if self._queued.get(entry.reminder_id) == entry:
+                    del self._queued[entry.reminder_id]
+                    due.append(entry)
+        return due
+
+    def next_due(self):
+        """Время ближайшего напоминания (timestamp) или None"""
+        with self._lock:
+            self._drop_cancelled_top_locked()
+            return self._heap[0].due if self._heap else None
+
+    async def _dispatch(self, context):
+        """Задача JobQueue: отправляет все наступившие напоминания одним пакетом"""
+        with self._lock:
+            self._job = None
+            self._armed_for = None
+        due = self.pop_due()
+        with self._lock:
+            for entry in due:
+                self._in_flight[entry.reminder_id] = entry
+        try:
+            if due:
+                self._batches += 1
+                self._dispatched += len(due)
+                await self._on_due(context, due)
+        except Exception as e:
+            print(f'[reminder] Ошибка при отправке пакета напоминаний: {e}')
+        finally:
+            self._retry_unconfirmed(due)
+            self._arm()
+
+    def _retry_unconfirmed(self, due, now: float = None):
+        """Возвращает в кучу напоминания пакета, которые on_due не подтвердил"""
+        now = datetime.now().timestamp() if now is None else now
+        retried = dropped = 0
+        with self._lock:
+            for entry in due:
+                if self._in_flight.pop(entry.reminder_id, None) is None:
+                    continue  # Отправлено или отменено
+                if entry.reminder_id in self._queued:
+                    continue  # Пока шла отправка, напоминание запланировали заново
+                original_due, attempts = self._retries.get(entry.reminder_id, (entry.due, 0))
+                retry_at = now + REMINDER_RETRY_SECONDS * 2 ** attempts
+                if retry_at > original_due + REMINDER_GRACE_SECONDS:
+                    self._retries.pop(entry.reminder_id, None)
+                    dropped += 1
+                    continue  # Занятие уже началось — повторять поздно
+                self._retries[entry.reminder_id] = (original_due, attempts + 1)
+                self._push_locked(entry._replace(due=retry_at))
+                retried += 1
+            self._retried += retried
+        if retried or dropped:
+            print(f'[reminder] Не отправлено напоминаний: {retried} будут повторены, {dropped} просрочены')
+
+    def _arm(self):
+        """Ставит единственную задачу JobQueue на время ближайшего напоминания"""
+        if self._job_queue is None or self._on_due is None:
+            return
+        due = self.next_due()
+        with self._lock:
+            if due == self._armed_for:
+                return
+            if self._job is not None:
+                self._job.schedule_removal()
+                self._job = None
+            self._armed_for = due
+            if due is None:
+                return
+            delay = max(0.0, due - datetime.now().timestamp())
+            self._job = self._job_queue.run_once(self._dispatch, when=delay, name='reminder_dispatcher')
+
+    def _push_locked(self, entry: QueuedReminder):
+        self._queued[entry.reminder_id] = entry
+        heapq.heappush(self._heap, entry)
+
+    def _drop_cancelled_top_locked(self):
+        while self._heap and self._queued.get(self._heap[0].reminder_id) != self._heap[0]:
+            heapq.heappop(self._heap)
+
+    def _compact_locked(self):
+        # Перестраиваем кучу, когда отменённых записей в ней больше, чем живых
+        if len(self._heap) > 2 * len(self._queued) + 64:
+            self._heap = list(self._queued.values())
+            heapq.heapify(self._heap)
+
+    def get_stats(self) -> dict:
+        """Возвращает число ожидающих напоминаний, размер кучи и отправленные пакеты"""
+        with self._lock:
+            return {
+                'pending': len(self._queued),
+                'heap_size': len(self._heap),
+                'next_due': self._armed_for,
+                'in_flight': len(self._in_flight),
+                'dispatched': self._dispatched,
+                'batches': self._batches,
+                'retried': self._retried,
+            }
+
+# Общий диспетчер для всего процесса
+_reminder_dispatcher = None
+_reminder_dispatcher_lock = threading.Lock()
+
+def get_reminder_dispatcher() -> ReminderDispatcher:
+    """Возвращает общий диспетчер напоминаний (создается один раз)"""
+    global _reminder_dispatcher
+    if _reminder_dispatcher is None:
+        with _reminder_dispatcher_lock:
+            if _reminder_dispatcher is None:
+                _reminder_dispatcher = ReminderDispatcher()
+    return _reminder_dispatcher
@@ -0,0 +1,81 @@
+from telegram.ext import CallbackContext
+import functools
+import inspect
+
+# Чтения, результаты которых переиспользуются в пределах одного апдейта
+MEMOIZED_METHODS = frozenset({
+    'get_student_by_telegram_id',
+    'get_student_by_id',
+    'get_admin_by_telegram_id',
+    'is_admin',
+    'get_reschedule_settings',
+    'get_schedule_by_id',
+    'get_homework_by_id',
+    'get_note_by_id',
+})
+
+# Префиксы методов Database, которые только читают данные
+READ_PREFIXES = ('get_', 'is_', 'has_', 'count_', 'find_')
+
+class RequestScopedDatabase:
+    """Обёртка над общим Database на время обработки одного апдейта.
+
+    Повторные вызовы методов из MEMOIZED_METHODS с теми же аргументами
+    возвращают результат первого вызова. Любой изменяющий метод
+    (не начинающийся с READ_PREFIXES) очищает memo, поэтому после записи
+    в том же апдейте данные снова читаются из базы. Остальные атрибуты
+    (Session, engine, run, ...) отдаются без изменений.
+    """
+
+    def __init__(self, db):
+        self._db = db
+        self._memo = {}
+        self.queries_saved = 0
+
+    def __getattr__(self, name):
+        attr = getattr(self._db, name)
+        if name.startswith('_') or not inspect.ismethod(attr) or inspect.iscoroutinefunction(attr):
+            return attr
+        if name in MEMOIZED_METHODS:
+            return functools.partial(self._call_memoized, name, attr)
+        if name.startswith(READ_PREFIXES):
+            return attr
+        return functools.partial(self._call_mutating, attr)
+
+    def _call_memoized(self, name, method, *args, **kwargs):
+        try:
+            key = (name, args, tuple(sorted(kwargs.items())))
+            hash(key)
+        except TypeError:
+            return method(*args, **kwargs)
+        if key in self._memo:
+            self.queries_saved += 1
+            return self._memo[key]
+        result = method(*args, **kwargs)
+        self._memo[key] = result
+        return result
+
+    def _call_mutating(self, method, *args, **kwargs):
+        try:
+            return method(*args, **kwargs)
+        finally:
+            self._memo.clear()
+
+class BotContext(CallbackContext):
+    """CallbackContext бота: PTB создаёт его заново на каждый апдейт и запуск задачи,
+    поэтому context.db живёт ровно столько, сколько обрабатывается апдейт."""
+
+    @property
+    def db(self) -> RequestScopedDatabase:
+        """Database с memo на время текущего апдейта"""
+        scoped_db = self.__dict__.get('_scoped_db')
+        if scoped_db is None:
+            scoped_db = RequestScopedDatabase(self.bot_data['db'])
+            self.__dict__['_scoped_db'] = scoped_db
+        return scoped_db
+
+    @property
+    def queries_saved(self) -> int:
+        """Сколько запросов к базе сэкономил memo в текущем апдейте"""
+        scoped_db = self.__dict__.get('_scoped_db')
+        return scoped_db.queries_saved if scoped_db else 0
@@ -0,0 +1,93 @@
+from collections import OrderedDict
+import os
+import threading
+import time
+
+# Настройки кэша доступных слотов
+SLOT_CACHE_SIZE = int(os.getenv("SLOT_CACHE_SIZE", "256"))
+SLOT_CACHE_TTL = float(os.getenv("SLOT_CACHE_TTL", "300"))  # секунды, как и кэш iCal
+
+class SlotCache:
+    """Ограниченный LRU-кэш доступных слотов с временем жизни записей.
+
+    Ключ строит Database: дата, длительность и версии настроек, расписания
+    и календаря. Изменение расписания повышает schedule_version и очищает
+    кэш, изменение настроек или обновление календаря меняет свою версию,
+    поэтому устаревшая запись не может быть найдена по новому ключу.
+    """
+
+    def __init__(self, maxsize: int = SLOT_CACHE_SIZE, ttl: float = SLOT_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # ключ -> (слоты, expires_at)
+        self._schedule_version = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._invalidations = 0
+
+    @property
+    def schedule_version(self) -> int:
+        return self._schedule_version
+
+    def get(self, key):
+        """Возвращает слоты по ключу или None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.monotonic() >= entry[1]:
+                if entry is not None:
+                    del self._entries[key]
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry[0]
+
+    def put(self, key, slots: list):
+        with self._lock:
+            self._entries[key] = (slots, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def bump_schedule_version(self):
+        """Отмечает изменение расписания: новая версия и очистка кэша"""
+        with self._lock:
+            self._schedule_version += 1
+            self._entries.clear()
+            self._invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._invalidations += 1
+
+    def get_stats(self) -> dict:
+        """Возвращает размер кэша, попадания, промахи, вытеснения и долю попаданий"""
+        with self._lock:
+            total = self._hits + self._misses
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'hits': self._hits,
+                'misses': self._misses,
+                'evictions': self._evictions,
+                'invalidations': self._invalidations,
+                'hit_rate': self._hits / total if total else 0.0,
+                'schedule_version': self._schedule_version,
+            }
+
+# Общий кэш слотов для всего процесса
+_slot_cache = None
+_slot_cache_lock = threading.Lock()
+
+def get_slot_cache() -> SlotCache:
+    """Возвращает общий кэш доступных слотов (создается один раз)"""
+    global _slot_cache
+    if _slot_cache is None:
+        with _slot_cache_lock:
+            if _slot_cache is None:
+                _slot_cache = SlotCache()
+    return _slot_cache
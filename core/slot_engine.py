@@ -0,0 +1,81 @@
+"""Расчёт свободных слотов дня одним проходом по отсортированным занятым интервалам.
+
+Все времена — минуты от полуночи (float для событий календаря с секундами).
+Интервалы полуоткрытые [start, end): слот пересекается с занятым временем,
+если slot_start < busy_end и slot_end > busy_start — как и в прежних проверках
+is_slot_available / ICalCalendarSync.is_time_busy.
+"""
+
+MINUTES_PER_DAY = 24 * 60
+
+def time_to_minutes(value) -> float:
+    """'10:30' или datetime.time -> минуты от полуночи"""
+    if isinstance(value, str):
+        hours, minutes = value.split(':')
+        return int(hours) * 60 + int(minutes)
+    return value.hour * 60 + value.minute + value.second / 60
+
+def minutes_to_str(minutes: int) -> str:
+    """630 -> '10:30'"""
+    return f"{int(minutes) // 60 % 24:02d}:{int(minutes) % 60:02d}"
+
+def lesson_intervals(lessons) -> list:
+    """Интервалы занятий из пар (время 'HH:MM', длительность в минутах)"""
+    intervals = []
+    for time, duration in lessons:
+        start = time_to_minutes(time)
+        intervals.append((start, start + duration))
+    return intervals
+
+def calendar_intervals(busy_times) -> list:
+    """Интервалы из ICalCalendarSync.get_busy_times (словари со start/end типа time)"""
+    intervals = []
+    for busy in busy_times:
+        start = time_to_minutes(busy['start'])
+        end = time_to_minutes(busy['end'])
+        # Пустые и переходящие через полночь интервалы не пересекаются ни с одним слотом дня
+        if end > start:
+            intervals.append((start, end))
+    return intervals
+
+def merge_intervals(intervals) -> list:
+    """Сортирует и объединяет пересекающиеся и смежные интервалы"""
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1][1] = end
+        else:
+            merged.append([start, end])
+    return [(start, end) for start, end in merged]
+
+def free_slots(start: int, end: int, duration: int, interval: int, busy) -> list:
+    """Свободные слоты длительностью duration с шагом interval внутри [start, end).
+
+    busy — отсортированный список непересекающихся интервалов (merge_intervals).
+    Время слота только растёт, поэтому указатель по busy движется вперёд:
+    O(слоты + интервалы) вместо проверки каждого слота по всем занятиям.
+    """
+    slots = []
+    if interval <= 0 or duration <= 0:
+        return slots
+    end = min(end, MINUTES_PER_DAY)
+    i = 0
+    current = start
+    while current < end:
+        slot_end = current + duration
+        if slot_end > end:
+            break
+        # Пропускаем интервалы, закончившиеся до начала слота
+        while i < len(busy) and busy[i][1] <= current:
+            i += 1
+        if i == len(busy) or busy[i][0] >= slot_end:
+            slots.append(format_slot(current, slot_end))
+        current += interval
+    return slots
+
+def format_slot(start: int, end: int) -> dict:
+    """Слот в формате, который ожидают обработчики"""
+    start_str = minutes_to_str(start)
+    end_str = minutes_to_str(end)
+    return {'time': start_str, 'end_time': end_str, 'display': f"{start_str}-{end_str}"}
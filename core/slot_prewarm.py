@@ -0,0 +1,115 @@
+from datetime import datetime, timedelta
+import os
+import threading
+import time
+
+from .slot_cache import get_slot_cache
+
+# Полный прогрев не реже, чем раз в SLOT_PREWARM_INTERVAL секунд (меньше SLOT_CACHE_TTL,
+# чтобы записи не успевали устареть), проверка изменений — каждые SLOT_PREWARM_CHECK_INTERVAL
+SLOT_PREWARM_INTERVAL = float(os.getenv("SLOT_PREWARM_INTERVAL", "240"))
+SLOT_PREWARM_CHECK_INTERVAL = float(os.getenv("SLOT_PREWARM_CHECK_INTERVAL", "30"))
+# Сколько недель прогревать: выбор переноса у студента предлагает только текущую
+# и следующую неделю (reschedule_week_0 и reschedule_week_1)
+SLOT_PREWARM_WEEKS = int(os.getenv("SLOT_PREWARM_WEEKS", "2"))
+
+class SlotPrewarmer:
+    """Фоновый прогрев кэша доступных слотов на недели, которые предлагает выбор переноса.
+
+    Для каждой длительности активных занятий и каждой недели из первых
+    SLOT_PREWARM_WEEKS (не дальше RescheduleSettings.max_weeks_ahead и не больше,
+    чем помещается в кэш слотов: длительности × недели × 7 дней) считает слоты через
+    get_available_slots_for_week, поэтому нажатия студентов в выборе переноса
+    попадают в кэш. Задача JobQueue раз в check_interval сравнивает версии
+    настроек, расписания и календаря (без запросов к базе) и прогревает кэш
+    заново, если что-то изменилось или с прошлого прогрева прошло interval секунд.
+    Сам расчёт выполняется в пуле потоков Database, не блокируя цикл событий.
+    """
+
+    def __init__(self, interval: float = SLOT_PREWARM_INTERVAL, check_interval: float = SLOT_PREWARM_CHECK_INTERVAL):
+        self.interval = interval
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._running = False
+        self._fingerprint = None
+        self._last_run = None
+        self._runs = 0
+        self._last_stats = {}
+
+    def _current_fingerprint(self, db) -> tuple:
+        # Дата входит в отпечаток: с началом нового дня меняется текущая неделя
+        return db.get_slot_sources_version() + (datetime.now().date(),)
+
+    def is_due(self, db) -> bool:
+        """Нужен ли прогрев: изменились источники слотов или истёк интервал"""
+        if self._last_run is None or time.monotonic() - self._last_run >= self.interval:
+            return True
+        return self._current_fingerprint(db) != self._fingerprint
+
+    def prewarm(self, db) -> dict:
+        """Считает слоты предлагаемых недель для всех длительностей занятий (синхронно)"""
+        started = time.perf_counter()
+        settings = db.get_reschedule_settings()
+        durations = db.get_active_lesson_durations()
+        weeks = min(max(settings.max_weeks_ahead or 0, 1), SLOT_PREWARM_WEEKS)
+        # Каждый день каждой длительности — отдельная запись кэша; прогрев не должен
+        # вытеснять собственные записи
+        weeks = max(min(weeks, get_slot_cache().maxsize // (7 * max(len(durations), 1))), 1)
+        today = datetime.now().date()
+        first_week = datetime.combine(today - timedelta(days=today.weekday()), datetime.min.time())
+        days_with_slots = 0
+        for duration in durations:
+            for week in range(weeks):
+                week_slots = db.get_available_slots_for_week(first_week + timedelta(weeks=week), duration)
+                days_with_slots += sum(1 for slots in week_slots.values() if slots)
+        # Отпечаток берём после расчёта: загрузка календаря во время прогрева меняет его версию
+        self._fingerprint = self._current_fingerprint(db)
+        self._last_run = time.monotonic()
+        self._runs += 1
+        self._last_stats = {
+            'durations': durations,
+            'weeks': weeks,
+            'days_with_slots': days_with_slots,
+            'elapsed': time.perf_counter() - started,
+        }
+        return self._last_stats
+
+    async def job(self, context):
+        """Задача JobQueue: прогревает кэш, если это нужно"""
+        db = context.bot_data['db']
+        with self._lock:
+            if self._running:
+                return
+            self._running = True
+        try:
+            if not self.is_due(db):
+                return
+            stats = await db.run(self.prewarm, db)
+            print(f"[slots] Прогрев: длительности {stats['durations']}, недель {stats['weeks']}, "
+                  f"дней со слотами {stats['days_with_slots']}, {stats['elapsed'] * 1000:.0f} мс")
+        except Exception as e:
+            print(f"[slots] Ошибка прогрева слотов: {e}")
+        finally:
+            with self._lock:
+                self._running = False
+
+    def start(self, job_queue):
+        """Регистрирует периодическую задачу прогрева (первый прогрев сразу после запуска)"""
+        return job_queue.run_repeating(self.job, interval=self.check_interval, first=1, name='slot_prewarm')
+
+    def get_stats(self) -> dict:
+        """Возвращает число прогревов и результат последнего"""
+        return {'runs': self._runs, 'running': self._running, **self._last_stats}
+
+# Общий прогреватель для всего процесса
+_slot_prewarmer = None
+_slot_prewarmer_lock = threading.Lock()
+
+def get_slot_prewarmer() -> SlotPrewarmer:
+    """Возвращает общий прогреватель слотов (создается один раз)"""
+    global _slot_prewarmer
+    if _slot_prewarmer is None:
+        with _slot_prewarmer_lock:
+            if _slot_prewarmer is None:
+                _slot_prewarmer = SlotPrewarmer()
+    return _slot_prewarmer
@@ -0,0 +1,141 @@
+from collections import OrderedDict
+import os
+import threading
+import time
+
+# Настройки кэша студентов
+STUDENT_CACHE_SIZE = int(os.getenv("STUDENT_CACHE_SIZE", "512"))
+STUDENT_CACHE_TTL = float(os.getenv("STUDENT_CACHE_TTL", "300"))  # секунды
+
+class StudentCache:
+    """LRU-кэш записей студентов с ограничением по времени жизни.
+
+    Записи хранятся по id студента, дополнительный словарь сопоставляет
+    telegram_id с id. В кэш попадают отсоединённые от сессии объекты Student,
+    которые возвращают get_student_by_id / get_student_by_telegram_id;
+    методы Database, изменяющие студента, сбрасывают его запись.
+
+    Любое изменение кэша (invalidate, patch, clear) увеличивает поколение.
+    При промахе читатель берёт generation() до запроса к базе и передаёт его
+    в put(): если запись успели сбросить, прочитанная строка уже могла
+    устареть и в кэш не попадает.
+    """
+
+    def __init__(self, maxsize: int = STUDENT_CACHE_SIZE, ttl: float = STUDENT_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._by_id = OrderedDict()  # student_id -> (student, expires_at)
+        self._by_telegram_id = {}  # telegram_id -> student_id
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._generation = 0
+
+    def get_by_id(self, student_id: int):
+        with self._lock:
+            return self._get_locked(student_id)
+
+    def get_by_telegram_id(self, telegram_id: int):
+        with self._lock:
+            student_id = self._by_telegram_id.get(telegram_id)
+            if student_id is None:
+                self._misses += 1
+                return None
+            return self._get_locked(student_id)
+
+    def generation(self) -> int:
+        """Возвращает поколение кэша; берётся до чтения студента из базы"""
+        with self._lock:
+            return self._generation
+
+    def put(self, student, generation: int = None):
+        """Кладёт студента в кэш (None не кэшируется).
+        Если передан generation и кэш с тех пор менялся, запись не сохраняется."""
+        if student is None:
+            return
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            self._remove_locked(student.id)
+            self._by_id[student.id] = (student, time.monotonic() + self.ttl)
+            if student.telegram_id is not None:
+                self._by_telegram_id[student.telegram_id] = student.id
+            while len(self._by_id) > self.maxsize:
+                oldest_id = next(iter(self._by_id))
+                self._remove_locked(oldest_id)
+                self._evictions += 1
+
+    def patch(self, student_id: int, **values):
+        """Обновляет поля закэшированного студента без сброса записи"""
+        with self._lock:
+            self._generation += 1
+            entry = self._by_id.get(student_id)
+            if entry is not None:
+                for name, value in values.items():
+                    setattr(entry[0], name, value)
+
+    def invalidate(self, student_id: int = None, telegram_id: int = None):
+        """Сбрасывает запись по id и/или telegram_id"""
+        with self._lock:
+            self._generation += 1
+            if telegram_id is not None:
+                mapped_id = self._by_telegram_id.get(telegram_id)
+                if mapped_id is not None:
+                    self._remove_locked(mapped_id)
+            if student_id is not None:
+                self._remove_locked(student_id)
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._by_id.clear()
+            self._by_telegram_id.clear()
+
+    def get_stats(self) -> dict:
+        """Возвращает размер кэша, попадания, промахи и вытеснения"""
+        with self._lock:
+            total = self._hits + self._misses
+            return {
+                'size': len(self._by_id),
+                'maxsize': self.maxsize,
+                'hits': self._hits,
+                'misses': self._misses,
+                'evictions': self._evictions,
+                'hit_rate': self._hits / total if total else 0.0,
+            }
+
+    def _get_locked(self, student_id):
+        entry = self._by_id.get(student_id)
+        if entry is None:
+            self._misses += 1
+            return None
+        student, expires_at = entry
+        if time.monotonic() >= expires_at:
+            self._remove_locked(student_id)
+            self._misses += 1
+            return None
+        self._by_id.move_to_end(student_id)
+        self._hits += 1
+        return student
+
+    def _remove_locked(self, student_id):
+        entry = self._by_id.pop(student_id, None)
+        if entry is None:
+            return
+        telegram_id = entry[0].telegram_id
+        if telegram_id is not None and self._by_telegram_id.get(telegram_id) == student_id:
+            del self._by_telegram_id[telegram_id]
+
+# Общий кэш студентов для всего процесса
+_student_cache = None
+_student_cache_lock = threading.Lock()
+
+def get_student_cache() -> StudentCache:
+    """Возвращает общий кэш студентов (создается один раз)"""
+    global _student_cache
+    if _student_cache is None:
+        with _student_cache_lock:
+            if _student_cache is None:
+                _student_cache = StudentCache()
+    return _student_cache
@@ -1,12 +1,14 @@
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes, ConversationHandler, CommandHandler, CallbackQueryHandler, MessageHandler, filters
-from core.database import Database, ExamType, PendingNoteAssignment, Schedule, Homework
+from core.database import ExamType, PendingNoteAssignment, Schedule, Homework
 from handlers.student_handlers import THEME_EMOJIS, THEME_NAMES
+from core.broadcast import get_broadcast_engine
+from core.reminder_dispatcher import get_reminder_dispatcher
 import os
 import uuid
 import json
 import asyncio
-from datetime import datetime, timedelta
+from datetime import datetime
 import pytz
 import logging
 from sqlalchemy.exc import IntegrityError
@@ -58,12 +60,12 @@ def convert_status_from_db(status):
 
 async def admin_menu(update: Update, context: ContextTypes.DEFAULT_TYPE = None) -> int:
     # Получаем количество непрочитанных уведомлений для админа
-    db = context.bot_data['db']
+    db = context.db
     user_id = update.effective_user.id if hasattr(update, 'effective_user') else update.callback_query.from_user.id
     admin = db.get_admin_by_telegram_id(user_id)
     unread_count = 0
     if admin:
-        unread_count = len(db.get_admin_notifications(admin.id, only_unread=True))
+        unread_count = db.count_unread_admin_notifications(admin.id)
     
     notif_text = f"🔔 Уведомления ({unread_count})" if unread_count else "🔔 Уведомления"
     
@@ -156,7 +158,7 @@ async def start_add_student(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await query.answer()
     
     user_id = query.from_user.id
-    if not context.bot_data['db'].is_admin(user_id):
+    if not context.db.is_admin(user_id):
         await query.message.reply_text("⚠️ У вас нет прав для выполнения этой команды")
         return ConversationHandler.END
     
@@ -242,7 +244,7 @@ async def enter_link(update: Update, context: ContextTypes.DEFAULT_TYPE):
     
     try:
         # Создаем студента со всеми данными
-        student_data_dict = context.bot_data['db'].create_student(
+        student_data_dict = context.db.create_student(
             name=student_info["name"],
             exam_type=student_info["exam_type"],
             lesson_link=link
@@ -311,7 +313,7 @@ async def handle_admin_actions(update: Update, context: ContextTypes.DEFAULT_TYP
             task_num = task_num.strip('"')
         status = "_".join(parts[6:])
         logging.warning(f"[handle_admin_actions] student_id: {student_id}, task_num: {task_num}, status: {status}")
-        db = context.bot_data['db']
+        db = context.db
         student = db.get_student_by_id(student_id)
         status_map = {
             "completed": "completed",
@@ -409,7 +411,7 @@ async def handle_admin_actions(update: Update, context: ContextTypes.DEFAULT_TYP
         if len(parts) > 4 and parts[4] == "page":
             page = int(parts[5])
         logging.warning(f"[handle_admin_actions] student_id: {student_id}, page: {page}")
-        db = context.bot_data['db']
+        db = context.db
         student = db.get_student_by_id(student_id)
         if not student:
             await query.message.edit_text("❌ Студент не найден!", reply_markup=InlineKeyboardMarkup([[InlineKeyboardButton("🔙 Назад", callback_data="admin_edit")]]))
@@ -581,7 +583,7 @@ async def handle_admin_actions(update: Update, context: ContextTypes.DEFAULT_TYP
         student_id = int(query.data.split("_")[-1])
         temp_data[update.effective_user.id] = {"student_id": student_id}
         
-        db = context.bot_data['db']
+        db = context.db
         student = db.get_student_by_id(student_id)
         
         await query.edit_message_text(
@@ -596,7 +598,7 @@ async def handle_admin_actions(update: Update, context: ContextTypes.DEFAULT_TYP
         student_id = int(query.data.split("_")[-1])
         temp_data[update.effective_user.id] = {"student_id": student_id}
         
-        db = context.bot_data['db']
+        db = context.db
         student = db.get_student_by_id(student_id)
         
         await query.edit_message_text(
@@ -607,7 +609,7 @@ async def handle_admin_actions(update: Update, context: ContextTypes.DEFAULT_TYP
         )
         return EDIT_STUDENT_LINK
 
-    if not context.bot_data['db'].is_admin(query.from_user.id):
+    if not context.db.is_admin(query.from_user.id):
         await query.message.edit_text("⚠️ У вас нет прав для выполнения этой команды")
         return ConversationHandler.END
 
@@ -663,7 +665,7 @@ async def handle_admin_actions(update: Update, context: ContextTypes.DEFAULT_TYP
         return ConversationHandler.END
     elif query.data.startswith("info_type_"):
         exam_type = query.data.split("_")[2]
-        students = context.bot_data['db'].get_students_by_exam_type(ExamType[exam_type])
+        students = context.db.get_students_by_exam_type(ExamType[exam_type])
         
         if not students:
             keyboard = [[InlineKeyboardButton("🔙 Назад", callback_data="admin_students_info")]]
@@ -698,7 +700,7 @@ async def handle_admin_actions(update: Update, context: ContextTypes.DEFAULT_TYP
         
     elif query.data.startswith("student_info_"):
         student_id = int(query.data.split("_")[2])
-        student = context.bot_data['db'].get_student_by_id(student_id)
+        student = context.db.get_student_by_id(student_id)
         
         if not student:
             keyboard = [[InlineKeyboardButton("🔙 Назад", callback_data="admin_students_info")]]
@@ -723,7 +725,7 @@ async def handle_admin_actions(update: Update, context: ContextTypes.DEFAULT_TYP
         description = getattr(student, 'description', None) or '—'
 
         # Получаем актуальное домашнее задание
-        db = context.bot_data['db']
+        db = context.db
         homeworks = db.get_homeworks_for_student_with_filter(student.id)
         if homeworks:
             hw = homeworks[-1][0]
@@ -754,7 +756,7 @@ async def handle_admin_actions(update: Update, context: ContextTypes.DEFAULT_TYP
         return ConversationHandler.END
     elif query.data.startswith("delete_type_"):
         exam_type = query.data.split("_")[2]
-        students = context.bot_data['db'].get_students_by_exam_type(ExamType[exam_type])
+        students = context.db.get_students_by_exam_type(ExamType[exam_type])
         
         if not students:
             keyboard = [[InlineKeyboardButton("🔙 Назад", callback_data="admin_delete")]]
@@ -809,9 +811,9 @@ async def handle_admin_actions(update: Update, context: ContextTypes.DEFAULT_TYP
         # Проверяем, является ли это удалением заметки
         if query.data.startswith("delete_note_"):
             student_id = int(query.data.split("_")[2])
-            student = context.bot_data['db'].get_student_by_id(student_id)
+            student = context.db.get_student_by_id(student_id)
             if student:
-                if context.bot_data['db'].delete_student_note(student_id):
+                if context.db.delete_student_note(student_id):
                     await query.answer("✅ Заметка успешно удалена!")
                 else:
                     await query.answer("❌ Ошибка при удалении заметки")
@@ -838,7 +840,7 @@ async def handle_admin_actions(update: Update, context: ContextTypes.DEFAULT_TYP
         
         # Обработка удаления студента
         student_id = int(query.data.split("_")[1])
-        student = context.bot_data['db'].get_student_by_id(student_id)
+        student = context.db.get_student_by_id(student_id)
         if student:
             delete_data[query.from_user.id] = {"student_id": student_id, "exam_type": student.exam_type}
             keyboard = [
@@ -861,7 +863,7 @@ async def handle_admin_actions(update: Update, context: ContextTypes.DEFAULT_TYP
     elif query.data == "confirm_delete":
         if query.from_user.id in delete_data:
             student_id = delete_data[query.from_user.id]["student_id"]
-            context.bot_data['db'].delete_student(student_id)
+            context.db.delete_student(student_id)
             del delete_data[query.from_user.id]
             await query.answer("✅ Студент успешно удален!")
         await admin_menu(update, context)
@@ -903,7 +905,7 @@ async def handle_admin_actions(update: Update, context: ContextTypes.DEFAULT_TYP
 
     elif query.data.startswith("edit_type_"):
         exam_type = query.data.split("_")[2]
-        students = context.bot_data['db'].get_students_by_exam_type(ExamType[exam_type])
+        students = context.db.get_students_by_exam_type(ExamType[exam_type])
         
         if not students:
             keyboard = [[InlineKeyboardButton("🔙 Назад", callback_data="admin_edit")]]
@@ -938,7 +940,7 @@ async def handle_admin_actions(update: Update, context: ContextTypes.DEFAULT_TYP
 
     elif query.data.startswith("edit_student_"):
         student_id = int(query.data.split("_")[2])
-        student = context.bot_data['db'].get_student_by_id(student_id)
+        student = context.db.get_student_by_id(student_id)
         
         if not student:
             keyboard = [[InlineKeyboardButton("🔙 Назад", callback_data="admin_edit")]]
@@ -980,7 +982,7 @@ async def handle_admin_actions(update: Update, context: ContextTypes.DEFAULT_TYP
 
     elif query.data.startswith("edit_exam_"):
         student_id = int(query.data.split("_")[2])
-        student = context.bot_data['db'].get_student_by_id(student_id)
+        student = context.db.get_student_by_id(student_id)
         if student:
             edit_data[query.from_user.id] = {"student_id": student_id, "type": "exam"}
             await show_exam_buttons_edit(update, student_id)
@@ -990,7 +992,7 @@ async def handle_admin_actions(update: Update, context: ContextTypes.DEFAULT_TYP
 
     elif query.data.startswith("add_note_"):
         student_id = int(query.data.split("_")[2])
-        student = context.bot_data['db'].get_student_by_id(student_id)
+        student = context.db.get_student_by_id(student_id)
         if student:
             edit_data[query.from_user.id] = {"student_id": student_id, "type": "note"}
             await query.message.edit_text(
@@ -1002,9 +1004,9 @@ async def handle_admin_actions(update: Update, context: ContextTypes.DEFAULT_TYP
 
     elif query.data.startswith("delete_note_"):
         student_id = int(query.data.split("_")[2])
-        student = context.bot_data['db'].get_student_by_id(student_id)
+        student = context.db.get_student_by_id(student_id)
         if student:
-            if context.bot_data['db'].delete_student_note(student_id):
+            if context.db.delete_student_note(student_id):
                 await query.answer("✅ Заметка успешно удалена!")
             else:
                 await query.answer("❌ Ошибка при удалении заметки")
@@ -1032,13 +1034,12 @@ async def handle_admin_actions(update: Update, context: ContextTypes.DEFAULT_TYP
     # Обработчики для конспектов
     elif query.data.startswith("assign_unassigned_note_"):
         note_id = int(query.data.split("_")[-1])
-        db = context.bot_data['db']
+        db = context.db
         note = db.get_note_by_id(note_id)
         if not note:
             await query.edit_message_text("❌ Конспект не найден.", reply_markup=InlineKeyboardMarkup([[InlineKeyboardButton("🔙 Назад", callback_data="admin_check_unassigned_notes")]]))
             return ConversationHandler.END
-        matching_students = db.get_students_with_matching_homework(note)
-        unassigned_students = [s for s in matching_students if not db.is_note_assigned_to_student(s.id, note.id)]
+        unassigned_students = db.get_unassigned_students_for_note(note)
         if not unassigned_students:
             await query.edit_message_text("❌ Нет учеников для выдачи этого конспекта.", reply_markup=InlineKeyboardMarkup([[InlineKeyboardButton("🔙 Назад", callback_data="admin_check_unassigned_notes")]]))
             return ConversationHandler.END
@@ -1079,7 +1080,7 @@ async def handle_admin_actions(update: Update, context: ContextTypes.DEFAULT_TYP
         process_id = parts[-2]
         student_id = int(parts[-1])
         user_id = update.effective_user.id
-        db = context.bot_data['db']
+        db = context.db
         db.update_pending_note_assignment(process_id, student_id=student_id, step='choose_note')
         pending = db.get_pending_note_assignment_by_process(process_id)
         note_id = pending.note_id
@@ -1111,7 +1112,7 @@ async def handle_admin_actions(update: Update, context: ContextTypes.DEFAULT_TYP
         note_id = int(parts[2])
         process_id = parts[3]
         user_id = update.effective_user.id
-        db = context.bot_data['db']
+        db = context.db
         pending = db.get_pending_note_assignment_by_process(process_id)
         if pending:
             student_id = pending.student_id
@@ -1131,7 +1132,7 @@ async def handle_admin_actions(update: Update, context: ContextTypes.DEFAULT_TYP
     elif query.data.startswith("manual_select_notes_"):
         process_id = query.data.split("_")[-1]
         user_id = update.effective_user.id
-        db = context.bot_data['db']
+        db = context.db
         pending = db.get_pending_note_assignment_by_process(process_id)
         if not pending:
             await query.edit_message_text("❌ Ошибка: данные не найдены. Начните процесс заново.", reply_markup=InlineKeyboardMarkup([[InlineKeyboardButton("🔙 Назад", callback_data="admin_check_unassigned_notes")]]))
@@ -1163,7 +1164,7 @@ async def handle_admin_actions(update: Update, context: ContextTypes.DEFAULT_TYP
     elif query.data.startswith("skip_note_assignment_"):
         process_id = query.data.split("_")[-1]
         user_id = update.effective_user.id
-        db = context.bot_data['db']
+        db = context.db
         pending = db.get_pending_note_assignment_by_process(process_id)
         db.delete_pending_note_assignment_by_process(process_id)
         # Всегда возвращаем в главное меню ученика
@@ -1176,7 +1177,7 @@ async def handle_admin_actions(update: Update, context: ContextTypes.DEFAULT_TYP
         homework_id = int(parts[3])
         student_id = int(parts[4])
         user_id = update.effective_user.id
-        db = context.bot_data['db']
+        db = context.db
         process_id = str(uuid.uuid4())
         db.add_pending_note_assignment_with_process(process_id, user_id, student_id=student_id, step='choose_note')
         exam_type = db.get_student_by_id(student_id).exam_type
@@ -1215,7 +1216,7 @@ async def handle_edit_name(update: Update, context: ContextTypes.DEFAULT_TYPE) -
     student_id = temp_data[user_id]["student_id"]
     new_name = update.message.text
     
-    db = context.bot_data['db']
+    db = context.db
     db.update_student_name(student_id, new_name)
     
     await update.message.reply_text(
@@ -1249,7 +1250,7 @@ async def handle_edit_link(update: Update, context: ContextTypes.DEFAULT_TYPE) -
         )
         return EDIT_STUDENT_LINK
     
-    db = context.bot_data['db']
+    db = context.db
     db.update_student_link(student_id, new_link)
     
     await update.message.reply_text(
@@ -1270,7 +1271,7 @@ async def handle_add_note(update: Update, context: ContextTypes.DEFAULT_TYPE):
         
     note_text = update.message.text
     student_id = edit_data[user_id]["student_id"]
-    context.bot_data['db'].add_student_note(student_id, note_text)
+    context.db.add_student_note(student_id, note_text)
     
     await update.message.reply_text("✅ Заметка успешно добавлена!")
     del edit_data[user_id]
@@ -1315,8 +1316,8 @@ async def handle_edit_exam(update: Update, context: ContextTypes.DEFAULT_TYPE) -
     student_id = edit_data[user_id]["student_id"]
     
     try:
-        old_exam_type = context.bot_data['db'].get_student_by_id(student_id).exam_type
-        context.bot_data['db'].update_student_exam_type(student_id, ExamType[exam_type])
+        old_exam_type = context.db.get_student_by_id(student_id).exam_type
+        context.db.update_student_exam_type(student_id, ExamType[exam_type])
         
         # Формируем сообщение в зависимости от того, изменился ли тип экзамена
         if old_exam_type != ExamType[exam_type]:
@@ -1398,27 +1399,69 @@ async def handle_give_variant_enter_link(update: Update, context: ContextTypes.D
         return GIVE_VARIANT_ENTER_LINK
     
     exam_type = give_variant_temp[user_id]["exam_type"]
-    db = context.bot_data['db']
+    db = context.db
     db.add_variant(ExamType[exam_type], link)
     # Рассылаем всем ученикам этого экзамена уведомление и меню
-    students = db.get_students_by_exam_type(ExamType[exam_type])
-    for student in students:
-        if student.telegram_id:
-            db.add_notification(student.id, 'variant', "Актуальный вариант!", link)
-            msg = await context.bot.send_message(
-                chat_id=student.telegram_id,
-                text="🔔 У вас новое уведомление! Откройте меню 'Уведомления'."
-            )
-            db.add_push_message(student.id, msg.message_id)
-            # После push отправляем меню корректно по chat_id
-            await send_student_menu_by_chat_id(context, student.telegram_id)
+    students = [student for student in db.get_students_by_exam_type(ExamType[exam_type]) if student.telegram_id]
+    # Уведомления всей рассылки пишем одной транзакцией
+    db.add_notifications_bulk([(student.id, 'variant', "Актуальный вариант!", link) for student in students])
     await update.message.reply_text(
         "✅ Вариант успешно выдан всем ученикам этого экзамена!",
         reply_markup=InlineKeyboardMarkup([[InlineKeyboardButton("🔙 Назад", callback_data="admin_give_homework")]])
     )
+    # Рассылка push и меню идёт в фоне, диалог админа завершается сразу
+    status_message = await update.message.reply_text(f"📤 Рассылка ученикам: 0/{len(students)}")
+    context.application.create_task(
+        broadcast_to_students(context, students, "🔔 У вас новое уведомление! Откройте меню 'Уведомления'.", status_message),
+        update=update
+    )
     give_variant_temp.pop(user_id, None)
     return ConversationHandler.END
 
+async def broadcast_to_students(context: ContextTypes.DEFAULT_TYPE, students, text: str, status_message=None, send_menu: bool = True) -> dict:
+    """Рассылает студентам push (и меню) через общий движок рассылок с учётом лимитов Telegram.
+    Прогресс и итог показываются в status_message."""
+    db = context.db
+    push_messages = []
+
+    def make_steps(student):
+        async def send_push():
+            msg = await context.bot.send_message(chat_id=student.telegram_id, text=text)
+            push_messages.append((student.id, msg.message_id))
+
+        async def send_menu_step():
+            # После push отправляем меню корректно по chat_id
+            await send_student_menu_by_chat_id(context, student.telegram_id)
+
+        return [send_push, send_menu_step] if send_menu else [send_push]
+
+    async def report_progress(stats):
+        if status_message:
+            await status_message.edit_text(
+                f"📤 Рассылка ученикам: {stats['done']}/{stats['total']}"
+                + (f" (ошибок: {stats['failed']})" if stats['failed'] else "")
+            )
+
+    try:
+        stats = await get_broadcast_engine().run(
+            [(student.telegram_id, make_steps(student)) for student in students],
+            on_progress=report_progress
+        )
+    finally:
+        # Сохраняем отправленные push-сообщения одной транзакцией, даже если рассылка прервалась
+        db.add_push_messages_bulk(push_messages)
+    print(f"[broadcast] Рассылка завершена: {stats}")
+    if status_message:
+        try:
+            await status_message.edit_text(
+                f"✅ Рассылка завершена: доставлено {stats['sent']} из {stats['total']}"
+                + (f", ошибок: {stats['failed']}" if stats['failed'] else "")
+                + f" ({stats['elapsed']:.0f} с)"
+            )
+        except Exception as e:
+            print(f"[broadcast] Не удалось обновить статус рассылки: {e}")
+    return stats
+
 async def give_homework_choose_exam(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     keyboard = [
         [
@@ -1439,7 +1482,7 @@ async def give_homework_choose_student(update: Update, context: ContextTypes.DEF
     exam_type = update.callback_query.data.split('_')[-1]
     user_id = update.effective_user.id
     give_homework_temp[user_id] = {"exam_type": exam_type}
-    db = Database()
+    db = context.db
     students = db.get_students_by_exam_type(ExamType[exam_type])
     if not students:
         await update.callback_query.message.edit_text(
@@ -1487,7 +1530,7 @@ async def give_homework_choose_task(update: Update, context: ContextTypes.DEFAUL
     student_id = int(update.callback_query.data.split('_')[-1])
     user_id = update.effective_user.id
     give_homework_temp[user_id]["student_id"] = student_id
-    db = Database()
+    db = context.db
     exam_type = give_homework_temp[user_id]["exam_type"]
     homeworks = db.get_homework_by_exam(exam_type)
     if not homeworks:
@@ -1516,11 +1559,13 @@ async def give_homework_assign(update: Update, context: ContextTypes.DEFAULT_TYP
     homework_id = int(update.callback_query.data.split('_')[-1])
     user_id = update.effective_user.id
     student_id = give_homework_temp[user_id]["student_id"]
-    db = Database()
+    db = context.db
+    # Выдача и уведомление — через асинхронный слой, не блокируя цикл событий
+    async_db = context.bot_data['async_db']
     
     # Проверяем, было ли задание уже назначено
-    was_assigned = db.is_homework_assigned_to_student(student_id, homework_id)
-    success = db.assign_homework_to_student(student_id, homework_id)
+    was_assigned = await async_db.is_homework_assigned_to_student(student_id, homework_id)
+    success = await async_db.assign_homework_to_student(student_id, homework_id)
     
     if success:
         student = db.get_student_by_id(student_id)
@@ -1537,15 +1582,15 @@ async def give_homework_assign(update: Update, context: ContextTypes.DEFAULT_TYP
         # Добавляем уведомление в БД
         if student:
             notif_text = f"Новое домашнее задание: {homework.title}" if homework else "Новое домашнее задание!"
-            db.add_notification(student.id, 'homework', notif_text, homework.link if homework else None)
+            await async_db.add_notification(student.id, 'homework', notif_text, homework.link if homework else None)
             # Push только если есть непрочитанные уведомления
-            if db.has_unread_notifications(student.id):
+            if await async_db.has_unread_notifications(student.id):
                 try:
                     msg = await context.bot.send_message(
                         chat_id=student.telegram_id,
                         text="🔔 У вас новое уведомление! Откройте меню 'Уведомления'."
                     )
-                    db.add_push_message(student.id, msg.message_id)
+                    await async_db.add_push_message(student.id, msg.message_id)
                     # После push отправляем меню корректно по chat_id
                     await send_student_menu_by_chat_id(context, student.telegram_id)
                 except Exception as e:
@@ -1607,7 +1652,7 @@ async def give_homework_status_handler(update: Update, context: ContextTypes.DEF
         give_homework_temp.pop(user_id, None)
         return ConversationHandler.END
     
-    db = Database()
+    db = context.db
     student = db.get_student_by_id(student_id)
     homework = db.get_homework_by_id(homework_id)
     
@@ -1633,7 +1678,7 @@ async def give_homework_status_handler(update: Update, context: ContextTypes.DEF
         return ConversationHandler.END
     
     # Обновляем статус в базе данных
-    success = db.update_homework_status(student_id, homework_id, status)
+    success = await context.bot_data['async_db'].update_homework_status(student_id, homework_id, status)
     
     if success:
         # Предлагаем конспекты для выдачи (только для ОГЭ и ЕГЭ)
@@ -1651,33 +1696,12 @@ async def give_homework_status_handler(update: Update, context: ContextTypes.DEF
 
 async def suggest_notes_for_homework(update: Update, context: ContextTypes.DEFAULT_TYPE, homework, student):
     """Предлагает конспекты для выдачи после назначения домашнего задания"""
-    db = context.bot_data['db']
+    db = context.db
     process_id = str(uuid.uuid4())
     db.add_pending_note_assignment_with_process(process_id, update.effective_user.id, student_id=student.id, step='choose_note', origin='give_homework')
 
-    # Получаем конспекты того же типа экзамена
-    available_notes = db.get_notes_by_exam(homework.exam_type)
-
-    # Ищем подходящие конспекты
-    exact_matches = []
-    keyword_matches = []
-
-    for note in available_notes:
-        # Проверяем, не выдан ли уже конспект ученику
-        if db.is_note_assigned_to_student(student.id, note.id):
-            continue
-        # Проверяем точное совпадение по номеру
-        hw_number = homework.get_task_number()
-        note_number = note.get_task_number()
-        if hw_number == note_number and hw_number != float('inf'):
-            exact_matches.append(note)
-        else:
-            # Проверяем схожесть по ключевым словам
-            hw_keywords = db._extract_keywords(homework.title)
-            note_keywords = db._extract_keywords(note.title)
-            similarity = db._calculate_similarity(hw_keywords, note_keywords)
-            if similarity > 0.7:  # Порог схожести 70%
-                keyword_matches.append(note)
+    # Ищем подходящие конспекты того же типа экзамена через индекс ключевых слов
+    exact_matches, keyword_matches = db.find_notes_for_homework(homework, student.id)
 
     # Формируем клавиатуру
     keyboard = []
@@ -1724,8 +1748,9 @@ async def suggest_notes_for_homework(update: Update, context: ContextTypes.DEFAU
 
 async def check_unassigned_notes(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Проверяет невыданные конспекты и предлагает их выдать ученикам"""
-    db = context.bot_data['db']
-    unassigned = db.get_unassigned_notes_for_students()
+    db = context.db
+    # Тяжёлый подсчёт выполняем в пуле потоков, чтобы не блокировать остальных пользователей
+    unassigned = await db.run(db.get_unassigned_notes_for_students)
     
     if not unassigned:
         await update.callback_query.edit_message_text(
@@ -1761,7 +1786,7 @@ async def school_homework_choice(update: Update, context: ContextTypes.DEFAULT_T
     user_id = update.effective_user.id
     give_homework_temp[user_id]["student_id"] = student_id
     
-    db = Database()
+    db = context.db
     exam_type = give_homework_temp[user_id]["exam_type"]
     homeworks = db.get_homework_by_exam(exam_type)
     
@@ -1784,7 +1809,7 @@ async def school_homework_choice(update: Update, context: ContextTypes.DEFAULT_T
 async def school_existing_homework(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Показывает существующие задания для школьной программы"""
     user_id = update.effective_user.id
-    db = Database()
+    db = context.db
     exam_type = give_homework_temp[user_id]["exam_type"]
     homeworks = db.get_homework_by_exam(exam_type)
     
@@ -1887,7 +1912,7 @@ async def school_homework_no_file_handler(update: Update, context: ContextTypes.
 
 async def create_school_homework(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     user_id = update.effective_user.id
-    db = Database()
+    db = context.db
     title = give_homework_temp[user_id]["title"]
     link = give_homework_temp[user_id]["link"]
     file_path = give_homework_temp[user_id].get("file_path")
@@ -1897,19 +1922,20 @@ async def create_school_homework(update: Update, context: ContextTypes.DEFAULT_T
         homeworks = db.get_homework_by_exam(ExamType.SCHOOL)
         homework = next((hw for hw in homeworks if hw.title == title and hw.link == link), None)
         if homework:
-            db.assign_homework_to_student(student_id, homework.id)
+            async_db = context.bot_data['async_db']
+            await async_db.assign_homework_to_student(student_id, homework.id)
             student = db.get_student_by_id(student_id)
             
             if student:
                 notif_text = f"Новое домашнее задание: {homework.title}"
-                db.add_notification(student.id, 'homework', notif_text, homework.link)
-                if db.has_unread_notifications(student.id):
+                await async_db.add_notification(student.id, 'homework', notif_text, homework.link)
+                if await async_db.has_unread_notifications(student.id):
                     try:
                         msg = await context.bot.send_message(
                             chat_id=student.telegram_id,
                             text="🔔 У вас новое уведомление! Откройте меню 'Уведомления'."
                         )
-                        db.add_push_message(student.id, msg.message_id)
+                        await async_db.add_push_message(student.id, msg.message_id)
                         # НЕ обновляем меню для школьной программы
                         # await send_student_menu_by_chat_id(context, student.telegram_id)
                     except Exception as e:
@@ -2040,7 +2066,7 @@ async def school_note_no_file_handler(update: Update, context: ContextTypes.DEFA
 async def create_school_note(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Создает конспект для школьной программы"""
     user_id = update.effective_user.id
-    db = Database()
+    db = context.db
     
     title = give_homework_temp[user_id]["note_title"]
     link = give_homework_temp[user_id]["note_link"]
@@ -2103,7 +2129,7 @@ async def handle_statistics_exam_choice(update: Update, context: ContextTypes.DE
         return await show_statistics_menu(update, context)
     exam_type = query.data.split('_')[-1]
     context.user_data['statistics_exam'] = exam_type
-    db = context.bot_data['db']
+    db = context.db
     students = db.get_students_by_exam_type(ExamType[exam_type])
     if not students:
         keyboard = [[InlineKeyboardButton("🔙 Назад", callback_data="statistics_exam_back")]]
@@ -2129,7 +2155,7 @@ async def handle_statistics_student_choice(update: Update, context: ContextTypes
     await query.answer()
     context.user_data['statistics_menu_opened'] = True
     student_id = int(query.data.split('_')[-1]) if 'statistics_student_' in query.data else context.user_data.get('statistics_student_id')
-    db = context.bot_data['db']
+    db = context.db
     student = db.get_student_by_id(student_id)
     exam_type = context.user_data.get('statistics_exam', 'EGE')
     exam_label = 'ЕГЭ' if exam_type == 'EGE' else 'ОГЭ'
@@ -2382,7 +2408,7 @@ async def show_schedule_student_selection(update: Update, context: ContextTypes.
     query = update.callback_query
     await query.answer()
     
-    db = context.bot_data['db']
+    db = context.db
     
     # Если указан тип экзамена, фильтруем студентов
     if exam_type:
@@ -2428,7 +2454,7 @@ async def show_student_schedule(update: Update, context: ContextTypes.DEFAULT_TY
     query = update.callback_query
     await query.answer()
     
-    db = context.bot_data['db']
+    db = context.db
     student = db.get_student_by_id(student_id)
     schedules = db.get_student_schedule(student_id)
     
@@ -2560,7 +2586,7 @@ async def handle_schedule_duration(update: Update, context: ContextTypes.DEFAULT
         )
         return ConversationHandler.END
     
-    db = context.bot_data['db']
+    db = context.db
     success = db.add_schedule(student_id, day_of_week, time_str, duration)
     
     if success:
@@ -2601,7 +2627,7 @@ async def show_schedule_edit_menu(update: Update, context: ContextTypes.DEFAULT_
     query = update.callback_query
     await query.answer()
     
-    db = context.bot_data['db']
+    db = context.db
     student = db.get_student_by_id(student_id)
     schedules = db.get_student_schedule(student_id)
     
@@ -2648,7 +2674,7 @@ async def show_schedule_delete_menu(update: Update, context: ContextTypes.DEFAUL
     query = update.callback_query
     await query.answer()
     
-    db = context.bot_data['db']
+    db = context.db
     student = db.get_student_by_id(student_id)
     schedules = db.get_student_schedule(student_id)
     
@@ -2695,7 +2721,7 @@ async def show_schedule_edit_form(update: Update, context: ContextTypes.DEFAULT_
     query = update.callback_query
     await query.answer()
     
-    db = context.bot_data['db']
+    db = context.db
     session = db.Session()
     
     try:
@@ -2744,7 +2770,7 @@ async def handle_schedule_delete(update: Update, context: ContextTypes.DEFAULT_T
     query = update.callback_query
     await query.answer()
     
-    db = context.bot_data['db']
+    db = context.db
     session = db.Session()
     
     try:
@@ -2885,7 +2911,7 @@ async def handle_schedule_edit_day(update: Update, context: ContextTypes.DEFAULT
         )
         return ConversationHandler.END
     
-    db = context.bot_data['db']
+    db = context.db
     success = db.update_schedule(schedule_id, day_of_week=day_of_week)
     
     if success:
@@ -2901,7 +2927,7 @@ async def handle_schedule_edit_day(update: Update, context: ContextTypes.DEFAULT
             asyncio.create_task(send_schedule_change_notification(context, student, schedule, changed_fields=['day']))
             
             # Перепланировать напоминания для ученика
-            plan_schedule_reminders_for_student(context.job_queue, db, schedule.student_id)
+            await plan_schedule_reminders_for_student(context, schedule.student_id)
             
             await query.edit_message_text(
                 f"✅ День недели успешно изменен!\n\n"
@@ -2958,7 +2984,7 @@ async def handle_schedule_edit_time(update: Update, context: ContextTypes.DEFAUL
         )
         return ConversationHandler.END
     
-    db = context.bot_data['db']
+    db = context.db
     success = db.update_schedule(schedule_id, time=time_str)
     
     if success:
@@ -2974,7 +3000,7 @@ async def handle_schedule_edit_time(update: Update, context: ContextTypes.DEFAUL
             asyncio.create_task(send_schedule_change_notification(context, student, schedule, changed_fields=['time']))
             
             # Перепланировать напоминания для ученика
-            plan_schedule_reminders_for_student(context.job_queue, db, schedule.student_id)
+            await plan_schedule_reminders_for_student(context, schedule.student_id)
             
             await update.message.reply_text(
                 f"✅ Время успешно изменено!\n\n"
@@ -3016,7 +3042,7 @@ async def handle_schedule_edit_duration(update: Update, context: ContextTypes.DE
         )
         return ConversationHandler.END
     
-    db = context.bot_data['db']
+    db = context.db
     success = db.update_schedule(schedule_id, duration=duration)
     
     if success:
@@ -3068,8 +3094,8 @@ async def send_schedule_change_notification(context, student, schedule, changed_
     text += f"\nПожалуйста, проверьте расписание в меню."
     
     # Добавляем уведомление в базу данных
-    db = context.bot_data['db']
-    db.add_notification(student.id, 'schedule', text)
+    async_db = context.bot_data['async_db']
+    await async_db.add_notification(student.id, 'schedule', text)
     
     # Отправляем push-сообщение над меню
     try:
@@ -3077,213 +3103,194 @@ async def send_schedule_change_notification(context, student, schedule, changed_
             chat_id=student.telegram_id,
             text="🔔 У вас новое уведомление! Откройте меню 'Уведомления'."
         )
-        db.add_push_message(student.id, msg.message_id)
+        await async_db.add_push_message(student.id, msg.message_id)
         
         # Обновляем меню с новым счётчиком уведомлений
         await send_student_menu_by_chat_id(context, student.telegram_id)
     except Exception:
         pass
 
-def plan_schedule_reminders_for_student(job_queue, db, student_id, tz_str='Europe/Moscow'):
-    """Планирует напоминания за 15 минут до каждого занятия ученика на ближайшую неделю"""
-    if job_queue is None:
+async def plan_schedule_reminders_for_student(context, student_id):
+    """Перепланирует напоминания за 15 минут до каждого занятия ученика на REMINDER_PLAN_DAYS дней"""
+    if context.job_queue is None:
         print('[reminder] job_queue is None, напоминание не будет запланировано')
         return
     
-    student = db.get_student_by_id(student_id)
+    async_db = context.bot_data['async_db']
+    student = await async_db.get_student_by_id(student_id)
     if not student:
         print(f'[reminder] Студент с id={student_id} не найден')
         return
     
-    schedules = db.get_student_schedule(student_id)
-    tz = pytz.timezone(tz_str)
-    now = datetime.now(tz)
-    
-    for schedule in schedules:
-        try:
-            lesson_time = datetime.strptime(schedule.time, "%H:%M").time()
-            lesson_date = now.date()
-            lesson_datetime = datetime.combine(lesson_date, lesson_time)
-            lesson_datetime = tz.localize(lesson_datetime)
-
-            if schedule.day_of_week == now.weekday():
-                # Сегодня
-                if lesson_datetime <= now:
-                    # Время уже прошло — переносим на следующую неделю
-                    lesson_date += timedelta(days=7)
-                    lesson_datetime = datetime.combine(lesson_date, lesson_time)
-                    lesson_datetime = tz.localize(lesson_datetime)
-            elif schedule.day_of_week > now.weekday():
-                # На этой неделе, позже
-                days_ahead = schedule.day_of_week - now.weekday()
-                lesson_date += timedelta(days=days_ahead)
-                lesson_datetime = datetime.combine(lesson_date, lesson_time)
-                lesson_datetime = tz.localize(lesson_datetime)
-            else:
-                # Уже была на этой неделе — переносим на следующую
-                days_ahead = 7 - (now.weekday() - schedule.day_of_week)
-                lesson_date += timedelta(days=days_ahead)
-                lesson_datetime = datetime.combine(lesson_date, lesson_time)
-                lesson_datetime = tz.localize(lesson_datetime)
-
-            # Время напоминания (за 15 минут)
-            reminder_time = lesson_datetime - timedelta(minutes=15)
-            
-            # Проверяем, что напоминание еще не в прошлом
-            if reminder_time > now:
-                # Сохраняем напоминание в базу данных
-                success = db.add_scheduled_reminder(
-                    student_id=student_id,
-                    schedule_id=schedule.id,
-                    reminder_time=reminder_time,
-                    lesson_time=lesson_datetime
-                )
-                
-                if success:
-                    print(f'[reminder] Запланировано напоминание для student_id={student_id} на {reminder_time}')
-                    # Планируем задачу через JobQueue
-                    delay = (reminder_time - now).total_seconds()
-                    job_queue.run_once(
-                        lambda ctx: send_schedule_reminder(ctx, student_id, schedule.id),
-                        when=delay
-                    )
-                else:
-                    print(f'[reminder] Ошибка при сохранении напоминания в БД для student_id={student_id}')
-            else:
-                print(f'[reminder] Время напоминания уже прошло для student_id={student_id}, lesson_time={lesson_datetime}')
-                
-        except Exception as e:
-            print(f'[reminder] Ошибка при планировании напоминания для schedule_id={schedule.id}: {e}')
-
-async def send_schedule_reminder(context, student_id: int, schedule_id: int):
-    """Отправляет напоминание ученику о предстоящем занятии через систему уведомлений"""
-    print(f'[reminder] send_schedule_reminder вызван для student_id={student_id}, schedule_id={schedule_id}')
+    # Снимаем ранее запланированные напоминания (в базе и в диспетчере): расписание могло измениться
+    await async_db.delete_unsent_student_reminders(student_id)
     
+    # Занятия из lesson_occurrences (с учётом одобренных переносов) — одной транзакцией в пуле потоков
+    db = context.bot_data['db']
+    planned = await db.run(db.plan_reminders, student_id=student_id)
+    queue_planned_reminders(planned)
+    print(f'[reminder] Запланировано {len(planned)} напоминаний для student_id={student_id}')
+
+def queue_planned_reminders(planned):
+    """Передаёт созданные plan_reminders напоминания в общий диспетчер"""
+    dispatcher = get_reminder_dispatcher()
+    for reminder_id, student_id, schedule_id, reminder_time in planned:
+        dispatcher.add(reminder_id, student_id, schedule_id, reminder_time)
+
+async def plan_reminders_job(context):
+    """Ночное планирование напоминаний для всех студентов на REMINDER_PLAN_DAYS дней вперёд"""
+    db = context.bot_data['db']
     try:
-        db = Database()
-        student = db.get_student_by_id(student_id)
-        if not student or not student.telegram_id:
-            print(f'[reminder] Студент {student_id} не найден или не имеет telegram_id')
-            return
-        
-        schedule = db.get_schedule_by_id(schedule_id)
-        if not schedule:
-            print(f'[reminder] Расписание {schedule_id} не найдено')
-            return
-        
-        # Форматируем время занятия
-        lesson_time = datetime.strptime(schedule.time, "%H:%M").time()
-        lesson_time_str = lesson_time.strftime("%H:%M")
-        
-        # Получаем название дня недели
-        day_names = ["Понедельник", "Вторник", "Среда", "Четверг", "Пятница", "Суббота", "Воскресенье"]
-        day_name = day_names[schedule.day_of_week]
-        
-        # Формируем текст уведомления
-        notification_text = f"Занятие начинается через 15 минут"
-        notification_link = student.lesson_link if student.lesson_link else None
-        
-        # Добавляем уведомление в систему уведомлений
-        db.add_notification(student.id, 'schedule', notification_text, notification_link)
-        
-        # Отправляем push-сообщение с информацией о занятии
-        try:
-            push_message = (
-                "━━━━━━━━━━━━\n"
-                "⏰ НАПОМИНАНИЕ О ЗАНЯТИИ\n"
-                "━━━━━━━━━━━━\n\n"
-                "Занятие начинается через 15 минут"
-            )
-            
-            # Создаем клавиатуру с кнопкой
-            keyboard = []
-            if student.lesson_link:
-                keyboard.append([InlineKeyboardButton("🔗 Присоединиться к занятию", url=student.lesson_link)])
-            
-            reply_markup = InlineKeyboardMarkup(keyboard) if keyboard else None
-            
+        planned = await db.run(db.plan_reminders)
+        queue_planned_reminders(planned)
+        print(f'[reminder] Ночное планирование: создано {len(planned)} напоминаний')
+    except Exception as e:
+        print(f'[reminder] Ошибка ночного планирования напоминаний: {e}')
+
+# Тексты напоминания о занятии: уведомление в меню и push-сообщение
+SCHEDULE_REMINDER_TEXT = "Занятие начинается через 15 минут"
+SCHEDULE_REMINDER_PUSH = (
+    "━━━━━━━━━━━━\n"
+    "⏰ НАПОМИНАНИЕ О ЗАНЯТИИ\n"
+    "━━━━━━━━━━━━\n\n"
+    + SCHEDULE_REMINDER_TEXT
+)
+
+def schedule_reminder_markup(student):
+    """Клавиатура напоминания: кнопка входа на занятие, если у студента есть ссылка"""
+    if not student.lesson_link:
+        return None
+    return InlineKeyboardMarkup([[InlineKeyboardButton("🔗 Присоединиться к занятию", url=student.lesson_link)]])
+
+async def send_reminders_batch(context, batch) -> dict:
+    """Отправляет пакет напоминаний из get_reminder_batch.
+
+    Push-сообщения уходят параллельно через общий движок рассылок (с учётом
+    лимитов Telegram). Уведомления записываются одним INSERT только для
+    доставленных напоминаний и уже после рассылки, поэтому сбой push не
+    оставляет уведомления, которое продублируется при повторной отправке.
+    Доставленные напоминания отмечаются одним UPDATE; напоминания без
+    студента, telegram_id или занятия тоже отмечаются, чтобы не попадать в
+    следующие пакеты. Меню с новым счётчиком уведомлений отправляется
+    второй рассылкой, когда уведомления уже записаны.
+    """
+    async_db = context.bot_data['async_db']
+    recipients = []
+    push_messages = []
+    delivered = {}  # reminder_id -> student
+    skipped = []
+
+    def make_push_step(reminder_id, student):
+        async def send_push():
             msg = await context.bot.send_message(
                 chat_id=student.telegram_id,
-                text=push_message,
-                reply_markup=reply_markup,
+                text=SCHEDULE_REMINDER_PUSH,
+                reply_markup=schedule_reminder_markup(student),
                 parse_mode='HTML'
             )
-            db.add_push_message(student.id, msg.message_id)
-            
+            push_messages.append((student.id, msg.message_id))
+            delivered[reminder_id] = student
+
+        return [send_push]
+
+    def make_menu_step(student):
+        async def send_menu_step():
             # Обновляем меню с новым счётчиком уведомлений
             await send_student_menu_by_chat_id(context, student.telegram_id)
-        except Exception as e:
-            print(f'[reminder] Ошибка при отправке push-уведомления: {e}')
-        
-        print(f'[reminder] Напоминание отправлено student_id={student_id}')
-        
-    except Exception as e:
-        print(f'[reminder] Ошибка при отправке напоминания student_id={student_id}: {e}')
+
+        return [send_menu_step]
+
+    for reminder, student, schedule in batch:
+        if not student or not student.telegram_id or not schedule:
+            print(f'[reminder] Напоминание {reminder.id} пропущено: нет студента, telegram_id или занятия')
+            skipped.append(reminder.id)
+            continue
+        recipients.append((student.telegram_id, make_push_step(reminder.id, student)))
+
+    stats = {'total': len(recipients), 'sent': 0, 'failed': 0}
+    try:
+        if recipients:
+            stats = await get_broadcast_engine().run(recipients)
+    finally:
+        # Записываем уведомления, push-сообщения и отметки одной транзакцией каждое,
+        # даже если отправка прервалась — но только для доставленных напоминаний
+        await async_db.add_notifications_bulk([
+            (student.id, 'schedule', SCHEDULE_REMINDER_TEXT, student.lesson_link or None)
+            for student in delivered.values()
+        ])
+        await async_db.add_push_messages_bulk(push_messages)
+        # Отмеченные напоминания снимаются и с диспетчера, остальные он повторит
+        await async_db.mark_reminders_sent(list(delivered) + skipped)
+    if delivered:
+        await get_broadcast_engine().run([
+            (student.telegram_id, make_menu_step(student)) for student in delivered.values()
+        ])
+    stats['delivered'] = len(delivered)
+    stats['skipped'] = len(skipped)
+    print(f'[reminder] Отправлено напоминаний: {len(delivered)} из {len(batch)}, пропущено {len(skipped)}')
+    return stats
 
 async def check_pending_reminders(context):
     """Проверяет и отправляет все неотправленные напоминания из базы данных"""
     try:
-        db = Database()
-        current_time = datetime.now()
-        
-        # Получаем все неотправленные напоминания, время которых уже наступило
-        pending_reminders = db.get_pending_reminders(current_time)
-        
-        for reminder in pending_reminders:
-            try:
-                # Отправляем напоминание
-                await send_schedule_reminder(context, reminder.student_id, reminder.schedule_id)
-                
-                # Отмечаем как отправленное
-                db.mark_reminder_sent(reminder.id)
-                
-            except Exception as e:
-                print(f'[reminder] Ошибка при обработке напоминания {reminder.id}: {e}')
-        
-        if pending_reminders:
-            print(f'[reminder] Обработано {len(pending_reminders)} напоминаний')
-            
+        async_db = context.bot_data['async_db']
+        # Наступившие напоминания вместе со студентами и занятиями — одним запросом
+        batch = await async_db.get_reminder_batch(current_time=datetime.now(pytz.timezone('Europe/Moscow')))
+        if batch:
+            await send_reminders_batch(context, batch)
     except Exception as e:
         print(f'[reminder] Ошибка при проверке напоминаний: {e}')
 
+async def dispatch_due_reminders(context, reminders):
+    """Отправляет пакет наступивших напоминаний от диспетчера"""
+    async_db = context.bot_data['async_db']
+    reminder_ids = [reminder.reminder_id for reminder in reminders]
+    batch = await async_db.get_reminder_batch(reminder_ids)
+    # Напоминаний, которых уже нет среди неотправленных, повторять не нужно
+    found = {reminder.id for reminder, _, _ in batch}
+    get_reminder_dispatcher().cancel([reminder_id for reminder_id in reminder_ids if reminder_id not in found])
+    await send_reminders_batch(context, batch)
+
 def restore_reminders_from_database(job_queue, db):
-    """Восстанавливает все активные напоминания из базы данных при запуске бота"""
+    """Загружает неотправленные напоминания из базы данных в диспетчер при запуске бота"""
     if job_queue is None:
         print('[reminder] job_queue is None, восстановление напоминаний невозможно')
         return
     
     try:
-        # Получаем все неотправленные напоминания
-        all_reminders = db.get_pending_reminders()
-        now = datetime.now(pytz.timezone('Europe/Moscow'))
-        for reminder in all_reminders:
-            # Если время напоминания еще не наступило, планируем задачу
-            if reminder.reminder_time > now:
-                delay = (reminder.reminder_time - now).total_seconds()
-                job_queue.run_once(
-                    lambda ctx, student_id=reminder.student_id, schedule_id=reminder.schedule_id: send_schedule_reminder(ctx, student_id, schedule_id),
-                    when=delay
-                )
-                print(f'[reminder] Восстановлено напоминание {reminder.id} на {reminder.reminder_time}')
-        print(f'[reminder] Восстановлено {len(all_reminders)} напоминаний из БД')
+        dispatcher = get_reminder_dispatcher()
+        restored = dispatcher.load(db.get_unsent_reminders())
+        # Одна задача JobQueue на ближайшее напоминание вместо задачи на каждое
+        dispatcher.start(job_queue, dispatch_due_reminders)
+        print(f'[reminder] Восстановлено {restored} напоминаний из БД')
     except Exception as e:
         print(f'[reminder] Ошибка при восстановлении напоминаний: {e}')
 
+async def refresh_lesson_occurrences_job(context):
+    """Ежедневно сдвигает горизонт развёрнутых занятий расписания"""
+    db = context.bot_data['db']
+    try:
+        changes = await db.run(db.refresh_lesson_occurrences)
+        print(f'[schedule] Обновлены занятия расписания: изменено {changes} записей')
+    except Exception as e:
+        print(f'[schedule] Ошибка при обновлении занятий расписания: {e}')
+
 # Локальная функция для отправки меню студента
 async def send_student_menu_by_chat_id(context: ContextTypes.DEFAULT_TYPE, chat_id: int) -> None:
-    db = context.bot_data['db']
-    student = db.get_student_by_telegram_id(chat_id)
+    # Меню отправляется после каждого push и действия студента — читаем базу без блокировки цикла событий
+    async_db = context.bot_data['async_db']
+    student = await async_db.get_student_by_telegram_id(chat_id)
     if not student:
         return
     # Удаляем предыдущее меню, если оно есть
-    last_menu_id = db.get_student_menu_message_id(student.id)
+    last_menu_id = await async_db.get_student_menu_message_id(student.id)
     if last_menu_id:
         try:
             await context.bot.delete_message(chat_id=chat_id, message_id=last_menu_id)
         except Exception as e:
             pass
     
-    unread_count = len(db.get_notifications(student.id, only_unread=True))
+    unread_count = await async_db.count_unread_notifications(student.id)
     
     # Используем отображаемое имя из базы данных
     display_name = student.display_name or student.name
@@ -3326,7 +3333,46 @@ async def send_student_menu_by_chat_id(context: ContextTypes.DEFAULT_TYPE, chat_
     
     reply_markup = InlineKeyboardMarkup(keyboard)
     msg = await context.bot.send_message(chat_id=chat_id, text=greeting, reply_markup=reply_markup)
-    db.update_student_menu_message_id(student.id, msg.message_id)
+    await async_db.update_student_menu_message_id(student.id, msg.message_id)
+
+# --- Одобрение переносов ---
+async def approve_reschedule(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Одобряет запрос на перенос по кнопке из push-уведомления администратору"""
+    query = update.callback_query
+    await query.answer()
+    db = context.db
+    if not db.is_admin(query.from_user.id):
+        await query.edit_message_text("⚠️ У вас нет прав для выполнения этой команды")
+        return
+    request_id = int(query.data.split('_')[-1])
+    request = db.approve_reschedule_request(request_id)
+    if not request:
+        await query.edit_message_text("❌ Запрос на перенос не найден или уже одобрен.")
+        return
+
+    days = ['Понедельник', 'Вторник', 'Среда', 'Четверг', 'Пятница', 'Суббота', 'Воскресенье']
+    requested_date = request['requested_date']
+    when = f"{days[requested_date.weekday()]}, {requested_date.strftime('%d.%m.%Y')} в {request['requested_time']}"
+    await query.edit_message_text(f"✅ Перенос одобрен: {when}")
+
+    student = db.get_student_by_id(request['student_id'])
+    if not student:
+        return
+    # Занятие переехало — напоминания планируются заново по lesson_occurrences
+    await plan_schedule_reminders_for_student(context, student.id)
+    async_db = context.bot_data['async_db']
+    await async_db.add_notification(student.id, 'schedule', f"✅ Перенос занятия одобрен!\nНовое время: {when}")
+    if not student.telegram_id:
+        return
+    try:
+        msg = await context.bot.send_message(
+            chat_id=student.telegram_id,
+            text="🔔 У вас новое уведомление! Откройте меню 'Уведомления'."
+        )
+        await async_db.add_push_message(student.id, msg.message_id)
+        await send_student_menu_by_chat_id(context, student.telegram_id)
+    except Exception as e:
+        print(f"Ошибка отправки уведомления о переносе студенту {student.id}: {e}")
 
 # --- Обработчики настроек переносов ---
 async def show_reschedule_settings(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -3334,12 +3380,12 @@ async def show_reschedule_settings(update: Update, context: ContextTypes.DEFAULT
     query = update.callback_query
     await query.answer()
     
-    db = context.bot_data['db']
+    db = context.db
     settings = db.get_reschedule_settings()
     
     # Форматируем доступные дни
     days = ['Пн', 'Вт', 'Ср', 'Чт', 'Пт', 'Сб', 'Вс']
-    available_days = [int(d) for d in settings.available_days.split(',')]
+    available_days = sorted(settings.days)
     days_text = ' '.join([days[i] for i in available_days])
     
     text = (
@@ -3365,7 +3411,7 @@ async def show_reschedule_hours_settings(update: Update, context: ContextTypes.D
     query = update.callback_query
     await query.answer()
     
-    db = context.bot_data['db']
+    db = context.db
     settings = db.get_reschedule_settings()
     
     text = (
@@ -3426,7 +3472,7 @@ async def save_reschedule_hours(update: Update, context: ContextTypes.DEFAULT_TY
     start_time = context.user_data.get('reschedule_start_time')
     end_time = query.data.split('_')[-1]
     
-    db = context.bot_data['db']
+    db = context.db
     success = db.update_reschedule_settings(work_start_time=start_time, work_end_time=end_time)
     
     if success:
@@ -3441,9 +3487,9 @@ async def show_reschedule_days_settings(update: Update, context: ContextTypes.DE
     query = update.callback_query
     await query.answer()
     
-    db = context.bot_data['db']
+    db = context.db
     settings = db.get_reschedule_settings()
-    available_days = [int(d) for d in settings.available_days.split(',')]
+    available_days = sorted(settings.days)
     
     days = ['Понедельник', 'Вторник', 'Среда', 'Четверг', 'Пятница', 'Суббота', 'Воскресенье']
     
@@ -3465,9 +3511,9 @@ async def toggle_reschedule_day(update: Update, context: ContextTypes.DEFAULT_TY
     await query.answer()
     
     day = int(query.data.split('_')[-1])
-    db = context.bot_data['db']
+    db = context.db
     settings = db.get_reschedule_settings()
-    available_days = [int(d) for d in settings.available_days.split(',')]
+    available_days = sorted(settings.days)
     
     if day in available_days:
         available_days.remove(day)
@@ -3489,7 +3535,7 @@ async def show_reschedule_interval_settings(update: Update, context: ContextType
     query = update.callback_query
     await query.answer()
     
-    db = context.bot_data['db']
+    db = context.db
     settings = db.get_reschedule_settings()
     
     text = (
@@ -3515,7 +3561,7 @@ async def save_reschedule_interval(update: Update, context: ContextTypes.DEFAULT
     await query.answer()
     
     interval = int(query.data.split('_')[-1])
-    db = context.bot_data['db']
+    db = context.db
     success = db.update_reschedule_settings(slot_interval=interval)
     
     if success:
@@ -3526,7 +3572,7 @@ async def save_reschedule_interval(update: Update, context: ContextTypes.DEFAULT
     await show_reschedule_settings(update, context)
 
 async def send_admin_menu_by_chat_id(context, chat_id):
-    db = context.bot_data['db']
+    db = context.db
     admin = db.get_admin_by_telegram_id(chat_id) if hasattr(db, 'get_admin_by_telegram_id') else None
     if not admin:
         return
@@ -3539,7 +3585,7 @@ async def send_admin_menu_by_chat_id(context, chat_id):
             pass
 
     # Получаем количество непрочитанных уведомлений
-    unread_count = len(db.get_admin_notifications(admin.id, only_unread=True))
+    unread_count = db.count_unread_admin_notifications(admin.id)
     notif_text = f"🔔 Уведомления ({unread_count})" if unread_count else "🔔 Уведомления"
     
     # Формируем клавиатуру меню
@@ -3566,7 +3612,7 @@ async def show_admin_notifications(update: Update, context: ContextTypes.DEFAULT
     query = update.callback_query
     await query.answer()
     
-    db = context.bot_data['db']
+    db = context.db
     user_id = query.from_user.id
     admin = db.get_admin_by_telegram_id(user_id)
     
@@ -3660,7 +3706,7 @@ async def handle_admin_notification_actions(update: Update, context: ContextType
     query = update.callback_query
     await query.answer()
     
-    db = context.bot_data['db']
+    db = context.db
     user_id = query.from_user.id
     admin = db.get_admin_by_telegram_id(user_id)
     
@@ -3714,7 +3760,7 @@ async def show_task_status_set(update, context, student_id, task_num):
     query = update.callback_query
     await query.answer()
     status = query.data.split('_')[-1]
-    db = context.bot_data['db']
+    db = context.db
     student = db.get_student_by_id(student_id)
     if student:
         db.update_homework_status(student.id, task_num, status)
@@ -3730,30 +3776,17 @@ async def show_task_status_set(update, context, student_id, task_num):
 async def check_and_send_reminders(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Ручная проверка и отправка напоминаний (для админа)"""
     try:
-        db = Database()
-        current_time = datetime.now()
+        db = context.db
         
-        # Получаем все неотправленные напоминания, время которых уже наступило
-        pending_reminders = db.get_pending_reminders(current_time)
+        # Наступившие напоминания вместе со студентами и занятиями — одним запросом
+        batch = db.get_reminder_batch(current_time=datetime.now(pytz.timezone('Europe/Moscow')))
         
-        if not pending_reminders:
+        if not batch:
             await update.message.reply_text("📋 Нет напоминаний для отправки")
             return
         
-        sent_count = 0
-        for reminder in pending_reminders:
-            try:
-                # Отправляем напоминание
-                await send_schedule_reminder(context, reminder.student_id, reminder.schedule_id)
-                
-                # Отмечаем как отправленное
-                db.mark_reminder_sent(reminder.id)
-                sent_count += 1
-                
-            except Exception as e:
-                print(f'[reminder] Ошибка при обработке напоминания {reminder.id}: {e}')
-        
-        await update.message.reply_text(f"✅ Отправлено {sent_count} напоминаний из {len(pending_reminders)}")
+        stats = await send_reminders_batch(context, batch)
+        await update.message.reply_text(f"✅ Отправлено {stats['delivered']} напоминаний из {len(batch)}")
         
     except Exception as e:
         print(f'[reminder] Ошибка при проверке напоминаний: {e}')
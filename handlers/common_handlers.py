@@ -8,7 +8,7 @@ async def handle_start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> in
     Проверяет статус пользователя и направляет в соответствующее меню.
     """
     user_id = update.effective_user.id
-    db: Database = context.bot_data['db']
+    db: Database = context.db
     
     # Проверяем, является ли пользователь администратором
     if db.is_admin(user_id):
@@ -1,6 +1,6 @@
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes, ConversationHandler
-from core.database import Database, ExamType, is_valid_url
+from core.database import ExamType, is_valid_url
 from telegram.error import BadRequest
 from handlers.admin_handlers import admin_menu
 import os
@@ -98,7 +98,7 @@ async def handle_exam_choice(update: Update, context: ContextTypes.DEFAULT_TYPE)
     action = temp_data[user_id]["action"]
     temp_data[user_id]["exam_type"] = exam_type
     
-    db = Database()
+    db = context.db
     
     if action == "add":
         await query.edit_message_text(
@@ -224,7 +224,7 @@ async def handle_file_choice(update: Update, context: ContextTypes.DEFAULT_TYPE)
         return WAIT_FOR_FILE
     else:
         # Сохраняем домашнее задание без файла
-        db = Database()
+        db = context.db
         success = db.add_homework(data["title"], data["link"], data["exam_type"])
         
         if not success:
@@ -275,7 +275,7 @@ async def handle_file_upload(update: Update, context: ContextTypes.DEFAULT_TYPE)
         new_file = await file.get_file()
         await new_file.download_to_drive(file_path)
         
-        db = context.bot_data['db']
+        db = context.db
         
         if not hw_id:  # Если это создание нового задания
             success = db.add_homework(
@@ -381,7 +381,7 @@ async def handle_homework_selection(update: Update, context: ContextTypes.DEFAUL
     user_id = update.effective_user.id
     temp_data[user_id]["hw_id"] = int(hw_id)
     
-    db = context.bot_data['db']
+    db = context.db
     homework = db.get_homework_by_id(int(hw_id))
     
     if action == "edit":
@@ -447,7 +447,7 @@ async def handle_edit_action(update: Update, context: ContextTypes.DEFAULT_TYPE)
         temp_data[user_id] = {}
     temp_data[user_id]["hw_id"] = hw_id
     
-    db = Database()
+    db = context.db
     homework = db.get_homework_by_id(hw_id)
     
     if action == "file":
@@ -482,7 +482,7 @@ async def handle_edit_title(update: Update, context: ContextTypes.DEFAULT_TYPE)
     hw_id = temp_data[user_id]["hw_id"]
     new_title = update.message.text
     
-    db = Database()
+    db = context.db
     homework = db.get_homework_by_id(hw_id)
     
     if not homework:
@@ -543,7 +543,7 @@ async def handle_homework_edit_link(update: Update, context: ContextTypes.DEFAUL
         )
         return EDIT_LINK
     
-    db = context.bot_data['db']
+    db = context.db
     homework = db.get_homework_by_id(hw_id)
     
     if not homework:
@@ -589,7 +589,7 @@ async def handle_delete_confirmation(update: Update, context: ContextTypes.DEFAU
     # Получаем ID задания из callback_data
     hw_id = int(query.data.split("_")[-1])  # homework_confirm_delete_123 -> 123
     
-    db = context.bot_data['db']
+    db = context.db
     homework = db.get_homework_by_id(hw_id)
     
     if not homework:
@@ -1,6 +1,6 @@
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes, ConversationHandler
-from core.database import Database, ExamType, is_valid_url
+from core.database import ExamType, is_valid_url
 from telegram.error import BadRequest
 from handlers.admin_handlers import admin_menu
 import os
@@ -109,7 +109,7 @@ async def handle_exam_choice(update: Update, context: ContextTypes.DEFAULT_TYPE)
     action = temp_data[user_id]["action"]
     temp_data[user_id]["exam_type"] = exam_type
     
-    db = Database()
+    db = context.db
     
     if action == "add":
         await query.edit_message_text(
@@ -244,7 +244,7 @@ async def handle_file_choice(update: Update, context: ContextTypes.DEFAULT_TYPE)
         return WAIT_FOR_FILE
     else:
         # Сохраняем конспект без файла
-        db = Database()
+        db = context.db
         success = db.add_note(data["title"], data["link"], data["exam_type"])
         
         if not success:
@@ -295,7 +295,7 @@ async def handle_file_upload(update: Update, context: ContextTypes.DEFAULT_TYPE)
         new_file = await file.get_file()
         await new_file.download_to_drive(file_path)
         
-        db = context.bot_data['db']
+        db = context.db
         
         if not note_id:  # Если это создание нового конспекта
             success = db.add_note(
@@ -401,7 +401,7 @@ async def handle_note_selection(update: Update, context: ContextTypes.DEFAULT_TY
     user_id = update.effective_user.id
     temp_data[user_id]["note_id"] = int(note_id)
     
-    db = context.bot_data['db']
+    db = context.db
     note = db.get_note_by_id(int(note_id))
     
     if action == "edit":
@@ -467,7 +467,7 @@ async def handle_edit_action(update: Update, context: ContextTypes.DEFAULT_TYPE)
         temp_data[user_id] = {}
     temp_data[user_id]["note_id"] = note_id
     
-    db = Database()
+    db = context.db
     note = db.get_note_by_id(note_id)
     
     if action == "file":
@@ -502,7 +502,7 @@ async def handle_edit_title(update: Update, context: ContextTypes.DEFAULT_TYPE)
     note_id = temp_data[user_id]["note_id"]
     new_title = update.message.text
     
-    db = Database()
+    db = context.db
     note = db.get_note_by_id(note_id)
     
     if not note:
@@ -563,7 +563,7 @@ async def handle_note_edit_link(update: Update, context: ContextTypes.DEFAULT_TY
         )
         return EDIT_LINK
     
-    db = context.bot_data['db']
+    db = context.db
     note = db.get_note_by_id(note_id)
     
     if not note:
@@ -609,7 +609,7 @@ async def handle_delete_confirmation(update: Update, context: ContextTypes.DEFAU
     # Получаем ID конспекта из callback_data
     note_id = int(query.data.split("_")[-1])  # notes_confirm_delete_123 -> 123
     
-    db = context.bot_data['db']
+    db = context.db
     note = db.get_note_by_id(note_id)
     
     if not note:
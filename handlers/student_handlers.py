@@ -264,7 +264,7 @@ def themed_button(label_key, theme, callback_data):
 
 def require_student(func):
     async def wrapper(update, context, *args, **kwargs):
-        db = context.bot_data['db']
+        db = context.db
         user_id = update.effective_user.id
         student = db.get_student_by_telegram_id(user_id)
         if not student:
@@ -286,9 +286,9 @@ def require_student(func):
 async def student_menu(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Показывает меню студента"""
     user_id = update.effective_user.id
-    student = context.bot_data['db'].get_student_by_telegram_id(user_id)
-    db = context.bot_data['db']
-    unread_count = len(db.get_notifications(student.id, only_unread=True)) if student else 0
+    student = context.db.get_student_by_telegram_id(user_id)
+    db = context.db
+    unread_count = db.count_unread_notifications(student.id) if student else 0
     
     # Используем отображаемое имя из базы данных
     display_name = student.display_name or student.name
@@ -356,7 +356,7 @@ async def student_menu(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
 async def show_settings_menu(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Показывает меню настроек"""
     user_id = update.effective_user.id
-    student = context.bot_data['db'].get_student_by_telegram_id(user_id)
+    student = context.db.get_student_by_telegram_id(user_id)
     
     # Применяем тему к названиям кнопок
     theme = student.theme or "classic"
@@ -381,7 +381,7 @@ async def show_settings_menu(update: Update, context: ContextTypes.DEFAULT_TYPE)
 async def show_personalization_menu(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Показывает подменю персонализации"""
     user_id = update.effective_user.id
-    student = context.bot_data['db'].get_student_by_telegram_id(user_id)
+    student = context.db.get_student_by_telegram_id(user_id)
     
     # Применяем тему к названиям кнопок
     theme = student.theme or "classic"
@@ -401,7 +401,7 @@ async def show_personalization_menu(update: Update, context: ContextTypes.DEFAUL
 
 async def handle_password(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Обрабатывает ввод пароля"""
-    db: Database = context.bot_data['db']
+    db: Database = context.db
     password = update.message.text
     user_id = update.effective_user.id
     
@@ -438,7 +438,9 @@ async def handle_student_actions(update: Update, context: ContextTypes.DEFAULT_T
         await query.answer()
     except Exception as e:
         pass
-    db: Database = context.bot_data['db']
+    db: Database = context.db
+    # Уведомления и ближайшее занятие читаются через асинхронный слой, не блокируя цикл событий
+    async_db = context.bot_data['async_db']
     user_id = query.from_user.id
     student = db.get_student_by_telegram_id(user_id)
     
@@ -540,8 +542,7 @@ async def handle_student_actions(update: Update, context: ContextTypes.DEFAULT_T
         homeworks_data = db.get_homeworks_for_student_with_filter(student.id, show_old=True)
         is_current = False
         if homeworks_data:
-            # Сортируем по номеру задания (1, 2, 3, 11, 23...)
-            homeworks_data.sort(key=lambda x: x[0].get_task_number())
+            # Список уже отсортирован по номеру задания (1, 2, 3, 11, 23...)
             # Актуальным считается задание с самым большим номером
             is_current = homeworks_data[-1][0].id == hw_id
         
@@ -625,7 +626,7 @@ async def handle_student_actions(update: Update, context: ContextTypes.DEFAULT_T
     elif query.data == "student_join_lesson":
         if student and student.lesson_link:
             # Получаем информацию о следующем занятии
-            next_lesson = db.get_next_lesson(student.id)
+            next_lesson = await async_db.get_next_lesson(student.id)
             
             if next_lesson:
                 next_date = format_moscow_time(next_lesson['date'], '%d.%m.%Y')
@@ -711,14 +712,14 @@ async def handle_student_actions(update: Update, context: ContextTypes.DEFAULT_T
         return ENTER_DISPLAY_NAME
     elif query.data == "student_reset_settings":
         if student:
-            context.bot_data['db'].reset_student_settings(student.id)
+            context.db.reset_student_settings(student.id)
             await query.answer("✅ Настройки сброшены!")
         await student_menu(update, context)
     elif query.data == "student_toggle_old_homework":
         if student:
             # Переключаем настройку
             new_setting = not student.show_old_homework
-            context.bot_data['db'].update_student_show_old_homework(student.id, new_setting)
+            context.db.update_student_show_old_homework(student.id, new_setting)
             
             # Показываем обновленное меню настроек
             await show_settings_menu(update, context)
@@ -734,7 +735,7 @@ async def handle_student_actions(update: Update, context: ContextTypes.DEFAULT_T
     elif query.data == "student_notifications":
         # Сброс страницы при открытии уведомлений
         context.user_data['notif_page'] = 0
-        notifications = db.get_notifications(student.id)
+        notifications = await async_db.get_notifications(student.id)
         if not notifications:
             await query.edit_message_text(
                 text="🔔 Нет новых уведомлений.",
@@ -776,7 +777,7 @@ async def handle_student_actions(update: Update, context: ContextTypes.DEFAULT_T
             notif_texts.append(text)
         
         text = "\n\n".join(notif_texts)
-        db.mark_notifications_read(student.id)
+        await async_db.mark_notifications_read(student.id)
         buttons = []
         
         # Показываем навигацию только если есть больше одной страницы
@@ -807,7 +808,7 @@ async def handle_student_actions(update: Update, context: ContextTypes.DEFAULT_T
     elif query.data == "notif_next":
         context.user_data['notif_page'] = context.user_data.get('notif_page', 0) + 1
         # Показываем уведомления с обновленной страницей
-        notifications = db.get_notifications(student.id)
+        notifications = await async_db.get_notifications(student.id)
         if not notifications:
             await query.edit_message_text(
                 text="🔔 Нет новых уведомлений.",
@@ -849,7 +850,7 @@ async def handle_student_actions(update: Update, context: ContextTypes.DEFAULT_T
             notif_texts.append(text)
         
         text = "\n\n".join(notif_texts)
-        db.mark_notifications_read(student.id)
+        await async_db.mark_notifications_read(student.id)
         buttons = []
         
         # Показываем навигацию только если есть больше одной страницы
@@ -880,7 +881,7 @@ async def handle_student_actions(update: Update, context: ContextTypes.DEFAULT_T
     elif query.data == "notif_prev":
         context.user_data['notif_page'] = max(0, context.user_data.get('notif_page', 0) - 1)
         # Показываем уведомления с обновленной страницей
-        notifications = db.get_notifications(student.id)
+        notifications = await async_db.get_notifications(student.id)
         if not notifications:
             await query.edit_message_text(
                 text="🔔 Нет новых уведомлений.",
@@ -922,7 +923,7 @@ async def handle_student_actions(update: Update, context: ContextTypes.DEFAULT_T
             notif_texts.append(text)
         
         text = "\n\n".join(notif_texts)
-        db.mark_notifications_read(student.id)
+        await async_db.mark_notifications_read(student.id)
         buttons = []
         
         # Показываем навигацию только если есть больше одной страницы
@@ -952,15 +953,15 @@ async def handle_student_actions(update: Update, context: ContextTypes.DEFAULT_T
         return
     elif query.data == "notif_clear":
         # Удаляем все уведомления через метод базы
-        db.clear_notifications(student.id)
+        await async_db.clear_notifications(student.id)
         # Удаляем все push-уведомления из чата
-        push_msgs = db.get_push_messages(student.id)
+        push_msgs = await async_db.get_push_messages(student.id)
         for push in push_msgs:
             try:
                 await context.bot.delete_message(chat_id=student.telegram_id, message_id=push.message_id)
             except Exception:
                 pass  # Игнорируем ошибки (например, если сообщение уже удалено)
-        db.clear_push_messages(student.id)
+        await async_db.clear_push_messages(student.id)
         context.user_data['notif_page'] = 0
         await query.edit_message_text(
             text="🔔 Все уведомления удалены!",
@@ -1091,9 +1092,9 @@ async def handle_display_name_change(update: Update, context: ContextTypes.DEFAU
     user_id = update.effective_user.id
     new_name = update.message.text
     
-    student = context.bot_data['db'].get_student_by_telegram_id(user_id)
+    student = context.db.get_student_by_telegram_id(user_id)
     if student:
-        context.bot_data['db'].update_student_settings(student.id, display_name=new_name)
+        context.db.update_student_settings(student.id, display_name=new_name)
         
         # Отправляем подтверждение
         confirm_message = await update.message.reply_text("✅ Отображаемое имя успешно изменено!")
@@ -1164,7 +1165,7 @@ async def handle_student_edit_action(update: Update, context: ContextTypes.DEFAU
         temp_data[user_id] = {}
     temp_data[user_id]["student_id"] = student_id
     
-    db = Database()
+    db = context.db
     student = db.get_student_by_id(student_id)
     
     if action == "link":
@@ -1202,7 +1203,7 @@ async def handle_student_link_edit(update: Update, context: ContextTypes.DEFAULT
     student_id = temp_data[user_id]["student_id"]
     new_link = update.message.text
     
-    db = Database()
+    db = context.db
     student = db.get_student_by_id(student_id)
     if not student:
         await update.message.reply_text(
@@ -1229,18 +1230,19 @@ async def handle_student_link_edit(update: Update, context: ContextTypes.DEFAULT
 
 @require_student
 async def send_student_menu_by_chat_id(context: ContextTypes.DEFAULT_TYPE, chat_id: int) -> None:
-    db = context.bot_data['db']
-    student = db.get_student_by_telegram_id(chat_id)
+    # Меню отправляется после каждого push и действия студента — читаем базу без блокировки цикла событий
+    async_db = context.bot_data['async_db']
+    student = await async_db.get_student_by_telegram_id(chat_id)
     if not student:
         return
     # Удаляем предыдущее меню, если оно есть
-    last_menu_id = db.get_student_menu_message_id(student.id)
+    last_menu_id = await async_db.get_student_menu_message_id(student.id)
     if last_menu_id:
         try:
             await context.bot.delete_message(chat_id=chat_id, message_id=last_menu_id)
         except Exception:
             pass
-    unread_count = len(db.get_notifications(student.id, only_unread=True))
+    unread_count = await async_db.count_unread_notifications(student.id)
     display_name = student.display_name or student.name
     avatar_emoji = student.avatar_emoji or "👋"
     greeting = f"{avatar_emoji} Привет, {display_name}!"
@@ -1275,11 +1277,11 @@ async def send_student_menu_by_chat_id(context: ContextTypes.DEFAULT_TYPE, chat_
         ]
     reply_markup = InlineKeyboardMarkup(keyboard)
     msg = await context.bot.send_message(chat_id=chat_id, text=greeting, reply_markup=reply_markup)
-    db.update_student_menu_message_id(student.id, msg.message_id)
+    await async_db.update_student_menu_message_id(student.id, msg.message_id)
 
 @require_student
 async def show_student_notes_menu(update, context, student, page=0):
-    db = context.bot_data['db']
+    db = context.db
     theme = student.theme or 'classic'
     student_notes = db.get_notes_for_student(student.id)
     if not student_notes:
@@ -1338,7 +1340,7 @@ async def show_student_notes_menu(update, context, student, page=0):
 
 @require_student
 async def show_student_homework_menu(update, context, student, page=0):
-    db = context.bot_data['db']
+    db = context.db
     exam_type = student.exam_type
     
     # Получаем все задания студента с датами выдачи
@@ -1374,7 +1376,7 @@ async def show_student_homework_menu(update, context, student, page=0):
         if status and status.strip() in allowed_statuses:
             filtered_old_homeworks.append((homework, assigned_at))
     old_homeworks_data = filtered_old_homeworks
-    old_homeworks_data.sort(key=lambda x: x[0].get_task_number())
+    old_homeworks_data.sort(key=lambda x: x[0].sort_key)
     
     # Если скрывать старые задания — не показываем их
     if not student.show_old_homework:
@@ -1434,7 +1436,7 @@ async def show_student_homework_menu(update, context, student, page=0):
 
 @require_student
 async def show_student_roadmap(update, context, student, page=0):
-    db = context.bot_data['db']
+    db = context.db
     theme = student.theme or 'classic'
     exam_type = student.exam_type
     exam_label = 'ЕГЭ' if exam_type.value == 'ЕГЭ' else 'ОГЭ'
@@ -1665,7 +1667,7 @@ async def student_reschedule_choose_week(update, context):
     context.user_data['reschedule_week_offset'] = week_offset
     
     # Получаем доступные дни для выбранной недели
-    db = context.bot_data['db']
+    db = context.db
     schedule_id = context.user_data['reschedule_schedule_id']
     schedule = db.get_schedule_by_id(schedule_id)
     lesson_duration = schedule.duration
@@ -1720,7 +1722,7 @@ async def student_reschedule_choose_day(update, context):
     context.user_data['reschedule_date'] = target_date
     
     # Получаем доступные слоты времени
-    db = context.bot_data['db']
+    db = context.db
     schedule_id = context.user_data['reschedule_schedule_id']
     schedule = db.get_schedule_by_id(schedule_id)
     lesson_duration = schedule.duration
@@ -1776,7 +1778,7 @@ async def student_reschedule_choose_time(update, context):
             context.user_data['reschedule_time_page'] = page - 1
         # Показываем слоты с обновленной страницей
         date = context.user_data['reschedule_date']
-        db = context.bot_data['db']
+        db = context.db
         schedule_id = context.user_data['reschedule_schedule_id']
         schedule = db.get_schedule_by_id(schedule_id)
         lesson_duration = schedule.duration
@@ -1813,7 +1815,7 @@ async def student_reschedule_choose_time(update, context):
         context.user_data['reschedule_time_page'] = page + 1
         # Показываем слоты с обновленной страницей
         date = context.user_data['reschedule_date']
-        db = context.bot_data['db']
+        db = context.db
         schedule_id = context.user_data['reschedule_schedule_id']
         schedule = db.get_schedule_by_id(schedule_id)
         lesson_duration = schedule.duration
@@ -1855,7 +1857,7 @@ async def student_reschedule_choose_time(update, context):
     
     # Показываем подтверждение
     schedule_id = context.user_data['reschedule_schedule_id']
-    db = context.bot_data['db']
+    db = context.db
     schedule = db.get_schedule_by_id(schedule_id)
     student = db.get_student_by_id(schedule.student_id)
     
@@ -1913,7 +1915,7 @@ async def student_reschedule_confirm(update, context):
         new_date = context.user_data['reschedule_date']
         new_time = context.user_data['reschedule_time']
         
-        db = context.bot_data['db']
+        db = context.db
         schedule = db.get_schedule_by_id(schedule_id)
         student = db.get_student_by_id(schedule.student_id)
         
@@ -1934,10 +1936,9 @@ async def student_reschedule_confirm(update, context):
                     admin = db.get_admin_by_telegram_id(admin_id)
                     if admin:
                         days_ru = ['Понедельник', 'Вторник', 'Среда', 'Четверг', 'Пятница', 'Суббота', 'Воскресенье']
-                        today = datetime.datetime.now().date()
-                        current_date_obj = today + datetime.timedelta((schedule.day_of_week - today.weekday()) % 7)
+                        current_date_obj = reschedule_request['original_date']
                         current_date_str = current_date_obj.strftime('%d.%m.%Y')
-                        current_day_ru = days_ru[schedule.day_of_week]
+                        current_day_ru = days_ru[current_date_obj.weekday()]
                         new_day_ru = days_ru[new_date.weekday()]
                         new_date_str = new_date.strftime('%d.%m.%Y')
                         notification_text = (
@@ -1950,6 +1951,9 @@ async def student_reschedule_confirm(update, context):
                     push_msg = await context.bot.send_message(
                         chat_id=admin_id,
                         text="🔔 Новый запрос на перенос занятия! Откройте меню для подробностей.",
+                        reply_markup=InlineKeyboardMarkup([[InlineKeyboardButton(
+                            "✅ Одобрить перенос", callback_data=f"reschedule_approve_{reschedule_request['id']}"
+                        )]])
                     )
                     # Сохраняем ID push-сообщения для возможности удаления
                     if admin:
@@ -1993,7 +1997,7 @@ async def student_reschedule_menu(update, context):
             del context.user_data[key]
     
     # Получаем студента из базы данных
-    db = context.bot_data['db']
+    db = context.db
     user_id = query.from_user.id
     
     student = db.get_student_by_telegram_id(user_id)
@@ -2044,7 +2048,7 @@ async def show_student_schedule_menu(update, context, student=None):
         if key in context.user_data:
             del context.user_data[key]
     query = update.callback_query
-    db = context.bot_data['db']
+    db = context.db
     if student is None:
         student = context.user_data.get('student')
         if student is None:
@@ -2057,8 +2061,10 @@ async def show_student_schedule_menu(update, context, student=None):
                     reply_markup=InlineKeyboardMarkup([[InlineKeyboardButton("🔙 Назад", callback_data="student_back")]])
                 )
                 return
-    schedules = db.get_student_schedule(student.id)
-    next_lesson = db.get_next_lesson(student.id)
+    # Расписание и ближайшее занятие (из lesson_occurrences) — через асинхронный слой
+    async_db = context.bot_data['async_db']
+    schedules = await async_db.get_student_schedule(student.id)
+    next_lesson = await async_db.get_next_lesson(student.id)
     if not schedules:
         await query.edit_message_text(
             text="📅 <b>Ваше расписание</b>\n\n❌ Расписание не настроено.\n\nОбратитесь к администратору для настройки расписания.",
@@ -2092,7 +2098,7 @@ async def show_student_schedule_menu(update, context, student=None):
 async def show_avatar_menu(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Показывает меню выбора аватарки"""
     user_id = update.effective_user.id
-    student = context.bot_data['db'].get_student_by_telegram_id(user_id)
+    student = context.db.get_student_by_telegram_id(user_id)
     
     # Применяем тему к названиям
     theme = student.theme or "classic"
@@ -2119,7 +2125,7 @@ async def show_avatar_menu(update: Update, context: ContextTypes.DEFAULT_TYPE) -
 async def show_theme_menu(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Показывает меню выбора темы"""
     user_id = update.effective_user.id
-    student = context.bot_data['db'].get_student_by_telegram_id(user_id)
+    student = context.db.get_student_by_telegram_id(user_id)
     theme = student.theme or "classic"
     names = THEME_THEME_NAMES.get(theme, THEME_THEME_NAMES["classic"])
     themes = [
@@ -2166,7 +2172,7 @@ async def handle_student_feedback(update: Update, context: ContextTypes.DEFAULT_
 @require_student
 async def handle_student_text(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     if context.user_data.get('awaiting_feedback'):
-        db = context.bot_data['db']
+        db = context.db
         student = db.get_student_by_telegram_id(update.effective_user.id)
         feedback = update.message.text
         # Получаем id админа (или список)
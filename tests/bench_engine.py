@@ -0,0 +1,54 @@
+"""Бенчмарк накладных расходов на апдейт: новый движок на каждый Database() против общего движка.
+
+Запуск: python tests/bench_engine.py
+"""
+import os
+import sys
+import tempfile
+import time
+
+# Корень репозитория (для core)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from core.database import DATABASE_URL, Base, Database, Student
+
+def bench(name: str, func, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    elapsed = (time.perf_counter() - started) / repeat * 1000
+    print(f"{name:<8} {elapsed:8.3f} мс/апдейт")
+    return elapsed
+
+def lookup(Session):
+    # Типичный апдейт: одна сессия и один запрос студента
+    session = Session()
+    try:
+        session.query(Student).filter_by(telegram_id=1).first()
+    finally:
+        session.close()
+
+def per_update_engine():
+    """Прежний Database(): create_engine и create_all при каждом создании"""
+    engine = create_engine(DATABASE_URL)
+    Base.metadata.create_all(engine)
+    lookup(sessionmaker(bind=engine))
+    engine.dispose()
+
+def shared_engine():
+    """Database() поверх общего движка и фабрики сессий"""
+    lookup(Database().Session)
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        Database()  # Создаёт схему и общий движок
+        per_update = bench('engine', per_update_engine, 200)
+        shared = bench('shared', shared_engine, 200)
+        print(f"ускорение: {per_update / shared:.1f}x")
+        Database().engine.dispose()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""Бенчмарк get_homeworks_for_student_with_filter: один SQL-запрос против прежнего разбора
+назначений в Python с запросом Homework на каждое назначение. У ученика 500 назначений.
+
+Запуск: python tests/bench_homework_filter.py
+"""
+from datetime import datetime, timedelta
+import os
+import sys
+import tempfile
+import time
+
+# Корень репозитория (для core)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from core.database import Database, ExamType, Homework, Student, StudentHomework
+from core.migrations import migrate_database
+
+HOMEWORKS = 250
+ASSIGNMENTS = 500  # каждое задание выдано дважды
+STATUSES = ['assigned', 'completed', 'Не пройдено', ' not passed ', 'assigned']
+
+def bench(name: str, func, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    elapsed = (time.perf_counter() - started) / repeat * 1000
+    print(f"{name:<8} {elapsed:8.3f} мс/вызов")
+    return elapsed
+
+def legacy_homeworks_with_filter(db, student_id: int, show_old: bool = None) -> list:
+    """Прежняя реализация: все назначения в Python и запрос Homework на каждое"""
+    session = db.Session()
+    try:
+        not_passed_statuses = {'not_passed', 'not completed', 'notcompleted', 'Не пройдено', 'not passed'}
+        assigned = session.query(StudentHomework).filter_by(student_id=student_id).all()
+        if not assigned:
+            return []
+        if show_old is None:
+            student = session.query(Student).filter_by(id=student_id).first()
+            show_old = student.show_old_homework if student else False
+        last_assignments = {}
+        for sh in assigned:
+            if sh.homework_id not in last_assignments or sh.assigned_at > last_assignments[sh.homework_id].assigned_at:
+                last_assignments[sh.homework_id] = sh
+        homeworks = []
+        for sh in last_assignments.values():
+            homework = session.query(Homework).filter_by(id=sh.homework_id).first()
+            if homework:
+                if (not homework.link or homework.link.strip() == "") and (not homework.file_path or homework.file_path.strip() == ""):
+                    continue
+                if sh.status and sh.status.strip().lower() in {s.lower() for s in not_passed_statuses}:
+                    continue
+                homeworks.append((homework, sh.assigned_at))
+        homeworks.sort(key=lambda x: x[0].get_task_number())
+        if not show_old and homeworks:
+            return [homeworks[-1]]
+        return homeworks
+    finally:
+        session.close()
+
+def seed(db) -> int:
+    session = db.Session()
+    try:
+        student = Student(name='Ученик', password='bench', exam_type=ExamType.OGE, show_old_homework=True)
+        session.add(student)
+        # Каждое десятое задание «виртуальное»: без ссылки и файла
+        homeworks = [
+            Homework(title=f'Задание {k}', link='' if k % 10 == 0 else f'https://example.com/{k}', exam_type=ExamType.OGE)
+            for k in range(1, HOMEWORKS + 1)
+        ]
+        session.add_all(homeworks)
+        session.flush()
+        started = datetime(2026, 1, 1)
+        session.add_all(
+            StudentHomework(
+                student_id=student.id,
+                homework_id=homeworks[k % HOMEWORKS].id,
+                assigned_at=started + timedelta(hours=k),
+                status=STATUSES[k % len(STATUSES)],
+            )
+            for k in range(ASSIGNMENTS)
+        )
+        session.commit()
+        return student.id
+    finally:
+        session.close()
+
+def as_ids(homeworks) -> list:
+    return [(homework.id, assigned_at) for homework, assigned_at in homeworks]
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        db = Database()
+        migrate_database()
+        student_id = seed(db)
+        for show_old in (True, False):
+            assert as_ids(db.get_homeworks_for_student_with_filter(student_id, show_old)) == \
+                as_ids(legacy_homeworks_with_filter(db, student_id, show_old))
+        legacy = bench('python', lambda: legacy_homeworks_with_filter(db, student_id), 20)
+        single = bench('sql', lambda: db.get_homeworks_for_student_with_filter(student_id), 20)
+        print(f"ускорение: {legacy / single:.1f}x")
+        db.engine.dispose()
+
+if __name__ == '__main__':
+    main()
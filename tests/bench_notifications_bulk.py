@@ -0,0 +1,70 @@
+"""Бенчмарк записи рассылки на 1000 студентов: add_notification и add_push_message по одному
+(сессия и коммит на каждый вызов) против add_notifications_bulk и add_push_messages_bulk.
+
+Запуск: python tests/bench_notifications_bulk.py
+"""
+import os
+import sys
+import tempfile
+import time
+
+# Корень репозитория (для core)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from core.database import Database, ExamType, Notification, PushMessage, Student
+from core.migrations import migrate_database
+
+STUDENTS = 1000
+TEXT = 'Вам выдан новый вариант'
+
+def bench(name: str, func, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    elapsed = (time.perf_counter() - started) / repeat * 1000
+    print(f"{name:<8} {elapsed:8.1f} мс/рассылка")
+    return elapsed
+
+def seed(db) -> list:
+    session = db.Session()
+    try:
+        students = [
+            Student(name=f'Ученик {k}', telegram_id=k, password=f'p{k}', exam_type=ExamType.OGE)
+            for k in range(STUDENTS)
+        ]
+        session.add_all(students)
+        session.commit()
+        return [student.id for student in students]
+    finally:
+        session.close()
+
+def one_by_one(db, student_ids):
+    """Прежний цикл handle_give_variant_enter_link / create_school_homework"""
+    for student_id in student_ids:
+        db.add_notification(student_id, 'homework', TEXT)
+        db.add_push_message(student_id, student_id)
+
+def bulk(db, student_ids):
+    db.add_notifications_bulk([(student_id, 'homework', TEXT, None) for student_id in student_ids])
+    db.add_push_messages_bulk([(student_id, student_id) for student_id in student_ids])
+
+def count_rows(db) -> tuple:
+    session = db.Session()
+    try:
+        return session.query(Notification).count(), session.query(PushMessage).count()
+    finally:
+        session.close()
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        db = Database()
+        migrate_database()
+        student_ids = seed(db)
+        single = bench('single', lambda: one_by_one(db, student_ids), 3)
+        batched = bench('bulk', lambda: bulk(db, student_ids), 3)
+        assert count_rows(db) == (6 * STUDENTS, 6 * STUDENTS)
+        print(f"ускорение: {single / batched:.1f}x")
+        db.engine.dispose()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,35 @@
+"""Бенчмарк расчёта свободных слотов дня: free_slots против прежнего перебора.
+
+Запуск: python tests/bench_slots.py
+"""
+from datetime import datetime, time as dtime
+import os
+import sys
+import time
+
+# Каталог tests (для test_slot_engine) и корень репозитория (для core)
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path[:0] = [TESTS_DIR, os.path.dirname(TESTS_DIR)]
+from test_slot_engine import engine_slots, naive_free_slots
+
+def bench(name: str, func, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    elapsed = (time.perf_counter() - started) / repeat * 1000
+    print(f"{name:<8} {elapsed:8.3f} мс/день")
+    return elapsed
+
+def main():
+    # Плотный день: 30 занятий, 5 событий календаря, 10:00-19:00, шаг 15 минут, занятие 60 минут
+    day = datetime(2026, 3, 2)
+    lessons = [(f"{8 + k % 12:02d}:{(k * 7) % 60:02d}", 45) for k in range(30)]
+    busy_times = [{'start': dtime(10 + k, 0), 'end': dtime(10 + k, 30), 'title': 'событие'} for k in range(5)]
+    args = ('10:00', '19:00', 60, 15, lessons, busy_times)
+    assert engine_slots(*args) == naive_free_slots(day, *args)
+    naive = bench('naive', lambda: naive_free_slots(day, *args), 200)
+    sweep = bench('sweep', lambda: engine_slots(*args), 200)
+    print(f"ускорение: {naive / sweep:.1f}x")
+
+if __name__ == '__main__':
+    main()
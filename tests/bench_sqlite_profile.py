@@ -0,0 +1,106 @@
+"""Бенчмарк смешанной нагрузки чтение/запись через пул потоков БД: профиль SQLite по умолчанию
+против профиля SQLITE_PRAGMAS (WAL, synchronous=NORMAL, busy_timeout, кэш, mmap) с пулом соединений.
+
+Запуск: python tests/bench_sqlite_profile.py
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+# Корень репозитория (для core)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from core.database import (
+    SQLITE_POOL_SIZE, SQLITE_MAX_OVERFLOW, SQLITE_POOL_TIMEOUT,
+    Base, ExamType, Notification, Student, configure_sqlite_engine
+)
+from core.db_executor import DatabaseExecutor
+
+OPERATIONS = 2000
+CONCURRENCY = 32  # одновременных апдейтов в цикле событий
+WRITE_EVERY = 5  # каждая пятая операция — запись уведомления
+STUDENTS = 200
+
+def default_engine(path):
+    """Прежнее подключение: журнал отката, без PRAGMA и настроек пула"""
+    return create_engine(f'sqlite:///{path}', connect_args={'check_same_thread': False})
+
+def profile_engine(path):
+    """Подключение как в get_engine(): SQLITE_PRAGMAS на каждом соединении и пул"""
+    return configure_sqlite_engine(create_engine(
+        f'sqlite:///{path}',
+        connect_args={'check_same_thread': False},
+        pool_size=SQLITE_POOL_SIZE,
+        max_overflow=SQLITE_MAX_OVERFLOW,
+        pool_timeout=SQLITE_POOL_TIMEOUT,
+    ))
+
+def seed(Session):
+    session = Session()
+    try:
+        session.add_all(
+            Student(name=f'Ученик {k}', telegram_id=k, password=f'p{k}', exam_type=ExamType.OGE)
+            for k in range(STUDENTS)
+        )
+        session.commit()
+    finally:
+        session.close()
+
+def read(Session, k):
+    session = Session()
+    try:
+        return session.query(Student).filter_by(telegram_id=k % STUDENTS).first()
+    finally:
+        session.close()
+
+def write(Session, k):
+    session = Session()
+    try:
+        student = session.query(Student).filter_by(telegram_id=k % STUDENTS).first()
+        session.add(Notification(student_id=student.id, type='bench', text='Новое задание'))
+        session.commit()
+    finally:
+        session.close()
+
+async def run_load(Session) -> dict:
+    executor = DatabaseExecutor(max_queue=CONCURRENCY)
+    pending = iter(range(OPERATIONS))
+    errors = 0
+
+    async def worker():
+        nonlocal errors
+        for k in pending:
+            try:
+                await executor.run(write if k % WRITE_EVERY == 0 else read, Session, k)
+            except Exception:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(CONCURRENCY)))
+    elapsed = time.perf_counter() - started
+    executor.shutdown()
+    return {'ops': OPERATIONS / elapsed, 'errors': errors, **executor.get_stats()}
+
+def bench(name: str, make_engine, tmp) -> float:
+    engine = make_engine(os.path.join(tmp, f'{name}.db'))
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    seed(Session)
+    stats = asyncio.run(run_load(Session))
+    engine.dispose()
+    print(f"{name:<8} {stats['ops']:8.0f} оп/с, ошибок {stats['errors']}, "
+          f"таймаутов {stats['timeouts']}, макс. очередь {stats['max_queue_depth']}")
+    return stats['ops']
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        default = bench('default', default_engine, tmp)
+        profile = bench('profile', profile_engine, tmp)
+        print(f"ускорение: {profile / default:.1f}x")
+
+if __name__ == '__main__':
+    main()
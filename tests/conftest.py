@@ -0,0 +1,43 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core import (
+    database, async_database, slot_cache, note_index, notification_counter, student_cache, admin_registry,
+    reminder_dispatcher
+)
+from core.database import Database, ExamType, Student
+from core.migrations import migrate_database
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """Database на чистой базе students.db во временном каталоге (со всеми миграциями и индексами)"""
+    monkeypatch.chdir(tmp_path)
+    # Общие для процесса движок и кэши создаются заново для каждого теста
+    monkeypatch.setattr(database, '_engine', None)
+    monkeypatch.setattr(database, '_session_factory', None)
+    monkeypatch.setattr(async_database, '_async_engine', None)
+    monkeypatch.setattr(async_database, '_async_session_factory', None)
+    monkeypatch.setattr(slot_cache, '_slot_cache', None)
+    monkeypatch.setattr(note_index, '_note_index', None)
+    monkeypatch.setattr(notification_counter, '_unread_counter', None)
+    monkeypatch.setattr(student_cache, '_student_cache', None)
+    monkeypatch.setattr(admin_registry, '_admin_registry', None)
+    monkeypatch.setattr(reminder_dispatcher, '_reminder_dispatcher', None)
+    monkeypatch.setattr(Database, '_reschedule_settings', None)
+    db = Database()
+    migrate_database()
+    yield db
+    db.engine.dispose()
+
+def create_student(db, name: str, exam_type: ExamType = ExamType.OGE) -> int:
+    """Создает студента через Database и возвращает его id"""
+    password = db.create_student(name, exam_type)['password']
+    session = db.Session()
+    try:
+        return session.query(Student.id).filter_by(password=password).scalar()
+    finally:
+        session.close()
@@ -0,0 +1,73 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from core.async_database import AsyncDatabase
+from core.database import ExamType, Homework, moscow_now
+from core.reminder_dispatcher import get_reminder_dispatcher
+from conftest import create_student
+
+def run_async(scenario):
+    """Выполняет scenario(async_db) в своём цикле событий и закрывает пул асинхронного движка"""
+    async def main():
+        async_db = AsyncDatabase()
+        try:
+            await scenario(async_db)
+        finally:
+            await async_db.dispose()
+
+    asyncio.run(main())
+
+def test_homework_assignment_and_notifications_share_caches_with_database(db):
+    student_id = create_student(db, 'Ученик')
+    db.add_homework('Задание 1', 'https://example.com/1', ExamType.OGE)
+    session = db.Session()
+    homework_id = session.query(Homework.id).scalar()
+    session.close()
+    # Счётчик уведомлений загружен синхронным слоем и дальше обновляется асинхронным
+    assert db.count_unread_notifications(student_id) == 0
+
+    async def scenario(async_db):
+        assert not await async_db.is_homework_assigned_to_student(student_id, homework_id)
+        assert await async_db.assign_homework_to_student(student_id, homework_id)
+        assert await async_db.update_homework_status(student_id, homework_id, 'completed')
+        await async_db.add_notification(student_id, 'homework', 'Новое задание')
+        assert db.count_unread_notifications(student_id) == 1
+        assert [n.text for n in await async_db.get_notifications(student_id)] == ['Новое задание']
+        await async_db.mark_notifications_read(student_id)
+        assert db.count_unread_notifications(student_id) == 0
+
+    run_async(scenario)
+    assert [(sh.homework_id, sh.status) for sh in db.get_homeworks_for_student(student_id)] == [(homework_id, 'completed')]
+
+def test_next_lesson_matches_database(db):
+    student_id = create_student(db, 'Ученик')
+    db.add_schedule(student_id, (moscow_now().weekday() + 2) % 7, '10:00')
+    expected = db.get_next_lesson(student_id)
+    assert expected is not None
+
+    async def scenario(async_db):
+        lesson = await async_db.get_next_lesson(student_id)
+        assert (lesson['schedule'].id, lesson['date'], lesson['day_name'], lesson['time'], lesson['duration']) == (
+            expected['schedule'].id, expected['date'], expected['day_name'], expected['time'], expected['duration']
+        )
+
+    run_async(scenario)
+
+def test_reminder_writes_update_the_dispatcher(db):
+    student_id = create_student(db, 'Ученик')
+    lesson_time = datetime.now() + timedelta(days=1)
+    sent_id = db.add_scheduled_reminder(student_id, 1, lesson_time - timedelta(minutes=15), lesson_time)
+    unsent_id = db.add_scheduled_reminder(student_id, 2, lesson_time - timedelta(minutes=10), lesson_time)
+    dispatcher = get_reminder_dispatcher()
+    dispatcher.load(db.get_unsent_reminders())
+    assert dispatcher.get_stats()['pending'] == 2
+
+    async def scenario(async_db):
+        batch = await async_db.get_reminder_batch([sent_id, unsent_id])
+        assert [reminder.id for reminder, _, _ in batch] == [sent_id, unsent_id]
+        assert await async_db.mark_reminders_sent([sent_id]) == 1
+        assert dispatcher.get_stats()['pending'] == 1
+        assert await async_db.delete_unsent_student_reminders(student_id) == [unsent_id]
+        assert dispatcher.get_stats()['pending'] == 0
+
+    run_async(scenario)
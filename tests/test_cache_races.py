@@ -0,0 +1,42 @@
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+from core.notification_counter import get_unread_counter
+from core.student_cache import get_student_cache
+from conftest import create_student
+
+@contextmanager
+def during_first_select(engine, action):
+    """Выполняет action один раз прямо перед первым SELECT — как параллельный обработчик"""
+    pending = [action]
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if pending and statement.lstrip().upper().startswith('SELECT'):
+            pending.pop()()
+
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+def test_unread_count_is_not_cached_after_concurrent_change(db):
+    student_id = create_student(db, 'Ученик')
+    # Уведомление добавлено, пока COUNT(*) уже выполнялся со старым снимком
+    with during_first_select(db.engine, lambda: get_unread_counter().increment(('student', student_id))):
+        assert db.count_unread_notifications(student_id) == 0
+    assert get_unread_counter().get(('student', student_id)) is None
+
+    db.add_notification(student_id, 'homework', 'Новое задание')
+    assert db.count_unread_notifications(student_id) == 1
+
+def test_student_row_is_not_cached_after_concurrent_invalidate(db):
+    student_id = create_student(db, 'Ученик')
+    # Студента изменили и сбросили из кэша, пока читалась прежняя строка
+    with during_first_select(db.engine, lambda: get_student_cache().invalidate(student_id)):
+        assert db.get_student_by_id(student_id).id == student_id
+    assert get_student_cache().get_by_id(student_id) is None
+
+    db.get_student_by_id(student_id)
+    assert get_student_cache().get_by_id(student_id) is not None
@@ -0,0 +1,55 @@
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+from core.database import ExamType, Homework, Note
+from conftest import create_student
+
+@contextmanager
+def count_statements(engine):
+    """Считает SQL-запросы, выполненные движком внутри блока"""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+def test_get_homework_status_for_student_runs_one_statement(db):
+    student_id = create_student(db, 'Ученик')
+    for number in range(1, 21):
+        db.add_homework(f'Задание {number}', f'https://example.com/{number}', ExamType.OGE)
+    db.add_homework('Задание 5', 'https://example.com/ege', ExamType.EGE)
+    session = db.Session()
+    homework_ids = [homework_id for homework_id, in session.query(Homework.id).order_by(Homework.id)]
+    session.close()
+    for homework_id in homework_ids:
+        db.assign_homework_to_student(student_id, homework_id)
+    db.update_homework_status(student_id, homework_ids[0], 'completed')
+
+    with count_statements(db.engine) as statements:
+        statuses = db.get_homework_status_for_student(student_id, ExamType.OGE)
+
+    assert len(statements) == 1
+    assert len(statuses) == 20
+    assert statuses[1] == 'completed'
+
+def test_get_notes_for_student_runs_one_statement(db):
+    student_id = create_student(db, 'Ученик')
+    for number in (11, 2, 1, 23):
+        db.add_note(f'Конспект {number}', f'https://example.com/{number}', ExamType.OGE)
+    session = db.Session()
+    note_ids = [note_id for note_id, in session.query(Note.id).order_by(Note.id)]
+    session.close()
+    for note_id in note_ids:
+        db.assign_note_to_student(student_id, note_id)
+
+    with count_statements(db.engine) as statements:
+        notes = db.get_notes_for_student(student_id)
+
+    assert len(statements) == 1
+    assert [note.title for note in notes] == ['Конспект 1', 'Конспект 2', 'Конспект 11', 'Конспект 23']
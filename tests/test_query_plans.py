@@ -0,0 +1,77 @@
+from datetime import datetime, timedelta
+import re
+
+import pytest
+from sqlalchemy import event
+
+from core.database import ExamType
+from conftest import create_student
+
+def capture_selects(engine, call):
+    """Выполняет call и возвращает выполненные им SELECT вместе с параметрами"""
+    selects = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT'):
+            selects.append((statement, parameters))
+
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        call()
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+    return selects
+
+def query_plan(engine, statement, parameters) -> list:
+    """Строки EXPLAIN QUERY PLAN для запроса"""
+    with engine.connect() as conn:
+        return [row[3] for row in conn.exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, parameters)]
+
+def seed(db):
+    student_id = create_student(db, 'Ученик')
+    db.add_admin(100, 'admin')
+    db.add_schedule(student_id, 2, '10:00')
+    return student_id, db.get_admin_by_telegram_id(100).id
+
+def tomorrow() -> datetime:
+    """Полночь завтрашнего дня: рабочий день целиком впереди в любое время запуска"""
+    return (datetime.now() + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+
+# Горячие выборки и индексы (миграции 20 и 22), которые они должны использовать
+HOT_QUERIES = [
+    ('notifications', 'ix_notifications_student_read',
+     lambda db, student_id, admin_id: db.count_unread_notifications(student_id)),
+    ('notifications', 'ix_notifications_admin_read',
+     lambda db, student_id, admin_id: db.count_unread_admin_notifications(admin_id)),
+    ('push_messages', 'ix_push_messages_user_id',
+     lambda db, student_id, admin_id: db.get_push_messages(student_id)),
+    ('student_homework', 'ix_student_homework_student_homework_assigned',
+     lambda db, student_id, admin_id: db.get_homeworks_for_student(student_id)),
+    ('scheduled_reminders', 'ix_scheduled_reminders_sent_time',
+     lambda db, student_id, admin_id: db.get_reminder_batch(current_time=tomorrow())),
+    ('lesson_occurrences', 'ix_lesson_occurrences_student_start',
+     lambda db, student_id, admin_id: db.get_next_lesson(student_id)),
+    ('lesson_occurrences', 'ix_lesson_occurrences_start_time',
+     lambda db, student_id, admin_id: db.get_available_slots_for_day(tomorrow(), 60)),
+    ('students', 'ix_students_password',
+     lambda db, student_id, admin_id: db.get_student_by_password('missing')),
+    ('students', 'ix_students_exam_type',
+     lambda db, student_id, admin_id: db.get_students_by_exam_type(ExamType.OGE)),
+]
+
+@pytest.mark.parametrize('table, index, call', HOT_QUERIES, ids=[index for _, index, _ in HOT_QUERIES])
+def test_hot_query_uses_index(db, table, index, call):
+    student_id, admin_id = seed(db)
+    selects = [
+        (statement, parameters)
+        for statement, parameters in capture_selects(db.engine, lambda: call(db, student_id, admin_id))
+        if re.search(rf'\b{table}\b', statement)
+    ]
+    assert selects, f'запрос к {table} не выполнялся'
+
+    plans = [line for statement, parameters in selects for line in query_plan(db.engine, statement, parameters)]
+    table_lines = [line for line in plans if re.search(rf'\b{table}\b', line)]
+    assert not [line for line in table_lines if re.match(rf'SCAN {table}\b', line)], plans
+    assert any(
+        re.search(rf'USING (COVERING )?INDEX {index}\b', line) for line in table_lines
+    ), plans
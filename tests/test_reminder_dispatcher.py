@@ -0,0 +1,52 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from core import reminder_dispatcher
+from core.reminder_dispatcher import MOSCOW_TZ, ReminderDispatcher
+
+def moscow_now() -> datetime:
+    """Текущее московское время без tzinfo — как reminder_time в базе"""
+    return datetime.now(MOSCOW_TZ).replace(tzinfo=None)
+
+class FakeJob:
+    def schedule_removal(self):
+        pass
+
+class FakeJobQueue:
+    """JobQueue без планировщика: задачи диспетчера вызываются из теста"""
+    def run_once(self, callback, when, name=None):
+        return FakeJob()
+
+def test_failed_reminder_is_retried_until_confirmed(monkeypatch):
+    monkeypatch.setattr(reminder_dispatcher, 'REMINDER_RETRY_SECONDS', 0)
+    attempts = []
+
+    async def on_due(context, reminders):
+        attempts.append([reminder.reminder_id for reminder in reminders])
+        if len(attempts) == 1:
+            raise RuntimeError('Telegram недоступен')
+        dispatcher.cancel([reminder.reminder_id for reminder in reminders])
+
+    dispatcher = ReminderDispatcher()
+    dispatcher.start(FakeJobQueue(), on_due)
+    dispatcher.add(1, 10, 100, moscow_now() - timedelta(seconds=1))
+
+    asyncio.run(dispatcher._dispatch(None))
+    assert dispatcher.get_stats()['pending'] == 1
+    asyncio.run(dispatcher._dispatch(None))
+    asyncio.run(dispatcher._dispatch(None))
+    assert attempts == [[1], [1]]
+    assert dispatcher.get_stats()['pending'] == 0
+
+def test_retry_stops_after_grace_period(monkeypatch):
+    monkeypatch.setattr(reminder_dispatcher, 'REMINDER_GRACE_SECONDS', 60)
+
+    async def on_due(context, reminders):
+        raise RuntimeError('Telegram недоступен')
+
+    dispatcher = ReminderDispatcher()
+    dispatcher.start(FakeJobQueue(), on_due)
+    dispatcher.add(1, 10, 100, moscow_now() - timedelta(seconds=50))
+
+    asyncio.run(dispatcher._dispatch(None))
+    assert dispatcher.get_stats()['pending'] == 0
@@ -0,0 +1,133 @@
+from datetime import datetime, timedelta, time as dtime
+import random
+
+import pytest
+
+from core.database import Schedule
+from core.ical_sync import ical_sync
+from core.slot_engine import calendar_intervals, free_slots, lesson_intervals, merge_intervals, time_to_minutes
+from conftest import create_student
+
+def naive_free_slots(day: datetime, work_start: str, work_end: str, duration: int, interval: int,
+                     lessons, busy_times) -> list:
+    """Эталон: прежний перебор слотов, где каждый слот проверяется по всем занятиям и событиям.
+
+    lessons — пары (время 'HH:MM', длительность), busy_times — события календаря
+    в формате ICalCalendarSync.get_busy_times.
+    """
+    start = datetime.strptime(work_start, "%H:%M").time()
+    end = datetime.strptime(work_end, "%H:%M").time()
+    slots = []
+    current = start
+    while current < end:
+        slot_end = (datetime.combine(day, current) + timedelta(minutes=duration)).time()
+        if slot_end <= end:
+            requested_start = datetime.combine(day, current)
+            requested_end = requested_start + timedelta(minutes=duration)
+            busy = False
+            for time, lesson_duration in lessons:
+                lesson_start = datetime.combine(day, datetime.strptime(time, "%H:%M").time())
+                if requested_start < lesson_start + timedelta(minutes=lesson_duration) and requested_end > lesson_start:
+                    busy = True
+            for event in busy_times:
+                if current < event['end'] and slot_end > event['start']:
+                    busy = True
+            if not busy:
+                slots.append({
+                    'time': current.strftime('%H:%M'),
+                    'end_time': slot_end.strftime('%H:%M'),
+                    'display': f"{current.strftime('%H:%M')}-{slot_end.strftime('%H:%M')}"
+                })
+        current = (datetime.combine(day, current) + timedelta(minutes=interval)).time()
+    return slots
+
+def random_lessons(rnd: random.Random, count: int) -> list:
+    return [
+        (f"{rnd.randint(6, 21):02d}:{rnd.choice(range(0, 60, 5)):02d}", rnd.choice([30, 45, 60, 90, 120]))
+        for _ in range(count)
+    ]
+
+def random_busy_times(rnd: random.Random, count: int) -> list:
+    """События календаря как у ICalCalendarSync.get_busy_times, включая секунды и «весь день»"""
+    busy_times = []
+    for _ in range(count):
+        if rnd.random() < 0.1:
+            busy_times.append({'start': dtime(9, 0), 'end': dtime(18, 0), 'title': 'весь день'})
+            continue
+        start = rnd.randint(6 * 60, 21 * 60)
+        end = min(start + rnd.randint(15, 180), 23 * 60 + 59)
+        busy_times.append({
+            'start': dtime(start // 60, start % 60, rnd.choice([0, 0, 30])),
+            'end': dtime(end // 60, end % 60),
+            'title': 'событие'
+        })
+    return busy_times
+
+def random_settings(rnd: random.Random) -> dict:
+    return {
+        'work_start_time': f"{rnd.randint(6, 12):02d}:{rnd.choice([0, 15, 30]):02d}",
+        'work_end_time': f"{rnd.randint(14, 21):02d}:{rnd.choice([0, 30]):02d}",
+        'slot_interval': rnd.choice([5, 10, 15, 30]),
+    }
+
+def engine_slots(work_start: str, work_end: str, duration: int, interval: int, lessons, busy_times) -> list:
+    busy = lesson_intervals(lessons) + calendar_intervals(busy_times)
+    return free_slots(time_to_minutes(work_start), time_to_minutes(work_end), duration, interval, merge_intervals(busy))
+
+@pytest.mark.parametrize('seed', range(3))
+def test_free_slots_matches_naive_reference(seed):
+    rnd = random.Random(seed)
+    day = datetime(2026, 3, 2)
+    for _ in range(200):
+        settings = random_settings(rnd)
+        duration = rnd.choice([30, 45, 60, 90, 120])
+        lessons = random_lessons(rnd, rnd.randint(0, 15))
+        busy_times = random_busy_times(rnd, rnd.randint(0, 5))
+        expected = naive_free_slots(
+            day, settings['work_start_time'], settings['work_end_time'], duration,
+            settings['slot_interval'], lessons, busy_times
+        )
+        assert engine_slots(
+            settings['work_start_time'], settings['work_end_time'], duration,
+            settings['slot_interval'], lessons, busy_times
+        ) == expected, (settings, duration, lessons, busy_times)
+
+def test_get_available_slots_for_day_matches_naive_reference(db, monkeypatch):
+    rnd = random.Random(42)
+    student_ids = [create_student(db, f'Ученик {i}') for i in range(15)]
+    busy_times = []
+    monkeypatch.setattr(ical_sync, 'get_busy_times', lambda date: busy_times)
+    tomorrow = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+    non_empty = 0
+    for _ in range(60):
+        # Новое расписание: правила разворачиваются в lesson_occurrences
+        session = db.Session()
+        try:
+            session.query(Schedule).delete()
+            for student_id, (time, duration) in zip(student_ids, random_lessons(rnd, rnd.randint(0, 15))):
+                session.add(Schedule(
+                    student_id=student_id, day_of_week=rnd.randint(0, 6), time=time,
+                    duration=duration, is_active=rnd.random() > 0.15
+                ))
+            session.commit()
+            schedules = [(s.day_of_week, s.time, s.duration) for s in session.query(Schedule).filter_by(is_active=True)]
+        finally:
+            session.close()
+        db.refresh_lesson_occurrences()
+        busy_times[:] = random_busy_times(rnd, rnd.randint(0, 5))
+        settings = random_settings(rnd)
+        days = {d for d in range(7) if rnd.random() > 0.2}
+        # Обновление настроек сбрасывает кэш слотов
+        db.update_reschedule_settings(available_days=','.join(str(d) for d in sorted(days)), **settings)
+
+        date = tomorrow + timedelta(days=rnd.randint(0, 13))
+        duration = rnd.choice([30, 45, 60, 90, 120])
+        lessons = [(time, lesson_duration) for day, time, lesson_duration in schedules if day == date.weekday()]
+        expected = naive_free_slots(
+            date, settings['work_start_time'], settings['work_end_time'], duration,
+            settings['slot_interval'], lessons, busy_times
+        ) if date.weekday() in days else []
+        slots = db.get_available_slots_for_day(date, duration)
+        assert slots == expected, (settings, duration, lessons, busy_times)
+        non_empty += bool(slots)
+    assert non_empty > 10